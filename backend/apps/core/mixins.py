@@ -0,0 +1,320 @@
+# ========================================================
+# SISTEMA ERP UNIVERSAL - Mixins de Vistas
+# ========================================================
+# Versión: 1.0
+#
+# Propósito: Comportamientos reutilizables para los ViewSets
+# de todos los microservicios.
+# ========================================================
+
+import hashlib
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+
+from apps.core.serializers import DynamicFieldsMixin
+
+
+# Rutas calculadas por (serializador, modelo); los serializadores son
+# estáticos, así que basta con inspeccionarlos una vez por proceso.
+_EAGER_LOADING_CACHE: Dict[Tuple[type, type], Tuple[Set[str], Set[str]]] = {}
+
+
+def _collect_eager_paths(
+    serializer: serializers.BaseSerializer,
+    model: Type[models.Model],
+    prefix: str,
+    in_prefetch: bool,
+    select: Set[str],
+    prefetch: Set[str]
+) -> None:
+    """
+    Recorre los campos del serializador y acumula las relaciones que usa.
+    
+    - Relaciones a uno (FK, OneToOne) → select_related
+    - Relaciones a muchos (FK inversa, M2M) → prefetch_related
+    - Todo lo que cuelga de una relación a muchos se agrega al prefetch
+    """
+    for field in serializer.fields.values():
+        if field.source == '*' or getattr(field, 'write_only', False):
+            continue
+        
+        current_model = model
+        path = []
+        is_multi = in_prefetch
+        for attr in field.source.split('.'):
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation or model_field.related_model is None:
+                break
+            path.append(attr)
+            if model_field.many_to_many or model_field.one_to_many:
+                is_multi = True
+            current_model = model_field.related_model
+        
+        if not path:
+            continue
+        
+        # Un PrimaryKeyRelatedField sobre FK directa no requiere JOIN
+        if (
+            len(path) == 1
+            and not is_multi
+            and isinstance(field, serializers.RelatedField)
+        ):
+            continue
+        
+        lookup = '__'.join(([prefix] if prefix else []) + path)
+        (prefetch if is_multi else select).add(lookup)
+        
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.ModelSerializer) and current_model is not None:
+            _collect_eager_paths(
+                nested, current_model, lookup, is_multi, select, prefetch
+            )
+
+
+def get_eager_loading_paths(
+    serializer_class: Type[serializers.BaseSerializer],
+    model: Type[models.Model]
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Obtiene (select_related, prefetch_related) requeridos por un serializador.
+    
+    Returns:
+        Tuple[Set[str], Set[str]]: rutas para select_related y prefetch_related
+    """
+    key = (serializer_class, model)
+    if key not in _EAGER_LOADING_CACHE:
+        select: Set[str] = set()
+        prefetch: Set[str] = set()
+        _collect_eager_paths(serializer_class(), model, '', False, select, prefetch)
+        # Una ruta a uno ya cubierta por otra más larga es redundante
+        select = {
+            path for path in select
+            if not any(other.startswith(path + '__') for other in select)
+        }
+        _EAGER_LOADING_CACHE[key] = (select, prefetch)
+    return _EAGER_LOADING_CACHE[key]
+
+
+class EagerLoadingMixin:
+    """
+    Aplica select_related/prefetch_related según el serializador en uso.
+    
+    Propósito:
+        Evitar N+1 sin mantener a mano, en cada get_queryset, una lista de
+        relaciones que se desincroniza del serializador.
+    
+    Cómo funciona:
+        Se inspeccionan los campos del serializador de la acción (fuentes
+        con puntos como 'employee.full_name' y serializadores anidados) y
+        se derivan las rutas una sola vez por clase. Las relaciones que solo
+        usa un SerializerMethodField se declaran en select_related_fields o
+        prefetch_related_fields.
+    
+    Uso:
+        class EmployeeViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
+            prefetch_related_fields = ['documents']
+    """
+    
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.apply_eager_loading(queryset, self.get_serializer_class())
+    
+    def apply_eager_loading(self, queryset, serializer_class):
+        """
+        Aplica las relaciones que requiere serializer_class a queryset.
+        
+        Útil también en acciones personalizadas que serializan otro modelo.
+        Las rutas ya cubiertas por un Prefetch del queryset se respetan.
+        """
+        select, prefetch = get_eager_loading_paths(serializer_class, queryset.model)
+        
+        if queryset.model is self._base_model():
+            select = select | set(self.select_related_fields)
+            prefetch = prefetch | set(self.prefetch_related_fields)
+        
+        # Un Prefetch propio (p. ej. con .only()) ya cubre su ruta y las
+        # que cuelgan de ella; repetirlas como texto haría fallar Django
+        covered = [
+            getattr(lookup, 'prefetch_to', lookup)
+            for lookup in queryset._prefetch_related_lookups
+        ]
+        prefetch = {
+            path for path in prefetch
+            if not any(path == c or path.startswith(c + '__') for c in covered)
+        }
+        
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+    
+    def _base_model(self):
+        queryset = getattr(self, 'queryset', None)
+        return queryset.model if queryset is not None else None
+
+
+class SparseFieldsMixin:
+    """
+    Atiende ?fields=id,sku,name en list y retrieve.
+    
+    Propósito:
+        Reducir la respuesta y, en el listado, las columnas leídas de la
+        base de datos a los campos que el cliente pide.
+    
+    Cómo funciona:
+        get_serializer pasa los campos pedidos a los serializadores con
+        DynamicFieldsMixin. get_sparse_columns traduce esos campos a
+        columnas para .only(): los campos directos del modelo se resuelven
+        solos y el resto se declara en sparse_field_columns (campo →
+        columnas de las que depende). Si algún campo no se puede resolver
+        no se limita el SELECT: una columna diferida faltante provocaría
+        una consulta por fila.
+    
+    Uso:
+        class ProductViewSet(SparseFieldsMixin, BaseViewSet):
+            sparse_field_columns = {'category_name': ('category',)}
+    """
+    
+    sparse_fields_param = 'fields'
+    sparse_field_columns: Dict[str, Tuple[str, ...]] = {}
+    
+    def get_requested_fields(self) -> Optional[FrozenSet[str]]:
+        """Campos pedidos en la URL o None si se quieren todos."""
+        request = getattr(self, 'request', None)
+        if request is None or self.action not in ('list', 'retrieve'):
+            return None
+        raw = request.query_params.get(self.sparse_fields_param, '')
+        requested = frozenset(name.strip() for name in raw.split(',') if name.strip())
+        return requested or None
+    
+    def get_serializer(self, *args, **kwargs):
+        requested = self.get_requested_fields()
+        if requested is not None and issubclass(
+            self.get_serializer_class(), DynamicFieldsMixin
+        ):
+            kwargs.setdefault('fields', requested)
+        return super().get_serializer(*args, **kwargs)
+    
+    def get_sparse_columns(self, serializer_class) -> Optional[List[str]]:
+        """
+        Columnas del modelo que requieren los campos pedidos.
+        
+        Returns:
+            Optional[List[str]]: argumentos para .only() o None si no se
+            pidieron campos o alguno no se pudo resolver
+        """
+        requested = self.get_requested_fields()
+        if requested is None:
+            return None
+        model = serializer_class.Meta.model
+        serializer = serializer_class(fields=requested)
+        columns = {model._meta.pk.name}
+        for name, field in serializer.fields.items():
+            if name in self.sparse_field_columns:
+                columns.update(self.sparse_field_columns[name])
+                continue
+            try:
+                model_field = model._meta.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or '.' in field.source:
+                return None
+            columns.add(model_field.name)
+        return sorted(columns)
+
+
+# ========================================================
+# Peticiones Condicionales
+# ========================================================
+
+def get_queryset_validators(request, queryset) -> Tuple[str, Optional[int]]:
+    """
+    Calcula (ETag, Last-Modified) de un queryset con una sola agregación.
+    
+    El ETag combina el updated_at más reciente, el número de filas (una
+    baja lógica lo reduce) y la URL/formato pedidos, de modo que cada
+    combinación de filtros tiene su propio validador.
+    
+    Returns:
+        Tuple[str, Optional[int]]: ETag entrecomillado y timestamp en
+        segundos (la precisión de If-Modified-Since)
+    """
+    stats = queryset.order_by().aggregate(
+        last_modified=Max('updated_at'), total=Count('pk')
+    )
+    last_modified = stats['last_modified']
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = '|'.join([
+        last_modified.isoformat() if last_modified else '',
+        str(stats['total']),
+        request.get_full_path(),
+        getattr(renderer, 'format', '') or '',
+    ])
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, int(last_modified.timestamp()) if last_modified else None
+
+
+def conditional_response(request, queryset, build_response, max_age=None):
+    """
+    Responde 304 si el cliente ya tiene la versión vigente de queryset.
+    
+    build_response solo se invoca cuando hay que serializar; en ambos
+    casos se devuelven ETag/Last-Modified y, si se indica max_age,
+    Cache-Control privado.
+    
+    Por qué privado y Vary: Authorization: la respuesta depende del
+    usuario autenticado (permisos, datos del empleado); un proxy o CDN
+    compartido no debe servirla a otro usuario.
+    """
+    etag, last_modified = get_queryset_validators(request, queryset)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = build_response()
+    
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Authorization'])
+    if max_age is not None:
+        patch_cache_control(response, private=True, max_age=max_age)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Agrega ETag/Last-Modified y Cache-Control a la acción list.
+    
+    Pensado para catálogos que casi no cambian (feriados, tipos de
+    ausencia, horarios): las recargas del cliente se resuelven con un
+    304 sin serializar ni paginar.
+    """
+    
+    list_cache_max_age = 300
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return conditional_response(
+            request,
+            queryset,
+            lambda: super(ConditionalListMixin, self).list(request, *args, **kwargs),
+            max_age=self.list_cache_max_age,
+        )
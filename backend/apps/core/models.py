@@ -15,7 +15,10 @@
 # ========================================================
 
 import uuid
-from django.db import models
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.conf import settings
 
@@ -316,6 +319,117 @@ class BaseModel(UUIDModel, AuditModel):
         ordering = ['-created_at']
 
 
+# ========================================================
+# Jerarquías (parent = ForeignKey('self'))
+# ========================================================
+
+def _subtree_cte(
+    model,
+    root_pks: List[Any],
+    parent_field: str,
+    conditions: Optional[Dict[str, Any]]
+) -> Tuple[str, List[Any]]:
+    """
+    Arma la CTE recursiva subtree(pk, is_root) y sus parámetros.
+    
+    Por qué WITH RECURSIVE:
+        PostgreSQL y SQLite lo soportan de forma nativa, lo que evita
+        migrar el modelo a nested sets (django-mptt) y recalcular
+        lft/rght en cada alta. UNION descarta duplicados, así que un
+        ciclo accidental en los datos no provoca un bucle infinito.
+    """
+    meta = model._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    pk_column = qn(meta.pk.column)
+    parent_column = qn(meta.get_field(parent_field).column)
+    
+    root_params = [
+        meta.pk.get_db_prep_value(pk, connection) for pk in root_pks
+    ]
+    where = []
+    condition_params = []
+    for name, value in (conditions or {}).items():
+        field = meta.get_field(name)
+        where.append(f"c.{qn(field.column)} = %s")
+        condition_params.append(field.get_db_prep_value(value, connection))
+    extra = ''.join(f" AND {clause}" for clause in where)
+    
+    sql = (
+        f"WITH RECURSIVE subtree(pk, is_root) AS ("
+        f" SELECT t.{pk_column}, 1 FROM {table} t"
+        f" WHERE t.{pk_column} IN ({', '.join(['%s'] * len(root_params))})"
+        f" UNION"
+        f" SELECT c.{pk_column}, 0 FROM {table} c"
+        f" JOIN subtree s ON c.{parent_column} = s.pk"
+        f" WHERE 1 = 1{extra}"
+        f")"
+    )
+    return sql, root_params + condition_params
+
+
+def get_subtree_pks(
+    model,
+    root_pks: Iterable[Any],
+    parent_field: str = 'parent',
+    include_roots: bool = True,
+    conditions: Optional[Dict[str, Any]] = None
+) -> List[Any]:
+    """
+    Obtiene las claves de un subárbol completo con una consulta recursiva.
+    
+    Propósito:
+        Recorrer una jerarquía de lista de adyacencia sin una consulta
+        por nivel o por nodo.
+    
+    Args:
+        model: Modelo con la FK a sí mismo
+        root_pks: Claves de los nodos de partida
+        parent_field: Nombre de la FK al padre
+        include_roots: Si se incluyen los nodos de partida en el resultado
+        conditions: Igualdades {campo: valor} que deben cumplir los
+            descendientes (ej. {'is_active': True}); una rama que no las
+            cumple se corta junto con sus hijos
+    
+    Returns:
+        List: Claves primarias del subárbol
+    """
+    root_pks = list(root_pks)
+    if not root_pks:
+        return []
+    
+    cte, params = _subtree_cte(model, root_pks, parent_field, conditions)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{cte} SELECT pk, MAX(is_root) FROM subtree GROUP BY pk", params)
+        rows = cursor.fetchall()
+    
+    meta = model._meta
+    return [
+        meta.pk.to_python(pk) for pk, is_root in rows
+        if include_roots or not is_root
+    ]
+
+
+def subtree_subquery(
+    model,
+    root_pks: Iterable[Any],
+    parent_field: str = 'parent',
+    conditions: Optional[Dict[str, Any]] = None
+) -> RawSQL:
+    """
+    Subconsulta con las claves del subárbol (nodos de partida incluidos).
+    
+    A diferencia de get_subtree_pks no ejecuta nada: se usa como
+    filter(pk__in=...) y la CTE viaja dentro de la misma consulta que
+    carga las filas, que además admite select_related, order_by, etc.
+    """
+    root_pks = list(root_pks)
+    if not root_pks:
+        return RawSQL("SELECT NULL WHERE 1 = 0", [])
+    cte, params = _subtree_cte(model, root_pks, parent_field, conditions)
+    return RawSQL(f"{cte} SELECT pk FROM subtree", params)
+
+
 class StatusChoices(models.TextChoices):
     """
     Opciones de estado reutilizables para múltiples modelos.
@@ -0,0 +1,71 @@
+# ========================================================
+# SISTEMA ERP UNIVERSAL - Serializadores Base
+# ========================================================
+# Versión: 1.0
+#
+# Propósito: Comportamientos reutilizables para los serializadores
+# de todos los microservicios.
+# ========================================================
+
+import copy
+from typing import Dict, Iterable, Optional
+
+from rest_framework import serializers
+
+
+class CachedFieldsMixin:
+    """
+    Construye los campos de un ModelSerializer una sola vez por clase.
+
+    Por qué:
+        ModelSerializer.get_fields() inspecciona el modelo (tipos, relaciones,
+        validadores de unicidad) en cada instancia, es decir, en cada
+        petición y en cada serializador anidado. El resultado solo depende
+        de la clase, así que se calcula una vez y cada instancia recibe una
+        copia profunda: los campos se enlazan (bind) a su padre y no pueden
+        compartirse entre peticiones.
+
+    Uso:
+        class ProductSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+            ...
+
+    No aplicar en serializadores cuyo get_fields() dependa del contexto
+    (usuario, parámetros de la petición).
+    """
+
+    _fields_cache: Dict[type, Dict[str, serializers.Field]] = {}
+
+    def get_fields(self):
+        cls = type(self)
+        cached = CachedFieldsMixin._fields_cache.get(cls)
+        if cached is None:
+            cached = super().get_fields()
+            CachedFieldsMixin._fields_cache[cls] = cached
+        return copy.deepcopy(cached)
+
+
+class DynamicFieldsMixin:
+    """
+    Permite limitar los campos serializados (sparse fieldsets).
+
+    Por qué:
+        Muchos clientes solo necesitan unas pocas columnas de un listado;
+        los campos no pedidos no se evalúan ni viajan en la respuesta.
+
+    Uso:
+        ProductListSerializer(queryset, many=True, fields={'id', 'sku'})
+
+    Los nombres desconocidos se ignoran. Combinar con CachedFieldsMixin
+    detrás de este mixin: la caché guarda siempre el conjunto completo.
+    """
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        self._requested_fields = set(fields) if fields is not None else None
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self._requested_fields is not None:
+            for name in set(fields) - self._requested_fields:
+                fields.pop(name)
+        return fields
@@ -7,13 +7,14 @@
 # Propósito: Funciones utilitarias para todo el sistema.
 # ========================================================
 
+import csv
 import uuid
 import hashlib
 import random
 import string
 from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
 from django.utils import timezone
 
@@ -227,6 +228,64 @@ def date_range(
     return dates
 
 
+def day_range_filter(
+    field: str,
+    start_date: Optional[Union[date, str]] = None,
+    end_date: Optional[Union[date, str]] = None
+) -> Dict[str, datetime]:
+    """
+    Filtro por días (inclusive) sobre un DateTimeField.
+    
+    Por qué: field__date__gte convierte cada fila a fecha local antes de
+    comparar, lo que impide usar los índices de la columna; comparar con
+    el inicio de cada día en la zona horaria actual es equivalente.
+    
+    Args:
+        field: Nombre del campo (ej. 'created_at')
+        start_date: Primer día incluido (date o 'YYYY-MM-DD')
+        end_date: Último día incluido (date o 'YYYY-MM-DD')
+        
+    Returns:
+        Dict para queryset.filter(**...)
+    """
+    from datetime import time, timedelta
+    
+    def start_of(day):
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return timezone.make_aware(datetime.combine(day, time.min))
+    
+    lookups = {}
+    if start_date:
+        lookups[f'{field}__gte'] = start_of(start_date)
+    if end_date:
+        lookups[f'{field}__lt'] = start_of(end_date) + timedelta(days=1)
+    return lookups
+
+
+class _EchoBuffer:
+    """
+    Pseudo-buffer para csv.writer: devuelve la línea en lugar de
+    almacenarla, de modo que cada fila se emite al vuelo.
+    """
+    
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(header: List[str], rows: Iterable) -> Iterator[str]:
+    """
+    Emite header y rows como líneas CSV, una a una.
+    
+    Pensado para StreamingHttpResponse con rows = queryset.iterator():
+    la memoria queda acotada al lote del cursor, no al total de filas.
+    """
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
 def get_fiscal_year(reference_date: Optional[date] = None) -> Dict[str, date]:
     """
     Obtiene el año fiscal basado en una fecha.
@@ -0,0 +1,37 @@
+# ========================================================
+# SISTEMA ERP UNIVERSAL - Filtros de RRHH
+# ========================================================
+# Versión: 1.0
+#
+# Propósito: FilterSets tipados para los listados de RRHH.
+#
+# Por qué: django-filter convierte y valida cada parámetro una
+# sola vez; un valor inválido responde 400 en lugar de provocar
+# un error 500 al convertirlo a mano en la vista.
+# ========================================================
+
+import django_filters
+
+from .models import Attendance, Holiday
+
+
+class HolidayFilterSet(django_filters.FilterSet):
+    """Filtros de feriados (incluye ?year=)."""
+    
+    year = django_filters.NumberFilter(field_name='date', lookup_expr='year')
+    
+    class Meta:
+        model = Holiday
+        fields = ['is_recurring', 'applies_to_all', 'year']
+
+
+class AttendanceFilterSet(django_filters.FilterSet):
+    """Filtros de asistencia con rango de fechas (?start_date=&end_date=)."""
+    
+    start_date = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    end_date = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+    
+    class Meta:
+        model = Attendance
+        fields = ['employee', 'date', 'status', 'start_date', 'end_date']
+
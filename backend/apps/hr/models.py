@@ -387,6 +387,12 @@ class Employee(BaseModel, SoftDeleteModel):
         verbose_name = 'Empleado'
         verbose_name_plural = 'Empleados'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Orden del listado y paginación por cursor
+            models.Index(fields=['last_name', 'first_name', 'id']),
+            # Estadísticas y filtros del listado por estado/departamento/puesto
+            models.Index(fields=['status', 'department', 'position']),
+        ]
     
     def __str__(self):
         return f"{self.employee_code} - {self.full_name}"
@@ -566,6 +572,22 @@ class LeaveType(BaseModel):
         return self.name
 
 
+def leave_days(start_date, end_date, start_half_day=False, end_half_day=False) -> float:
+    """
+    Días de ausencia entre dos fechas inclusivas, restando medio día por
+    cada extremo marcado como medio día.
+    
+    Por qué función de módulo: la usan LeaveRequest.days y los servicios
+    que trabajan con filas de .values(); la regla vive en un solo lugar.
+    """
+    days = (end_date - start_date).days + 1
+    if start_half_day:
+        days -= 0.5
+    if end_half_day:
+        days -= 0.5
+    return days
+
+
 class LeaveRequest(BaseModel):
     """
     Solicitudes de ausencia/permiso.
@@ -646,6 +668,13 @@ class LeaveRequest(BaseModel):
         verbose_name = 'Solicitud de Ausencia'
         verbose_name_plural = 'Solicitudes de Ausencia'
         ordering = ['-start_date']
+        indexes = [
+            # Cruce de fechas al solicitar y filtros del listado
+            models.Index(fields=['employee', 'status', 'start_date']),
+            models.Index(fields=['employee', 'leave_type', 'status']),
+            # Calendario: aprobadas que se solapan con un rango
+            models.Index(fields=['status', 'start_date', 'end_date']),
+        ]
     
     def __str__(self):
         return f"{self.employee} - {self.leave_type} ({self.start_date})"
@@ -653,12 +682,9 @@ class LeaveRequest(BaseModel):
     @property
     def days(self):
         """Calcula días de ausencia."""
-        delta = (self.end_date - self.start_date).days + 1
-        if self.start_half_day:
-            delta -= 0.5
-        if self.end_half_day:
-            delta -= 0.5
-        return delta
+        return leave_days(
+            self.start_date, self.end_date, self.start_half_day, self.end_half_day
+        )
 
 
 class LeaveBalance(BaseModel):
@@ -776,6 +802,12 @@ class Attendance(BaseModel):
         verbose_name_plural = 'Asistencias'
         unique_together = ['employee', 'date']
         ordering = ['-date']
+        indexes = [
+            # Reportes por rango de fechas (se une a empleado por departamento)
+            models.Index(fields=['date', 'employee']),
+            # Conteos por estado en un rango (reporte y nómina)
+            models.Index(fields=['employee', 'date', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.employee} - {self.date}"
@@ -1147,6 +1179,11 @@ class Payslip(BaseModel):
         verbose_name_plural = 'Recibos de Nómina'
         unique_together = ['period', 'employee']
         ordering = ['-period__start_date', 'employee__last_name']
+        indexes = [
+            # Aprobación/pago por período y estado; historial por empleado
+            models.Index(fields=['period', 'status']),
+            models.Index(fields=['employee', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.employee} - {self.period}"
@@ -1705,6 +1742,7 @@ class TrainingParticipant(BaseModel):
         db_table = 'hr_training_participant'
         verbose_name = 'Participante'
         verbose_name_plural = 'Participantes'
+        # También es el índice (training, employee) de enroll/update_participant
         unique_together = ['training', 'employee']
     
     def __str__(self):
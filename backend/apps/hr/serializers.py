@@ -579,6 +579,32 @@ class TrainingParticipantSerializer(serializers.ModelSerializer):
         ]
 
 
+class TrainingEnrollSerializer(serializers.Serializer):
+    """
+    Valida la inscripción masiva: lista de UUIDs de empleados existentes.
+    
+    Por qué: una sola consulta IN valida todos los IDs antes del INSERT;
+    los inexistentes se informan juntos en un 400.
+    """
+    
+    employee_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False
+    )
+    
+    def validate_employee_ids(self, value):
+        requested = list(dict.fromkeys(value))
+        found = set(
+            Employee.objects.filter(id__in=requested).values_list('id', flat=True)
+        )
+        missing = [str(emp_id) for emp_id in requested if emp_id not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f"Empleados no encontrados: {', '.join(missing)}"
+            )
+        return requested
+
+
 class TrainingSerializer(serializers.ModelSerializer):
     """Serializador de capacitaciones."""
     
@@ -595,6 +621,9 @@ class TrainingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_participants_count(self, obj):
+        # Anotado por TrainingViewSet en el listado
+        if hasattr(obj, 'participants_total'):
+            return obj.participants_total
         return obj.participants.count()
 
 
@@ -607,6 +636,45 @@ class TrainingDetailSerializer(TrainingSerializer):
         fields = TrainingSerializer.Meta.fields + ['participants']
 
 
+# ========================================================
+# Parámetros de Consulta
+# ========================================================
+
+class PeriodQuerySerializer(serializers.Serializer):
+    """
+    Valida ?department= y ?year= de acciones que no listan un queryset
+    (organigrama, saldos, analíticas). Entradas inválidas → 400.
+    """
+    
+    department = serializers.UUIDField(required=False)
+    year = serializers.IntegerField(required=False, min_value=1900, max_value=2100)
+
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    """Valida ?start_date=&end_date=[&department=] de reportes y calendario."""
+    
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    department = serializers.UUIDField(required=False)
+    
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({
+                'end_date': 'La fecha de fin no puede ser anterior a la fecha de inicio.'
+            })
+        return data
+
+
+class EmployeeTerminationSerializer(serializers.Serializer):
+    """
+    Valida la terminación antes de encolarla: una fecha inválida debe
+    responder 400, no fallar después dentro de la tarea.
+    """
+    
+    termination_date = serializers.DateField()
+    reason = serializers.CharField()
+
+
 # ========================================================
 # Reportes
 # ========================================================
@@ -7,14 +7,17 @@
 # Propósito: Lógica de negocio para el módulo de RRHH.
 # ========================================================
 
-from django.db import transaction
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.db.models import Sum, Avg, Count, Q, F
 from django.utils import timezone
 from decimal import Decimal
 from datetime import date, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 import logging
 
+from apps.core.utils import iter_csv
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,10 +26,42 @@ class HRService:
     Servicio principal de Recursos Humanos.
     """
     
+    # Caché usuario → empleado (evita el JOIN inverso en cada marca/aprobación)
+    USER_EMPLOYEE_CACHE_KEY = 'hr:user_employee:{user_id}'
+    USER_EMPLOYEE_CACHE_TTL = 60 * 15
+    
     # ====================================================
     # Gestión de Empleados
     # ====================================================
     
+    def get_user_employee_id(self, user_id) -> Optional[str]:
+        """
+        Obtiene el id del empleado asociado a un usuario del sistema.
+        
+        El resultado (incluida la ausencia de empleado, guardada como '')
+        se mantiene en caché 15 minutos; las señales de Employee invalidan
+        la entrada cuando cambia la asociación.
+        
+        Returns:
+            Optional[str]: id del empleado o None si el usuario no tiene uno
+        """
+        from .models import Employee
+        
+        if user_id is None:
+            return None
+        
+        cache_key = self.USER_EMPLOYEE_CACHE_KEY.format(user_id=user_id)
+        employee_id = cache.get(cache_key)
+        
+        if employee_id is None:
+            employee_id = Employee.objects.filter(
+                user_id=user_id
+            ).values_list('id', flat=True).first()
+            employee_id = str(employee_id) if employee_id else ''
+            cache.set(cache_key, employee_id, self.USER_EMPLOYEE_CACHE_TTL)
+        
+        return employee_id or None
+    
     def get_employee_statistics(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas generales de empleados.
@@ -78,52 +113,66 @@ class HRService:
             'average_years_of_service': round(avg_years, 2)
         }
     
+    # Tamaño de lote del cursor al leer la plantilla para el organigrama
+    ORG_CHART_CHUNK_SIZE = 1000
+    
     def get_employee_org_chart(self, department_id: Optional[int] = None) -> List[Dict]:
         """
         Genera el organigrama de la empresa.
-        """
-        from .models import Employee, Department
         
-        def build_tree(manager_id):
-            subordinates = Employee.objects.filter(
-                manager_id=manager_id,
-                status='active'
-            ).select_related('position', 'department')
-            
-            return [
-                {
-                    'id': emp.id,
-                    'name': emp.full_name,
-                    'position': emp.position.name if emp.position else None,
-                    'department': emp.department.name if emp.department else None,
-                    'photo': emp.photo.url if emp.photo else None,
-                    'subordinates': build_tree(emp.id)
-                }
-                for emp in subordinates
-            ]
+        Por qué una sola consulta: recorrer el árbol consultando los
+        subordinados de cada jefe cuesta una consulta por empleado. Aquí se
+        leen todos los activos una vez (por lotes, solo las columnas usadas)
+        y el árbol se arma con un diccionario de adyacencia en memoria.
+        """
+        from collections import defaultdict
+        from .models import Employee
         
-        # Obtener empleados sin manager (top level)
-        query = Employee.objects.filter(
-            manager__isnull=True,
-            status='active'
+        photo_storage = Employee._meta.get_field('photo').storage
+        
+        rows = Employee.objects.filter(status='active').values(
+            'id',
+            'manager_id',
+            'department_id',
+            'first_name',
+            'last_name',
+            'photo',
+            position_name=F('position__name'),
+            department_name=F('department__name'),
+        ).order_by('last_name', 'first_name').iterator(
+            chunk_size=self.ORG_CHART_CHUNK_SIZE
         )
         
-        if department_id:
-            query = query.filter(department_id=department_id)
-        
-        top_employees = query.select_related('position', 'department')
-        
-        return [
-            {
-                'id': emp.id,
-                'name': emp.full_name,
-                'position': emp.position.name if emp.position else None,
-                'department': emp.department.name if emp.department else None,
-                'photo': emp.photo.url if emp.photo else None,
-                'subordinates': build_tree(emp.id)
+        children = defaultdict(list)
+        for row in rows:
+            children[row['manager_id']].append(row)
+        
+        def build_tree(row, visited):
+            # visited evita ciclos accidentales en la cadena de jefes
+            visited = visited | {row['id']}
+            return {
+                'id': row['id'],
+                'name': f"{row['first_name']} {row['last_name']}",
+                'position': row['position_name'],
+                'department': row['department_name'],
+                'photo': photo_storage.url(row['photo']) if row['photo'] else None,
+                'subordinates': [
+                    build_tree(child, visited)
+                    for child in children.get(row['id'], [])
+                    if child['id'] not in visited
+                ]
             }
-            for emp in top_employees
-        ]
+        
+        # Empleados sin manager (top level)
+        top_employees = children.get(None, [])
+        
+        if department_id:
+            top_employees = [
+                row for row in top_employees
+                if str(row['department_id']) == str(department_id)
+            ]
+        
+        return [build_tree(row, frozenset()) for row in top_employees]
     
     def terminate_employee(
         self,
@@ -181,17 +230,13 @@ class LeaveService:
         """
         Crea una solicitud de ausencia.
         """
-        from .models import Employee, LeaveType, LeaveRequest, LeaveBalance
+        from .models import Employee, LeaveType, LeaveRequest, LeaveBalance, leave_days
         
         employee = Employee.objects.get(pk=employee_id)
         leave_type = LeaveType.objects.get(pk=leave_type_id)
         
         # Calcular días
-        total_days = (end_date - start_date).days + 1
-        if start_half_day:
-            total_days -= 0.5
-        if end_half_day:
-            total_days -= 0.5
+        total_days = leave_days(start_date, end_date, start_half_day, end_half_day)
         
         # Verificar saldo disponible
         current_year = start_date.year
@@ -331,31 +376,55 @@ class LeaveService:
     ) -> List[Dict]:
         """
         Obtiene calendario de ausencias.
+        
+        Una sola consulta con .values(): no se instancian modelos ni se
+        expande por día; el cliente dibuja cada rango en el calendario.
         """
-        from .models import LeaveRequest
+        from django.db.models import Value
+        from django.db.models.functions import Concat
+        from .models import LeaveRequest, leave_days
         
         query = LeaveRequest.objects.filter(
             status='approved',
             start_date__lte=end_date,
             end_date__gte=start_date
-        ).select_related('employee', 'leave_type')
+        )
         
         if department_id:
             query = query.filter(employee__department_id=department_id)
         
-        return [
-            {
-                'id': req.id,
-                'employee_id': req.employee_id,
-                'employee_name': req.employee.full_name,
-                'leave_type': req.leave_type.name,
-                'color': req.leave_type.color,
-                'start_date': req.start_date.isoformat(),
-                'end_date': req.end_date.isoformat(),
-                'days': float(req.days)
-            }
-            for req in query
-        ]
+        rows = query.values(
+            'id',
+            'employee_id',
+            'start_date',
+            'end_date',
+            'start_half_day',
+            'end_half_day',
+            leave_type_name=F('leave_type__name'),
+            leave_type_color=F('leave_type__color'),
+            employee_name=Concat(
+                'employee__first_name', Value(' '), 'employee__last_name'
+            ),
+        )
+        
+        calendar = []
+        for row in rows:
+            days = leave_days(
+                row['start_date'], row['end_date'],
+                row['start_half_day'], row['end_half_day']
+            )
+            calendar.append({
+                'id': row['id'],
+                'employee_id': row['employee_id'],
+                'employee_name': row['employee_name'],
+                'leave_type': row['leave_type_name'],
+                'color': row['leave_type_color'],
+                'start_date': row['start_date'].isoformat(),
+                'end_date': row['end_date'].isoformat(),
+                'days': float(days)
+            })
+        
+        return calendar
     
     def allocate_leave_balances(
         self,
@@ -417,6 +486,10 @@ class AttendanceService:
     Servicio de gestión de asistencia.
     """
     
+    # Clave de caché que marca una entrada ya registrada en el día
+    CHECK_IN_CACHE_KEY = 'atd:ci:{employee_id}:{date}'
+    CHECK_IN_CACHE_TTL = 60 * 60 * 24
+    
     def record_check_in(
         self,
         employee_id: int,
@@ -424,34 +497,30 @@ class AttendanceService:
     ) -> Dict[str, Any]:
         """
         Registra entrada de empleado.
+        
+        Por qué INSERT primero: en cambios de turno miles de empleados
+        marcan entrada en minutos y casi nunca existe fila del día; el
+        caso común es una sola sentencia en lugar de get_or_create + save.
+        La caché solo descarta marcas repetidas antes de llegar a la base
+        de datos; la restricción (employee, date) y el UPDATE condicional
+        sobre check_in IS NULL son los que impiden sobrescribir una entrada.
         """
-        from .models import Employee, Attendance, WorkSchedule
+        from .models import Attendance, WorkSchedule
         from datetime import datetime
         
-        employee = Employee.objects.get(pk=employee_id)
         today = timezone.now().date()
         current_time = timezone.now().time() if not check_time else datetime.strptime(check_time, '%H:%M').time()
+        duplicate = {
+            'success': False,
+            'error': 'Ya existe un registro de entrada para hoy'
+        }
         
-        # Verificar si ya existe registro
-        attendance, created = Attendance.objects.get_or_create(
-            employee=employee,
-            date=today,
-            defaults={
-                'check_in': current_time,
-                'status': 'present'
-            }
-        )
-        
-        if not created:
-            if attendance.check_in:
-                return {
-                    'success': False,
-                    'error': 'Ya existe un registro de entrada para hoy'
-                }
-            attendance.check_in = current_time
-            attendance.save()
+        cache_key = self.CHECK_IN_CACHE_KEY.format(employee_id=employee_id, date=today)
+        if not cache.add(cache_key, 1, self.CHECK_IN_CACHE_TTL):
+            return duplicate
         
-        # Verificar tardanza
+        # Verificar tardanza antes de escribir para hacerlo en una sola sentencia
+        attendance_status = 'present'
         schedule = WorkSchedule.objects.filter(is_default=True).first()
         if schedule:
             weekday = today.weekday()
@@ -459,14 +528,38 @@ class AttendanceService:
             expected_start = getattr(schedule, f'{day_names[weekday]}_start')
             
             if expected_start and current_time > expected_start:
-                attendance.status = 'late'
-                attendance.save()
+                attendance_status = 'late'
+        
+        try:
+            try:
+                with transaction.atomic():
+                    attendance_id = Attendance.objects.create(
+                        employee_id=employee_id,
+                        date=today,
+                        check_in=current_time,
+                        status=attendance_status
+                    ).pk
+            except IntegrityError:
+                # Ya hay fila del día: solo se completa si no tiene entrada
+                pending = Attendance.objects.filter(
+                    employee_id=employee_id, date=today, check_in__isnull=True
+                )
+                attendance_id = pending.values_list('pk', flat=True).first()
+                if attendance_id is None or not pending.filter(pk=attendance_id).update(
+                    check_in=current_time,
+                    status=attendance_status,
+                    updated_at=timezone.now()
+                ):
+                    return duplicate
+        except Exception:
+            cache.delete(cache_key)
+            raise
         
         return {
             'success': True,
-            'attendance_id': attendance.id,
+            'attendance_id': attendance_id,
             'check_in': str(current_time),
-            'status': attendance.status
+            'status': attendance_status
         }
     
     def record_check_out(
@@ -526,17 +619,28 @@ class AttendanceService:
             'overtime_hours': float(attendance.overtime_hours)
         }
     
+    # Tamaño de lote para el cursor del reporte en streaming
+    REPORT_CHUNK_SIZE = 2000
+    
     def get_attendance_report(
         self,
         start_date: date,
         end_date: date,
-        department_id: Optional[int] = None
-    ) -> Dict[str, Any]:
+        department_id: Optional[int] = None,
+        stream: bool = False
+    ):
         """
         Genera reporte de asistencia.
+        
+        Con stream=True devuelve un generador de líneas CSV (una por
+        registro) en lugar del resumen; la memoria queda acotada por
+        REPORT_CHUNK_SIZE y no por el tamaño del reporte.
         """
         from .models import Attendance, Employee, Holiday
         
+        if stream:
+            return self._stream_attendance_rows(start_date, end_date, department_id)
+        
         # Calcular días laborables
         holidays = Holiday.objects.filter(
             date__gte=start_date,
@@ -587,6 +691,42 @@ class AttendanceService:
             'by_status': by_status,
             'top_absences': top_absences
         }
+    
+    def _stream_attendance_rows(
+        self,
+        start_date: date,
+        end_date: date,
+        department_id: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Emite el detalle de asistencia como CSV leyendo la consulta
+        por lotes con un cursor del servidor.
+        """
+        from .models import Attendance
+        
+        query = Attendance.objects.filter(
+            date__gte=start_date,
+            date__lte=end_date
+        )
+        
+        if department_id:
+            query = query.filter(employee__department_id=department_id)
+        
+        rows = query.order_by('date', 'employee_id').values_list(
+            'employee_id',
+            'employee__employee_code',
+            'date',
+            'check_in',
+            'check_out',
+            'status',
+            'worked_hours',
+            'overtime_hours'
+        ).iterator(chunk_size=self.REPORT_CHUNK_SIZE)
+        
+        yield from iter_csv([
+            'employee_id', 'employee_code', 'date', 'check_in',
+            'check_out', 'status', 'worked_hours', 'overtime_hours'
+        ], rows)
 
 
 class PayrollService:
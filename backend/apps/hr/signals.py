@@ -0,0 +1,54 @@
+# ========================================================
+# SISTEMA ERP UNIVERSAL - Señales de RRHH
+# ========================================================
+# Versión: 1.0
+#
+# Propósito: Mantener coherentes las cachés del módulo de RRHH
+# cuando cambian los modelos de los que dependen.
+# ========================================================
+
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Employee
+from .services import HRService
+
+
+def _invalidate_user_employee(user_id):
+    """Elimina la entrada usuario → empleado de la caché."""
+    if user_id is not None:
+        cache.delete(HRService.USER_EMPLOYEE_CACHE_KEY.format(user_id=user_id))
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_user(sender, instance, **kwargs):
+    """
+    Guarda el usuario asociado antes del cambio.
+    
+    Por qué: si el empleado pasa de un usuario a otro, la entrada
+    del usuario anterior también debe invalidarse.
+    """
+    if instance._state.adding:
+        instance._previous_user_id = None
+        return
+    instance._previous_user_id = (
+        Employee.all_objects.filter(pk=instance.pk)
+        .values_list('user_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_user_employee_on_save(sender, instance, **kwargs):
+    """Invalida la caché usuario → empleado tras guardar."""
+    _invalidate_user_employee(instance.user_id)
+    previous_user_id = getattr(instance, '_previous_user_id', None)
+    if previous_user_id != instance.user_id:
+        _invalidate_user_employee(previous_user_id)
+
+
+@receiver(post_delete, sender=Employee)
+def invalidate_user_employee_on_delete(sender, instance, **kwargs):
+    """Invalida la caché usuario → empleado tras eliminar."""
+    _invalidate_user_employee(instance.user_id)
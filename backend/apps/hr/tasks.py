@@ -9,10 +9,10 @@
 # ========================================================
 
 from celery import shared_task
-from django.db import transaction
+from django.db import InterfaceError, OperationalError, transaction
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import send_mail, send_mass_mail
 from django.conf import settings
 from datetime import timedelta, date
 from decimal import Decimal
@@ -20,6 +20,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Errores que pueden resolverse reintentando (conexión perdida, bloqueo,
+# failover). Los de validación o de negocio fallarían igual en cada intento.
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
 
 # ========================================================
 # Tareas de Notificaciones
@@ -172,6 +176,47 @@ def notify_contract_expiration():
     return {'status': 'success', 'notifications': len(notifications)}
 
 
+# ========================================================
+# Tareas de Empleados
+# ========================================================
+
+@shared_task(bind=True, max_retries=3)
+def terminate_employee_task(
+    self,
+    employee_id: str,
+    termination_date: str,
+    reason: str,
+    user_id: str
+):
+    """
+    Procesa la terminación de un empleado fuera del ciclo request/response.
+    
+    Args:
+        employee_id: ID del empleado
+        termination_date: Fecha de terminación (YYYY-MM-DD)
+        reason: Motivo de la terminación
+        user_id: Usuario que solicita la terminación
+    """
+    from .services import HRService
+    
+    try:
+        result = HRService().terminate_employee(
+            employee_id=employee_id,
+            termination_date=date.fromisoformat(termination_date),
+            reason=reason,
+            user_id=user_id
+        )
+        logger.info(f"Terminación procesada: {result['employee_code']}")
+        return result
+        
+    except TRANSIENT_ERRORS as e:
+        logger.warning(f"Error transitorio en tarea de terminación: {str(e)}")
+        raise self.retry(exc=e, countdown=60)
+    except Exception as e:
+        logger.error(f"Error en tarea de terminación: {str(e)}")
+        raise
+
+
 # ========================================================
 # Tareas de Alertas
 # ========================================================
@@ -330,6 +375,33 @@ def process_payroll_async(self, period_id: int, user_id: int):
         self.retry(exc=e, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def process_payroll_payment_task(self, period_id: str, user_id: str):
+    """
+    Procesa el pago de la nómina de forma asíncrona.
+    """
+    from .services import PayrollService
+    
+    try:
+        result = PayrollService().process_payment(
+            period_id=period_id,
+            user_id=user_id
+        )
+        
+        if result['success']:
+            logger.info(f"Pago de nómina procesado: {period_id}")
+        else:
+            logger.error(f"Error procesando pago de nómina: {result.get('error')}")
+        return result
+        
+    except TRANSIENT_ERRORS as e:
+        logger.warning(f"Error transitorio en tarea de pago de nómina: {str(e)}")
+        raise self.retry(exc=e, countdown=60)
+    except Exception as e:
+        logger.error(f"Error en tarea de pago de nómina: {str(e)}")
+        raise
+
+
 @shared_task
 def send_payslip_notifications(period_id: int):
     """
@@ -585,6 +657,45 @@ def generate_performance_analytics(year: int = None):
 # Tareas de Capacitación
 # ========================================================
 
+@shared_task
+def send_enrollment_notifications(training_id: str, employee_ids: list):
+    """
+    Notifica a los empleados recién inscritos en una capacitación.
+    
+    Por qué asíncrono: la inscripción masiva no debe esperar al envío
+    de un correo por empleado; los mensajes salen por una sola conexión
+    SMTP (send_mass_mail) desde la cola training_notifications.
+    """
+    from .models import TrainingParticipant
+    
+    participants = TrainingParticipant.objects.filter(
+        training_id=training_id,
+        employee_id__in=employee_ids
+    ).select_related('training', 'employee')
+    
+    messages = []
+    for participant in participants:
+        training = participant.training
+        employee = participant.employee
+        email = employee.work_email or employee.email
+        if email:
+            messages.append((
+                f'[ERP] Inscripción a capacitación "{training.name}"',
+                f'Hola {employee.first_name},\n\n'
+                f'Has sido inscrito en la capacitación "{training.name}" '
+                f'del {training.start_date} al {training.end_date}.\n\n'
+                f'Ubicación: {training.location or "Por confirmar"}\n'
+                f'Duración: {training.duration_hours} horas',
+                settings.DEFAULT_FROM_EMAIL,
+                [email],
+            ))
+    
+    sent_count = send_mass_mail(messages, fail_silently=True) if messages else 0
+    
+    logger.info(f"Notificaciones de inscripción enviadas: {sent_count}")
+    return {'status': 'success', 'sent': sent_count}
+
+
 @shared_task
 def send_training_reminders():
     """
@@ -26,6 +26,7 @@ from .views import (
     PerformanceReviewTemplateViewSet,
     PerformanceReviewViewSet,
     TrainingViewSet,
+    HRTaskStatusView,
 )
 
 # Crear router
@@ -75,7 +76,7 @@ app_name = 'hr'
 #   GET    /api/v1/hr/employees/                - Lista empleados
 #   GET    /api/v1/hr/employees/statistics/     - Estadísticas
 #   GET    /api/v1/hr/employees/org-chart/      - Organigrama
-#   POST   /api/v1/hr/employees/{id}/terminate/ - Terminar contrato
+#   POST   /api/v1/hr/employees/{id}/terminate/ - Terminar contrato (202, asíncrono)
 #   GET    /api/v1/hr/employees/{id}/documents/ - Documentos
 #   GET    /api/v1/hr/employees/{id}/leave-balance/ - Saldo ausencias
 #   GET    /api/v1/hr/employees/{id}/payslips/  - Recibos de nómina
@@ -97,7 +98,7 @@ app_name = 'hr'
 #   GET    /api/v1/hr/payroll-periods/          - Períodos de nómina
 #   POST   /api/v1/hr/payroll-periods/{id}/generate-payslips/ - Generar nómina
 #   POST   /api/v1/hr/payroll-periods/{id}/approve/ - Aprobar nómina
-#   POST   /api/v1/hr/payroll-periods/{id}/process-payment/ - Procesar pago
+#   POST   /api/v1/hr/payroll-periods/{id}/process-payment/ - Procesar pago (202, asíncrono)
 #   GET    /api/v1/hr/payroll-periods/{id}/summary/ - Resumen de nómina
 #   GET    /api/v1/hr/salary-components/        - Componentes salariales
 #   GET    /api/v1/hr/payslips/                 - Recibos de nómina
@@ -117,8 +118,12 @@ app_name = 'hr'
 #   POST   /api/v1/hr/trainings/{id}/enroll/    - Inscribir empleados
 #   POST   /api/v1/hr/trainings/{id}/update-participant/ - Actualizar participante
 #   GET    /api/v1/hr/trainings/{id}/participants/ - Lista participantes
+#
+# Tareas asíncronas:
+#   GET    /api/v1/hr/tasks/{task_id}/          - Estado de una tarea
 # ========================================================
 
 urlpatterns = [
+    path('tasks/<str:task_id>/', HRTaskStatusView.as_view(), name='task-status'),
     path('', include(router.urls)),
 ]
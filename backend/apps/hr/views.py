@@ -7,13 +7,23 @@
 # Propósito: ViewSets y vistas para el módulo de RRHH.
 # ========================================================
 
+import logging
+
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Count, F, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from celery.result import AsyncResult
 
 from .models import (
     Department,
@@ -30,6 +40,7 @@ from .models import (
     PayrollPeriod,
     SalaryComponent,
     Payslip,
+    PayslipLine,
     Loan,
     PerformanceReviewTemplate,
     PerformanceReview,
@@ -59,11 +70,22 @@ from .serializers import (
     PerformanceReviewSerializer,
     TrainingSerializer,
     TrainingDetailSerializer,
+    TrainingEnrollSerializer,
     TrainingParticipantSerializer,
     EmployeeReportSerializer,
     AttendanceReportSerializer,
     PayrollSummarySerializer,
+    PeriodQuerySerializer,
+    DateRangeQuerySerializer,
+    EmployeeTerminationSerializer,
+)
+from .filters import HolidayFilterSet, AttendanceFilterSet
+from apps.core.mixins import (
+    ConditionalListMixin,
+    EagerLoadingMixin,
+    conditional_response,
 )
+
 from .services import (
     HRService,
     LeaveService,
@@ -71,13 +93,20 @@ from .services import (
     PayrollService,
     PerformanceService,
 )
+from .tasks import (
+    terminate_employee_task,
+    process_payroll_payment_task,
+    send_enrollment_notifications,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # ========================================================
 # Estructura Organizacional
 # ========================================================
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de departamentos.
     """
@@ -133,9 +162,25 @@ class PositionViewSet(viewsets.ModelViewSet):
 # Empleados
 # ========================================================
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el listado de empleados.
+    
+    Por qué: con OFFSET, las páginas profundas obligan a PostgreSQL a
+    ordenar y descartar N filas; el cursor sobre (last_name, first_name, id)
+    usa el índice compuesto y cuesta O(page_size) sin importar la página.
+    """
+    
+    ordering = ('last_name', 'first_name', 'id')
+    page_size = 50
+
+
+class EmployeeViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de empleados.
+    
+    El listado usa paginación por página (con total) por defecto; se pasa
+    a keyset con ?pagination=cursor o al seguir un enlace con ?cursor=.
     """
     
     queryset = Employee.objects.filter(is_deleted=False)
@@ -146,6 +191,36 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     ordering_fields = ['employee_code', 'last_name', 'hire_date']
     ordering = ['last_name', 'first_name']
     
+    # Columnas que leen EmployeeDocumentSerializer y PayslipSerializer.
+    # Por qué .only(): se omiten columnas de auditoría y de los modelos
+    # relacionados que el resumen no muestra (menos bytes por fila).
+    DOCUMENT_LIST_FIELDS = (
+        'id', 'employee_id', 'document_type', 'name', 'description', 'file',
+        'expiry_date', 'created_at',
+    )
+    PAYSLIP_SUMMARY_FIELDS = (
+        'id', 'period__name', 'period__start_date',
+        'employee__first_name', 'employee__last_name',
+        'base_salary', 'gross_salary', 'total_deductions', 'net_salary',
+        'worked_days', 'worked_hours', 'overtime_hours', 'status',
+        'payment_method', 'payment_reference', 'notes',
+        'created_at', 'updated_at',
+    )
+    PAYSLIP_LINE_FIELDS = (
+        'id', 'payslip_id', 'component__name', 'component__component_type',
+        'quantity', 'rate', 'amount', 'notes',
+    )
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params if self.request else {}
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = EmployeeCursorPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+    
     def get_serializer_class(self):
         if self.action == 'list':
             return EmployeeListSerializer
@@ -153,10 +228,6 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             return EmployeeCreateUpdateSerializer
         return EmployeeDetailSerializer
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related('department', 'position', 'manager')
-    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Estadísticas de empleados."""
@@ -167,10 +238,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def org_chart(self, request):
         """Organigrama de la empresa."""
-        department_id = request.query_params.get('department')
+        params = PeriodQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        
         service = HRService()
         chart = service.get_employee_org_chart(
-            department_id=int(department_id) if department_id else None
+            department_id=params.validated_data.get('department')
         )
         return Response(chart)
     
@@ -178,24 +251,23 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def terminate(self, request, pk=None):
         """Termina el contrato de un empleado."""
         employee = self.get_object()
-        termination_date = request.data.get('termination_date')
-        reason = request.data.get('reason')
+        params = EmployeeTerminationSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
         
-        if not termination_date or not reason:
-            return Response(
-                {'error': 'Se requiere fecha de terminación y motivo'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        service = HRService()
-        result = service.terminate_employee(
-            employee_id=employee.id,
-            termination_date=termination_date,
-            reason=reason,
-            user_id=request.user.id
+        # Por qué asíncrono: la terminación encadena escrituras y
+        # notificaciones; no debe retener un worker HTTP mientras tanto
+        task = terminate_employee_task.delay(
+            employee_id=str(employee.id),
+            termination_date=params.validated_data['termination_date'].isoformat(),
+            reason=params.validated_data['reason'],
+            user_id=str(request.user.id)
         )
+        HRTaskStatusView.remember_owner(task.id, request.user)
         
-        return Response(result)
+        return Response(
+            {'task_id': task.id, 'status': 'queued'},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['get', 'post'])
     def documents(self, request, pk=None):
@@ -203,9 +275,17 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         employee = self.get_object()
         
         if request.method == 'GET':
-            documents = EmployeeDocument.objects.filter(employee=employee)
-            serializer = EmployeeDocumentSerializer(documents, many=True)
-            return Response(serializer.data)
+            documents = EmployeeDocument.objects.filter(
+                employee=employee
+            ).only(*self.DOCUMENT_LIST_FIELDS)
+            # Recarga del perfil sin cambios → 304 sin serializar
+            return conditional_response(
+                request,
+                documents,
+                lambda: Response(
+                    EmployeeDocumentSerializer(documents, many=True).data
+                )
+            )
         
         elif request.method == 'POST':
             serializer = EmployeeDocumentSerializer(data=request.data)
@@ -218,7 +298,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def leave_balance(self, request, pk=None):
         """Saldo de ausencias del empleado."""
         employee = self.get_object()
-        year = request.query_params.get('year', timezone.now().year)
+        params = PeriodQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        year = params.validated_data.get('year', timezone.now().year)
         balances = LeaveBalance.objects.filter(
             employee=employee,
             year=year
@@ -230,9 +312,16 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def payslips(self, request, pk=None):
         """Recibos de nómina del empleado."""
         employee = self.get_object()
+        lines = PayslipLine.objects.select_related('component').only(
+            *self.PAYSLIP_LINE_FIELDS
+        )
         payslips = Payslip.objects.filter(
             employee=employee
-        ).select_related('period').order_by('-period__start_date')[:12]
+        ).select_related('period', 'employee').only(
+            *self.PAYSLIP_SUMMARY_FIELDS
+        ).prefetch_related(
+            Prefetch('lines', queryset=lines)
+        ).order_by('-period__start_date')[:12]
         serializer = PayslipSerializer(payslips, many=True)
         return Response(serializer.data)
 
@@ -241,7 +330,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 # Gestión de Tiempo
 # ========================================================
 
-class LeaveTypeViewSet(viewsets.ModelViewSet):
+class LeaveTypeViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet para tipos de ausencia.
     """
@@ -254,7 +343,7 @@ class LeaveTypeViewSet(viewsets.ModelViewSet):
     search_fields = ['code', 'name']
 
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+class LeaveRequestViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para solicitudes de ausencia.
     """
@@ -268,10 +357,6 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     ordering_fields = ['start_date', 'created_at']
     ordering = ['-start_date']
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related('employee', 'leave_type', 'approved_by')
-    
     def create(self, request, *args, **kwargs):
         """Crear solicitud usando el servicio."""
         service = LeaveService()
@@ -295,9 +380,8 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         approver_id = request.data.get('approver_id')
         if not approver_id:
             # Usar el empleado del usuario actual
-            try:
-                approver_id = request.user.employee_profile.id
-            except:
+            approver_id = HRService().get_user_employee_id(request.user.id)
+            if not approver_id:
                 return Response(
                     {'error': 'No se pudo identificar el aprobador'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -326,9 +410,8 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             )
         
         if not approver_id:
-            try:
-                approver_id = request.user.employee_profile.id
-            except:
+            approver_id = HRService().get_user_employee_id(request.user.id)
+            if not approver_id:
                 return Response(
                     {'error': 'No se pudo identificar el aprobador'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -348,21 +431,14 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def calendar(self, request):
         """Calendario de ausencias."""
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        department_id = request.query_params.get('department')
-        
-        if not start_date or not end_date:
-            return Response(
-                {'error': 'Se requieren fechas de inicio y fin'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        params = DateRangeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
         
         service = LeaveService()
         calendar = service.get_leave_calendar(
-            start_date=start_date,
-            end_date=end_date,
-            department_id=int(department_id) if department_id else None
+            start_date=params.validated_data['start_date'],
+            end_date=params.validated_data['end_date'],
+            department_id=params.validated_data.get('department')
         )
         
         return Response(calendar)
@@ -391,22 +467,12 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['employee', 'date', 'status']
+    filterset_class = AttendanceFilterSet
     ordering_fields = ['date', 'check_in']
     ordering = ['-date']
     
     def get_queryset(self):
         queryset = super().get_queryset()
-        
-        # Filtrar por rango de fechas
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
-        
         return queryset.select_related('employee')
     
     @action(detail=False, methods=['post'])
@@ -416,9 +482,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         check_time = request.data.get('check_time')
         
         if not employee_id:
-            try:
-                employee_id = request.user.employee_profile.id
-            except:
+            employee_id = HRService().get_user_employee_id(request.user.id)
+            if not employee_id:
                 return Response(
                     {'error': 'No se pudo identificar el empleado'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -441,9 +506,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         check_time = request.data.get('check_time')
         
         if not employee_id:
-            try:
-                employee_id = request.user.employee_profile.id
-            except:
+            employee_id = HRService().get_user_employee_id(request.user.id)
+            if not employee_id:
                 return Response(
                     {'error': 'No se pudo identificar el empleado'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -462,27 +526,39 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def report(self, request):
         """Genera reporte de asistencia."""
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        department_id = request.query_params.get('department')
+        params = DateRangeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date = params.validated_data['start_date']
+        end_date = params.validated_data['end_date']
+        department_id = params.validated_data.get('department')
         
-        if not start_date or not end_date:
-            return Response(
-                {'error': 'Se requieren fechas de inicio y fin'},
-                status=status.HTTP_400_BAD_REQUEST
+        service = AttendanceService()
+        
+        # ?export=csv: detalle completo en streaming
+        # Por qué no ?format=csv: DRF reserva "format" para negociar el renderer
+        if request.query_params.get('export') == 'csv':
+            rows = service.get_attendance_report(
+                start_date=start_date,
+                end_date=end_date,
+                department_id=department_id,
+                stream=True
+            )
+            response = StreamingHttpResponse(rows, content_type='text/csv')
+            response['Content-Disposition'] = (
+                f'attachment; filename="asistencia_{start_date}_{end_date}.csv"'
             )
+            return response
         
-        service = AttendanceService()
         report = service.get_attendance_report(
             start_date=start_date,
             end_date=end_date,
-            department_id=int(department_id) if department_id else None
+            department_id=department_id
         )
         
         return Response(report)
 
 
-class WorkScheduleViewSet(viewsets.ModelViewSet):
+class WorkScheduleViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet para horarios de trabajo.
     """
@@ -494,7 +570,7 @@ class WorkScheduleViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class HolidayViewSet(viewsets.ModelViewSet):
+class HolidayViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet para feriados.
     """
@@ -503,23 +579,16 @@ class HolidayViewSet(viewsets.ModelViewSet):
     serializer_class = HolidaySerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['is_recurring', 'applies_to_all']
+    filterset_class = HolidayFilterSet
     ordering_fields = ['date']
     ordering = ['date']
-    
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        year = self.request.query_params.get('year')
-        if year:
-            queryset = queryset.filter(date__year=year)
-        return queryset
 
 
 # ========================================================
 # Nómina
 # ========================================================
 
-class PayrollPeriodViewSet(viewsets.ModelViewSet):
+class PayrollPeriodViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para períodos de nómina.
     """
@@ -563,15 +632,25 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def process_payment(self, request, pk=None):
         """Procesa el pago de la nómina."""
-        service = PayrollService()
-        result = service.process_payment(
-            period_id=pk,
-            user_id=request.user.id
+        period = self.get_object()
+        
+        # Validación temprana; el servicio la repite con bloqueo de fila
+        if period.status != 'approved':
+            return Response(
+                {'success': False, 'error': 'El período no está aprobado'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        task = process_payroll_payment_task.delay(
+            period_id=str(period.id),
+            user_id=str(request.user.id)
         )
+        HRTaskStatusView.remember_owner(task.id, request.user)
         
-        if result['success']:
-            return Response(result)
-        return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'task_id': task.id, 'status': 'queued'},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['get'])
     def summary(self, request, pk=None):
@@ -584,7 +663,10 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
     def payslips(self, request, pk=None):
         """Lista recibos del período."""
         period = self.get_object()
-        payslips = Payslip.objects.filter(period=period).select_related('employee')
+        payslips = self.apply_eager_loading(
+            Payslip.objects.filter(period=period),
+            PayslipSerializer
+        )
         serializer = PayslipSerializer(payslips, many=True)
         return Response(serializer.data)
 
@@ -602,7 +684,7 @@ class SalaryComponentViewSet(viewsets.ModelViewSet):
     search_fields = ['code', 'name']
 
 
-class PayslipViewSet(viewsets.ModelViewSet):
+class PayslipViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para recibos de nómina.
     """
@@ -618,13 +700,9 @@ class PayslipViewSet(viewsets.ModelViewSet):
         if self.action == 'retrieve':
             return PayslipDetailSerializer
         return PayslipSerializer
-    
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related('period', 'employee').prefetch_related('lines')
 
 
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para préstamos a empleados.
     """
@@ -637,42 +715,60 @@ class LoanViewSet(viewsets.ModelViewSet):
     ordering_fields = ['start_date', 'amount']
     ordering = ['-start_date']
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related('employee')
+    def _transition(self, pk, from_status, **changes):
+        """
+        Cambia el estado del préstamo con un UPDATE condicional (CAS).
+        
+        Por qué: una sola sentencia en lugar de SELECT + save() de todas
+        las columnas, y el filtro por estado evita carreras entre dos
+        aprobaciones simultáneas.
+        
+        Returns:
+            bool: True si el préstamo estaba en from_status y se actualizó
+        
+        Raises:
+            Http404: si el préstamo no existe
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        updated = queryset.filter(pk=pk, status=from_status).update(
+            updated_at=timezone.now(),
+            **changes
+        )
+        if not updated:
+            # Solo en el camino de error: distinguir inexistente de estado inválido
+            get_object_or_404(queryset, pk=pk)
+        return bool(updated)
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Aprueba un préstamo."""
-        loan = self.get_object()
-        
-        if loan.status != 'pending':
+        if not self._transition(
+            pk,
+            'pending',
+            status='approved',
+            approved_by_id=request.user.id
+        ):
             return Response(
                 {'error': 'El préstamo no está pendiente de aprobación'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        loan.status = 'approved'
-        loan.approved_by = request.user
-        loan.save()
-        
         return Response({'success': True, 'message': 'Préstamo aprobado'})
     
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
         """Activa un préstamo aprobado."""
-        loan = self.get_object()
-        
-        if loan.status != 'approved':
+        if not self._transition(
+            pk,
+            'approved',
+            status='active',
+            remaining_amount=F('amount')
+        ):
             return Response(
                 {'error': 'El préstamo no está aprobado'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        loan.status = 'active'
-        loan.remaining_amount = loan.amount
-        loan.save()
-        
         return Response({'success': True, 'message': 'Préstamo activado'})
 
 
@@ -692,7 +788,7 @@ class PerformanceReviewTemplateViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
 
 
-class PerformanceReviewViewSet(viewsets.ModelViewSet):
+class PerformanceReviewViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para evaluaciones de desempeño.
     """
@@ -705,10 +801,6 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
     ordering_fields = ['review_date', 'overall_score']
     ordering = ['-review_date']
     
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related('employee', 'reviewer', 'template')
-    
     @action(detail=False, methods=['post'])
     def create_review(self, request):
         """Crea una nueva evaluación."""
@@ -758,13 +850,13 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def analytics(self, request):
         """Analíticas de desempeño."""
-        department_id = request.query_params.get('department')
-        year = request.query_params.get('year')
+        params = PeriodQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
         
         service = PerformanceService()
         analytics = service.get_performance_analytics(
-            department_id=int(department_id) if department_id else None,
-            year=int(year) if year else None
+            department_id=params.validated_data.get('department'),
+            year=params.validated_data.get('year')
         )
         
         return Response(analytics)
@@ -774,7 +866,7 @@ class PerformanceReviewViewSet(viewsets.ModelViewSet):
 # Capacitación
 # ========================================================
 
-class TrainingViewSet(viewsets.ModelViewSet):
+class TrainingViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para capacitaciones.
     """
@@ -787,38 +879,131 @@ class TrainingViewSet(viewsets.ModelViewSet):
     ordering_fields = ['start_date', 'created_at']
     ordering = ['-start_date']
     
+    # Tamaño de lote para inscripciones masivas
+    ENROLL_BATCH_SIZE = 500
+    
+    # Columnas que lee TrainingParticipantSerializer (sin auditoría)
+    PARTICIPANT_FIELDS = (
+        'id', 'training_id', 'employee_id', 'status', 'score',
+        'attendance_percentage', 'certificate_issued', 'certificate_date',
+        'feedback', 'employee__first_name', 'employee__last_name',
+        'employee__department__name',
+    )
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return TrainingDetailSerializer
         return TrainingSerializer
     
+    def participants_queryset(self):
+        """Participantes con empleado y departamento, solo columnas usadas."""
+        return TrainingParticipant.objects.select_related(
+            'employee__department'
+        ).only(*self.PARTICIPANT_FIELDS)
+    
+    def apply_eager_loading(self, queryset, serializer_class):
+        if serializer_class is TrainingDetailSerializer:
+            queryset = queryset.prefetch_related(
+                Prefetch('participants', queryset=self.participants_queryset())
+            )
+        return super().apply_eager_loading(queryset, serializer_class)
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # participants_count en la misma consulta del listado
+            queryset = queryset.annotate(
+                participants_total=Count(
+                    'participants',
+                    filter=Q(participants__is_deleted=False)
+                )
+            )
+        elif self.action == 'enroll':
+            # Fila bloqueada y conteo actual en una sola consulta. Se usa
+            # subconsulta porque PostgreSQL no admite FOR UPDATE con GROUP BY.
+            current = TrainingParticipant.objects.filter(
+                training=OuterRef('pk')
+            ).order_by().values('training').annotate(
+                total=Count('pk')
+            ).values('total')
+            queryset = queryset.select_for_update().annotate(
+                participants_total=Coalesce(Subquery(current), 0)
+            )
+        return queryset
+    
     @action(detail=True, methods=['post'])
     def enroll(self, request, pk=None):
         """Inscribe empleados en capacitación."""
-        training = self.get_object()
-        employee_ids = request.data.get('employee_ids', [])
+        params = TrainingEnrollSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
         
-        if training.max_participants > 0:
-            current_count = training.participants.count()
-            if current_count + len(employee_ids) > training.max_participants:
-                return Response(
-                    {'error': 'Se excede el máximo de participantes'},
-                    status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            # Bloquea la capacitación: inscripciones concurrentes no pueden
+            # superar el cupo entre el conteo y el INSERT
+            training = self.get_object()
+            
+            # Una sola consulta IN (cubierta por el índice único
+            # training+employee) devuelve inscritos activos y dados de baja
+            requested = [
+                str(emp_id) for emp_id in params.validated_data['employee_ids']
+            ]
+            active, removed = set(), set()
+            for emp_id, is_deleted in TrainingParticipant.all_objects.filter(
+                training_id=training.pk,
+                employee_id__in=requested
+            ).values_list('employee_id', 'is_deleted'):
+                (removed if is_deleted else active).add(str(emp_id))
+            
+            new_participants = [
+                TrainingParticipant(
+                    training=training,
+                    employee_id=emp_id,
+                    status='enrolled'
                 )
-        
-        created = 0
-        for emp_id in employee_ids:
-            participant, is_new = TrainingParticipant.objects.get_or_create(
-                training=training,
-                employee_id=emp_id,
-                defaults={'status': 'enrolled'}
+                for emp_id in requested
+                if emp_id not in active and emp_id not in removed
+            ]
+            enrolled = len(new_participants) + len(removed)
+            
+            if training.max_participants > 0:
+                total = training.participants_total + enrolled
+                if total > training.max_participants:
+                    return Response(
+                        {'error': 'Se excede el máximo de participantes'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
+            # Las bajas lógicas chocarían con el índice único: se reactivan
+            # con un UPDATE en lugar de ignorarse en silencio
+            if removed:
+                TrainingParticipant.all_objects.filter(
+                    training_id=training.pk,
+                    employee_id__in=removed
+                ).update(
+                    is_deleted=False,
+                    deleted_at=None,
+                    deleted_by=None,
+                    status='enrolled',
+                    updated_at=timezone.now()
+                )
+            TrainingParticipant.objects.bulk_create(
+                new_participants,
+                batch_size=self.ENROLL_BATCH_SIZE,
+                ignore_conflicts=True
             )
-            if is_new:
-                created += 1
+            
+            # Los correos salen del worker y solo si la inscripción se confirma
+            enrolled_ids = [p.employee_id for p in new_participants] + list(removed)
+            if enrolled_ids:
+                transaction.on_commit(
+                    lambda: send_enrollment_notifications.delay(
+                        str(training.pk), enrolled_ids
+                    )
+                )
         
         return Response({
             'success': True,
-            'enrolled': created
+            'enrolled': enrolled
         })
     
     @action(detail=True, methods=['post'])
@@ -827,32 +1012,112 @@ class TrainingViewSet(viewsets.ModelViewSet):
         training = self.get_object()
         employee_id = request.data.get('employee_id')
         
-        try:
-            participant = TrainingParticipant.objects.get(
-                training=training,
-                employee_id=employee_id
-            )
-        except TrainingParticipant.DoesNotExist:
-            return Response(
-                {'error': 'Participante no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
         serializer = TrainingParticipantSerializer(
-            participant,
             data=request.data,
             partial=True
         )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Un único UPDATE en lugar de SELECT + save(); el participante
+        # no puede reasignarse a otro empleado desde esta acción
+        changes = dict(serializer.validated_data)
+        changes.pop('employee', None)
+        updated = TrainingParticipant.objects.filter(
+            training=training,
+            employee_id=employee_id
+        ).update(**changes, updated_at=timezone.now())
         
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not updated:
+            return Response(
+                {'error': 'Participante no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        data = {
+            name: serializer.fields[name].to_representation(value)
+            for name, value in changes.items()
+        }
+        data['employee'] = employee_id
+        return Response(data)
     
     @action(detail=True, methods=['get'])
     def participants(self, request, pk=None):
         """Lista participantes de capacitación."""
         training = self.get_object()
-        participants = training.participants.select_related('employee')
-        serializer = TrainingParticipantSerializer(participants, many=True)
-        return Response(serializer.data)
+        
+        # Solo lectura: diccionarios con .values() en lugar de instancias
+        # + ModelSerializer; mismas claves que TrainingParticipantSerializer
+        participants = list(
+            TrainingParticipant.objects.filter(training=training).annotate(
+                employee_name=Concat(
+                    'employee__first_name', Value(' '), 'employee__last_name'
+                ),
+                employee_department=F('employee__department__name')
+            ).values(
+                'id', 'employee', 'employee_name', 'employee_department',
+                'status', 'score', 'attendance_percentage',
+                'certificate_issued', 'certificate_date', 'feedback'
+            )
+        )
+        # Los decimales se devuelven como texto, igual que DecimalField
+        for row in participants:
+            for key in ('score', 'attendance_percentage'):
+                if row[key] is not None:
+                    row[key] = str(row[key])
+        return Response(participants)
+
+
+# ========================================================
+# Tareas Asíncronas
+# ========================================================
+
+class HRTaskStatusView(APIView):
+    """
+    Consulta el estado de una tarea asíncrona de RRHH.
+    
+    Usado por las acciones que responden 202 (terminación de empleados,
+    pago de nómina) para que el cliente pueda consultar el resultado.
+    
+    Por qué el dueño en caché: el resultado de una tarea puede contener
+    datos de nómina o de empleados; solo lo ve quien la encoló. Cualquier
+    otro id (de otro usuario, de otro módulo o inexistente) responde 404.
+    """
+    
+    permission_classes = [IsAuthenticated]
+    
+    OWNER_CACHE_KEY = 'hr:task:{task_id}:owner'
+    # Igual que la expiración por defecto de los resultados de Celery
+    OWNER_CACHE_TTL = 60 * 60 * 24
+    
+    @classmethod
+    def remember_owner(cls, task_id: str, user) -> None:
+        """Registra el usuario que encoló la tarea."""
+        cache.set(
+            cls.OWNER_CACHE_KEY.format(task_id=task_id),
+            str(user.pk),
+            cls.OWNER_CACHE_TTL
+        )
+    
+    def get(self, request, task_id):
+        owner = cache.get(self.OWNER_CACHE_KEY.format(task_id=task_id))
+        if owner != str(request.user.pk):
+            raise Http404
+        
+        data = {'task_id': task_id}
+        try:
+            result = AsyncResult(task_id)
+            data['status'] = result.status
+            if result.successful():
+                data['result'] = result.result
+            elif result.failed():
+                data['error'] = str(result.result)
+        except Exception:
+            # Backend de resultados (Redis) caído: no es un error del cliente.
+            # El detalle (host, credenciales) queda en el log, no en la respuesta
+            logger.exception('No se pudo leer el estado de la tarea %s', task_id)
+            data['status'] = 'UNKNOWN'
+            data['error'] = 'Backend de resultados no disponible'
+            return Response(data, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        return Response(data)
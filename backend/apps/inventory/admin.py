@@ -10,7 +10,9 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum, F
+from django.utils.safestring import mark_safe
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
 from .models import (
     Category,
@@ -28,6 +30,34 @@ from .models import (
 )
 
 
+# Plantillas de las columnas de estado, definidas una sola vez. Los
+# valores se interpolan con format_html, que los escapa; la insignia
+# sin valores ya es un literal seguro.
+NO_STOCK_HTML = mark_safe(
+    '<span style="color: red; font-weight: bold;">⚠️ Sin Stock</span>'
+)
+LOW_STOCK_HTML = '<span style="color: orange;">⚠️ Bajo ({0})</span>'
+OK_STOCK_HTML = '<span style="color: green;">✅ OK ({0})</span>'
+EXPIRED_HTML = '<span style="color: red; font-weight: bold;">VENCIDO ({0}d)</span>'
+EXPIRING_HTML = '<span style="color: orange;">⚠️ {0} días</span>'
+
+
+def is_changelist_request(model_admin, request) -> bool:
+    """
+    Indica si la petición es el listado (changelist) del admin.
+    
+    Por qué: get_queryset también alimenta el formulario de edición,
+    que sí necesita todas las columnas; recortar columnas solo conviene
+    en el listado.
+    """
+    opts = model_admin.model._meta
+    match = request.resolver_match
+    return (
+        match is not None
+        and match.url_name == f'{opts.app_label}_{opts.model_name}_changelist'
+    )
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """
@@ -40,10 +70,15 @@ class CategoryAdmin(admin.ModelAdmin):
     raw_id_fields = ['parent']
     ordering = ['name']
     
+    def get_queryset(self, request):
+        # Conteo anotado: una sola consulta para toda la página
+        return super().get_queryset(request).with_products_count()
+    
     def product_count(self, obj):
         """Cuenta productos en la categoría."""
-        return obj.products.filter(is_deleted=False).count()
+        return obj._products_count
     product_count.short_description = 'Productos'
+    product_count.admin_order_field = '_products_count'
 
 
 @admin.register(Brand)
@@ -56,9 +91,14 @@ class BrandAdmin(admin.ModelAdmin):
     search_fields = ['name']
     ordering = ['name']
     
+    def get_queryset(self, request):
+        # Ver BrandQuerySet.with_products_count (Product.brand no es FK)
+        return super().get_queryset(request).with_products_count()
+    
     def product_count(self, obj):
-        return obj.products.filter(is_deleted=False).count()
+        return obj._products_count
     product_count.short_description = 'Productos'
+    product_count.admin_order_field = '_products_count'
 
 
 @admin.register(UnitOfMeasure)
@@ -97,18 +137,28 @@ class WarehouseAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # El valor sale de Warehouse.with_stock_totals (JOIN con stocks);
+        # las ubicaciones se cuentan en subconsulta para que un segundo
+        # JOIN no multiplique las filas de stock
+        locations = WarehouseLocation.objects.filter(
+            warehouse=OuterRef('pk'), is_active=True
+        ).order_by().values('warehouse').annotate(total=Count('pk')).values('total')
+        return super().get_queryset(request).with_stock_totals().annotate(
+            _location_count=Coalesce(
+                Subquery(locations, output_field=IntegerField()), 0
+            )
+        )
+    
     def location_count(self, obj):
-        return obj.locations.filter(is_active=True).count()
+        return obj._location_count
     location_count.short_description = 'Ubicaciones'
+    location_count.admin_order_field = '_location_count'
     
     def total_value(self, obj):
-        value = Stock.objects.filter(
-            warehouse=obj
-        ).aggregate(
-            total=Sum(F('quantity') * F('product__cost_price'))
-        )['total']
-        return f"${value or 0:,.2f}"
+        return f"${obj._total_value:,.2f}"
     total_value.short_description = 'Valor Total'
+    total_value.admin_order_field = '_total_value'
 
 
 @admin.register(WarehouseLocation)
@@ -129,12 +179,23 @@ class StockInline(admin.TabularInline):
     """
     model = Stock
     extra = 0
-    readonly_fields = ['warehouse', 'quantity', 'reserved_quantity', 'available_quantity']
+    # Sin fields explícitos el inline incluía los campos de auditoría
+    # (created_by, updated_by, deleted_by) como selects, con una consulta
+    # de usuarios por campo y por fila
+    fields = ('warehouse', 'quantity', 'reserved_quantity', 'available_quantity', 'location')
+    readonly_fields = ('warehouse', 'quantity', 'reserved_quantity', 'available_quantity')
+    raw_id_fields = ('location',)
     can_delete = False
     
-    def available_quantity(self, obj):
-        return obj.available_quantity
-    available_quantity.short_description = 'Disponible'
+    def get_queryset(self, request):
+        # Un solo JOIN con las columnas que muestra el inline (y las que
+        # usa Stock.__str__)
+        return super().get_queryset(request).select_related(
+            'product', 'warehouse'
+        ).only(
+            'product_id', 'product__sku', 'warehouse__code', 'warehouse__name',
+            'quantity', 'reserved_quantity', 'available_quantity', 'location'
+        )
     
     def has_add_permission(self, request, obj=None):
         return False
@@ -159,9 +220,18 @@ class ProductAdmin(admin.ModelAdmin):
     ]
     search_fields = ['sku', 'barcode', 'name', 'description']
     raw_id_fields = ['category', 'unit_of_measure']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ('id', 'created_at', 'updated_at')
     ordering = ['name']
     inlines = [StockInline]
+    # brand es texto; la única FK del listado es la categoría, cuyo
+    # __str__ lee la ruta materializada (sin unir la categoría padre)
+    list_select_related = ['category']
+    
+    # Columnas que usa el listado (sin descripción, imagen ni QR)
+    LIST_ONLY_FIELDS = (
+        'sku', 'name', 'brand', 'cost_price', 'sale_price', 'min_stock',
+        'is_active', 'category__name', 'category__path',
+    )
     
     fieldsets = (
         ('Identificación', {
@@ -196,32 +266,29 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Stock total anotado: total_stock y stock_status no consultan por fila
+        queryset = super().get_queryset(request).with_total_stock()
+        if is_changelist_request(self, request):
+            queryset = queryset.only(*self.LIST_ONLY_FIELDS)
+        return queryset
+    
     def total_stock(self, obj):
         """Stock total en todos los almacenes."""
-        total = Stock.objects.filter(product=obj).aggregate(
-            total=Sum('quantity')
-        )['total']
-        return total or 0
+        return obj._total_stock
     total_stock.short_description = 'Stock Total'
+    total_stock.admin_order_field = '_total_stock'
     
     def stock_status(self, obj):
         """Estado del stock con indicador visual."""
-        total = self.total_stock(obj)
+        total = obj._total_stock
         
         if total <= 0:
-            return format_html(
-                '<span style="color: red; font-weight: bold;">⚠️ Sin Stock</span>'
-            )
+            return NO_STOCK_HTML
         elif total <= obj.min_stock:
-            return format_html(
-                '<span style="color: orange;">⚠️ Bajo ({0})</span>',
-                total
-            )
+            return format_html(LOW_STOCK_HTML, total)
         else:
-            return format_html(
-                '<span style="color: green;">✅ OK ({0})</span>',
-                total
-            )
+            return format_html(OK_STOCK_HTML, total)
     stock_status.short_description = 'Estado'
 
 
@@ -235,14 +302,20 @@ class StockAdmin(admin.ModelAdmin):
         'available', 'location'
     ]
     list_filter = ['warehouse']
-    search_fields = ['product__name', 'product__sku', 'location']
-    raw_id_fields = ['product', 'warehouse']
-    readonly_fields = ['available']
+    search_fields = ['product__name', 'product__sku', 'location__code']
+    raw_id_fields = ['product', 'warehouse', 'location']
+    readonly_fields = ('available',)
     ordering = ['product__name']
+    list_select_related = ['product', 'warehouse', 'location__warehouse']
+    show_full_result_count = False
     
     def available(self, obj):
+        # En el formulario de alta la columna aún no existe en la BD
+        if obj._state.adding:
+            return None
         return obj.available_quantity
     available.short_description = 'Disponible'
+    available.admin_order_field = 'available_quantity'
 
 
 @admin.register(Lot)
@@ -259,26 +332,30 @@ class LotAdmin(admin.ModelAdmin):
     raw_id_fields = ['product', 'warehouse']
     date_hierarchy = 'expiration_date'
     ordering = ['expiration_date']
+    list_select_related = ['product', 'warehouse']
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # La resta se hace en la base de datos (LotQuerySet.with_expiration);
+        # además permite ordenar por la columna
+        queryset = super().get_queryset(request).with_expiration()
+        if is_changelist_request(self, request):
+            queryset = queryset.defer('notes')
+        return queryset
     
     def days_to_expiry(self, obj):
         """Días restantes para vencimiento."""
-        if obj.expiration_date:
-            from django.utils import timezone
-            days = (obj.expiration_date - timezone.now().date()).days
+        if obj._days_left is not None:
+            days = obj._days_left.days
             if days < 0:
-                return format_html(
-                    '<span style="color: red; font-weight: bold;">VENCIDO ({0}d)</span>',
-                    days
-                )
+                return format_html(EXPIRED_HTML, days)
             elif days <= 30:
-                return format_html(
-                    '<span style="color: orange;">⚠️ {0} días</span>',
-                    days
-                )
+                return format_html(EXPIRING_HTML, days)
             else:
                 return f"{days} días"
         return "-"
     days_to_expiry.short_description = 'Días para Vencer'
+    days_to_expiry.admin_order_field = '_days_left'
 
 
 @admin.register(SerialNumber)
@@ -290,8 +367,10 @@ class SerialNumberAdmin(admin.ModelAdmin):
     list_filter = ['status', 'warehouse']
     search_fields = ['serial', 'product__name', 'product__sku']
     raw_id_fields = ['product', 'warehouse', 'lot']
-    readonly_fields = ['sold_date']
+    readonly_fields = ('sold_date',)
     ordering = ['-created_at']
+    list_select_related = ['product', 'warehouse']
+    show_full_result_count = False
 
 
 @admin.register(InventoryTransaction)
@@ -308,11 +387,19 @@ class InventoryTransactionAdmin(admin.ModelAdmin):
     raw_id_fields = ['product', 'warehouse', 'lot', 'created_by']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
-    readonly_fields = [
+    list_select_related = ['product', 'warehouse', 'created_by']
+    show_full_result_count = False
+    readonly_fields = (
         'product', 'warehouse', 'transaction_type', 'reason', 'quantity',
         'stock_before', 'stock_after', 'unit_cost', 'lot', 'reference_type',
         'reference_id', 'notes', 'created_by', 'created_at'
-    ]
+    )
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_changelist_request(self, request):
+            queryset = queryset.defer('notes')
+        return queryset
     
     def has_add_permission(self, request):
         return False
@@ -331,7 +418,7 @@ class StockTransferItemInline(admin.TabularInline):
     model = StockTransferItem
     extra = 1
     raw_id_fields = ['product', 'lot']
-    readonly_fields = ['received_quantity']
+    readonly_fields = ('received_quantity',)
 
 
 @admin.register(StockTransfer)
@@ -349,7 +436,9 @@ class StockTransferAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
     inlines = [StockTransferItemInline]
-    readonly_fields = ['transfer_number', 'shipped_date', 'received_date']
+    list_select_related = ['source_warehouse', 'destination_warehouse']
+    show_full_result_count = False
+    readonly_fields = ('transfer_number', 'shipped_date', 'received_date')
     
     fieldsets = (
         ('Transferencia', {
@@ -370,6 +459,12 @@ class StockTransferAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _item_count=Count('items', filter=Q(items__is_deleted=False))
+        )
+    
     def item_count(self, obj):
-        return obj.items.count()
+        return obj._item_count
     item_count.short_description = 'Items'
+    item_count.admin_order_field = '_item_count'
@@ -22,3 +22,10 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
     verbose_name = 'Inventario - Productos y Stock'
+    
+    def ready(self):
+        """Importar señales al iniciar."""
+        try:
+            import apps.inventory.signals  # noqa
+        except ImportError:
+            pass
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    """Calcula path y depth de las categorías existentes, de la raíz hacia abajo."""
+    Category = apps.get_model('inventory', 'Category')
+    categories = {
+        category.pk: category
+        for category in Category.objects.only('id', 'name', 'parent_id')
+    }
+    resolved = {}
+
+    def resolve(category, trail=()):
+        if category.pk in resolved:
+            return resolved[category.pk]
+        parent = categories.get(category.parent_id)
+        if parent is None or parent.pk in trail:
+            result = (category.name, 0)
+        else:
+            parent_path, parent_depth = resolve(parent, trail + (category.pk,))
+            result = (f"{parent_path} > {category.name}", parent_depth + 1)
+        resolved[category.pk] = result
+        return result
+
+    for category in categories.values():
+        category.path, category.depth = resolve(category)
+    Category.objects.bulk_update(
+        categories.values(), ['path', 'depth'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Nivel'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=512, verbose_name='Ruta'),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_category_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['warehouse', 'product'], name='inventory_s_warehou_58977a_idx'),
+        ),
+    ]
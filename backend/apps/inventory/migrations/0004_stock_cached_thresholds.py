@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_stock_thresholds(apps, schema_editor):
+    """Copia min_stock y reorder_point de cada producto a su stock."""
+    Stock = apps.get_model('inventory', 'Stock')
+    Product = apps.get_model('inventory', 'Product')
+    product = Product.objects.filter(pk=OuterRef('product_id'))
+    Stock.objects.update(
+        min_stock_cached=Subquery(product.values('min_stock')[:1]),
+        reorder_point_cached=Subquery(product.values('reorder_point')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_warehouse_product_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='min_stock_cached',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Stock Mínimo (copia)'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='reorder_point_cached',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Punto de Reorden (copia)'),
+        ),
+        migrations.RunPython(backfill_stock_thresholds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('min_stock_cached'))), fields=['warehouse'], name='inventory_stock_low_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:48
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stock_cached_thresholds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='available_quantity',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.expressions.CombinedExpression(models.F('quantity'), '-', models.F('reserved_quantity')), models.Value(0)), output_field=models.IntegerField(), verbose_name='Cantidad Disponible'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['product', 'available_quantity'], name='inventory_s_product_bf2b06_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stock_available_quantity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lot',
+            index=models.Index(condition=models.Q(('expiration_date__isnull', False)), fields=['expiration_date'], name='inventory_lot_expiration_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_lot_expiration_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='inventory_p_barcode_2b7d27_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='inventory_p_categor_4a3921_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category'], include=('sku', 'name', 'sale_price', 'is_active'), name='inventory_prod_cat_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['barcode'], include=('sku', 'name', 'sale_price'), name='inventory_prod_barcode_cov_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'name'], name='inventory_prod_active_cat_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+def backfill_image_urls(apps, schema_editor):
+    """Guarda la URL de las imágenes ya cargadas."""
+    for model_name, field_name in (
+        ('Category', 'image'), ('Brand', 'logo'), ('Product', 'image'),
+    ):
+        model = apps.get_model('inventory', model_name)
+        rows = []
+        queryset = model.objects.exclude(
+            **{f'{field_name}__isnull': True}
+        ).exclude(**{field_name: ''}).only('id', field_name)
+        for row in queryset.iterator(chunk_size=2000):
+            row.image_url_cache = getattr(row, field_name).url
+            rows.append(row)
+        model.objects.bulk_update(rows, ['image_url_cache'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_product_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brand',
+            name='image_url_cache',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512, verbose_name='URL de Imagen'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_url_cache',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512, verbose_name='URL de Imagen'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_url_cache',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512, verbose_name='URL de Imagen'),
+        ),
+        migrations.RunPython(backfill_image_urls, migrations.RunPython.noop),
+    ]
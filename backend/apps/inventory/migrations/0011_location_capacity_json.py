@@ -0,0 +1,61 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+def capacity_to_json(apps, schema_editor):
+    """Copia max_weight/max_volume al campo capacity."""
+    WarehouseLocation = apps.get_model('inventory', 'WarehouseLocation')
+    rows = []
+    queryset = WarehouseLocation.objects.filter(
+        models.Q(max_weight__isnull=False) | models.Q(max_volume__isnull=False)
+    ).only('id', 'max_weight', 'max_volume')
+    for row in queryset.iterator(chunk_size=2000):
+        capacity = {}
+        if row.max_weight is not None:
+            capacity['weight'] = str(row.max_weight)
+        if row.max_volume is not None:
+            capacity['volume'] = str(row.max_volume)
+        row.capacity = capacity
+        rows.append(row)
+    WarehouseLocation.objects.bulk_update(rows, ['capacity'], batch_size=2000)
+
+
+def capacity_from_json(apps, schema_editor):
+    """Restaura max_weight/max_volume desde capacity."""
+    WarehouseLocation = apps.get_model('inventory', 'WarehouseLocation')
+    rows = []
+    queryset = WarehouseLocation.objects.filter(
+        capacity__isnull=False
+    ).only('id', 'capacity')
+    for row in queryset.iterator(chunk_size=2000):
+        row.max_weight = row.capacity.get('weight')
+        row.max_volume = row.capacity.get('volume')
+        rows.append(row)
+    WarehouseLocation.objects.bulk_update(
+        rows, ['max_weight', 'max_volume'], batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehouselocation',
+            name='capacity',
+            field=models.JSONField(blank=True, help_text='Capacidad máxima (ej. {"weight": "500.00", "volume": "2.50"})', null=True, verbose_name='Capacidad'),
+        ),
+        migrations.RunPython(capacity_to_json, capacity_from_json),
+        migrations.RemoveField(
+            model_name='warehouselocation',
+            name='max_volume',
+        ),
+        migrations.RemoveField(
+            model_name='warehouselocation',
+            name='max_weight',
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_locations(apps, schema_editor):
+    """Enlaza cada stock con la ubicación de su almacén que tiene ese código."""
+    Stock = apps.get_model('inventory', 'Stock')
+    WarehouseLocation = apps.get_model('inventory', 'WarehouseLocation')
+    Stock.objects.exclude(location='').update(
+        location_ref=models.Subquery(
+            WarehouseLocation.objects.filter(
+                warehouse_id=models.OuterRef('warehouse_id'),
+                code=models.OuterRef('location'),
+                is_deleted=False,
+            ).values('pk')[:1]
+        )
+    )
+
+
+def unlink_locations(apps, schema_editor):
+    """Restaura el código de ubicación como texto."""
+    Stock = apps.get_model('inventory', 'Stock')
+    WarehouseLocation = apps.get_model('inventory', 'WarehouseLocation')
+    Stock.objects.filter(location_ref__isnull=False).update(
+        location=models.Subquery(
+            WarehouseLocation.objects.filter(
+                pk=models.OuterRef('location_ref_id')
+            ).values('code')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_location_capacity_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='location_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.warehouselocation'),
+        ),
+        migrations.RunPython(link_locations, unlink_locations),
+        migrations.RemoveField(
+            model_name='stock',
+            name='location',
+        ),
+        migrations.RenameField(
+            model_name='stock',
+            old_name='location_ref',
+            new_name='location',
+        ),
+        migrations.AlterField(
+            model_name='stock',
+            name='location',
+            field=models.ForeignKey(blank=True, help_text='Ubicación específica (ej. "A-01-03" = Pasillo A, Estante 1, Nivel 3)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stocks', to='inventory.warehouselocation', verbose_name='Ubicación'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_location_paths(apps, schema_editor):
+    """Calcula path y depth de las ubicaciones existentes, de la raíz hacia abajo."""
+    WarehouseLocation = apps.get_model('inventory', 'WarehouseLocation')
+    locations = {
+        location.pk: location
+        for location in WarehouseLocation.objects.only('id', 'code', 'parent_id')
+    }
+    resolved = {}
+
+    def resolve(location, trail=()):
+        if location.pk in resolved:
+            return resolved[location.pk]
+        parent = locations.get(location.parent_id)
+        if parent is None or parent.pk in trail:
+            result = (location.code, 0)
+        else:
+            parent_path, parent_depth = resolve(parent, trail + (location.pk,))
+            result = (f"{parent_path}/{location.code}", parent_depth + 1)
+        resolved[location.pk] = result
+        return result
+
+    for location in locations.values():
+        location.path, location.depth = resolve(location)
+    WarehouseLocation.objects.bulk_update(
+        locations.values(), ['path', 'depth'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stock_location_fk'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehouselocation',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Nivel'),
+        ),
+        migrations.AddField(
+            model_name='warehouselocation',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512, verbose_name='Ruta'),
+        ),
+        migrations.RunPython(backfill_location_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='warehouselocation',
+            index=models.Index(fields=['warehouse', 'path'], name='inventory_loc_path_idx', opclasses=['uuid_ops', 'varchar_pattern_ops']),
+        ),
+    ]
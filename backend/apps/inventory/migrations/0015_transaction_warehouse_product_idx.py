@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_transaction_created_brin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['warehouse', 'product', '-created_at'], name='inv_tx_wh_prod_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_transaction_warehouse_product_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(condition=models.Q(('status__in', ['draft', 'confirmed', 'in_transit'])), fields=['status', '-created_at'], name='inv_transfer_active_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_transfer_active_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventorytransaction',
+            name='inventory_t_referen_ef9dcf_idx',
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['reference_type', 'reference_id'], include=('product', 'warehouse', 'quantity', 'transaction_type'), name='inv_tx_ref_covering_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:20
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una
+    # transacción; así la tabla de movimientos sigue aceptando escrituras
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0017_transaction_reference_covering_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='inventorytransaction',
+            index=django.contrib.postgres.indexes.HashIndex(condition=models.Q(('reference_id__isnull', False)), fields=['reference_id'], name='inv_tx_refid_hash'),
+        ),
+    ]
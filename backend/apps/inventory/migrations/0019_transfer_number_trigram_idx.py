@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:21
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_transaction_reference_id_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('transfer_number'), name='gin_trgm_ops'), name='inv_transfer_number_trgm'),
+        ),
+    ]
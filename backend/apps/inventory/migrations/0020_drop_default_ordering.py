@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0019_transfer_number_trigram_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='inventorytransaction',
+            options={'verbose_name': 'Transacción de Inventario', 'verbose_name_plural': 'Transacciones de Inventario'},
+        ),
+        migrations.AlterModelOptions(
+            name='stocktransfer',
+            options={'verbose_name': 'Transferencia', 'verbose_name_plural': 'Transferencias'},
+        ),
+    ]
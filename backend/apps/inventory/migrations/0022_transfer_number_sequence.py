@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:35
+
+import apps.inventory.models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_product_sku_upper_unique'),
+    ]
+
+    operations = [
+        # Los números aleatorios anteriores (TRF-<hex>) pueden ser solo
+        # dígitos: la secuencia arranca después del mayor de ellos
+        migrations.RunSQL(
+            sql=[
+                "CREATE SEQUENCE IF NOT EXISTS stock_transfer_number_seq",
+                """
+                SELECT setval(
+                    'stock_transfer_number_seq',
+                    COALESCE(MAX(SUBSTRING(transfer_number FROM 5)::bigint), 0) + 1,
+                    false
+                )
+                FROM inventory_transfers
+                WHERE transfer_number ~ '^TRF-[0-9]{8}$'
+                """,
+            ],
+            reverse_sql="DROP SEQUENCE IF EXISTS stock_transfer_number_seq",
+        ),
+        migrations.AlterField(
+            model_name='stocktransfer',
+            name='transfer_number',
+            field=models.CharField(db_default=django.db.models.functions.text.Concat(models.Value('TRF-'), django.db.models.functions.text.LPad(django.db.models.functions.comparison.Cast(apps.inventory.models.NextVal(models.Value('stock_transfer_number_seq')), models.CharField()), 8, models.Value('0'))), max_length=20, unique=True, verbose_name='Número de Transferencia'),
+        ),
+    ]
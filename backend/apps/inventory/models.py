@@ -13,13 +13,88 @@
 # - RU2: Escaneo de códigos de barras
 # ========================================================
 
+import io
 from decimal import Decimal
-from django.db import models
+from django.db import connections, models, router
+from django.db.models import (
+    Case, Count, DateField, DecimalField, DurationField, ExpressionWrapper, F,
+    OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, LPad, Round, Substr, Upper
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, HashIndex, OpClass
 from django.core.validators import MinValueValidator
-from apps.core.models import BaseModel, StatusChoices
+from django.utils import timezone
+from apps.core.models import (
+    BaseModel, SoftDeleteManager, StatusChoices, get_subtree_pks, subtree_subquery,
+)
 
 
-class Category(BaseModel):
+class CachedImageURLModel(models.Model):
+    """
+    Guarda en la fila la URL de la imagen del modelo.
+    
+    Por qué: en almacenamientos remotos storage.url() puede firmar la URL
+    o consultar metadatos; los listados la leen de image_url_cache en vez
+    de resolverla por cada fila serializada.
+    
+    Uso:
+        image_field_name indica el ImageField a seguir ('image', 'logo').
+    """
+    
+    image_field_name = 'image'
+    
+    image_url_cache = models.CharField(
+        max_length=512,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='URL de Imagen'
+    )
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.image_field_name not in update_fields:
+            return
+        # La URL solo es definitiva después de guardar el archivo
+        image = getattr(self, self.image_field_name)
+        url = image.url if image else ''
+        if url != self.image_url_cache:
+            self.image_url_cache = url
+            type(self).all_objects.filter(pk=self.pk).update(image_url_cache=url)
+
+
+class CategoryQuerySet(models.QuerySet):
+    """Consultas de categorías para listados."""
+    
+    def with_products_count(self):
+        """
+        Anota _products_count (productos no eliminados) con COUNT().
+        
+        Por qué: el serializador contaba los productos de cada categoría
+        con una consulta por fila.
+        """
+        return self.annotate(
+            _products_count=Count('products', filter=Q(products__is_deleted=False))
+        )
+
+
+class CategoryManager(SoftDeleteManager.from_queryset(CategoryQuerySet)):
+    """
+    Categorías con su categoría padre cargada en la misma consulta.
+    
+    Por qué: los serializadores y selectores muestran parent.name junto a
+    cada categoría; sin el JOIN sería una consulta por fila.
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('parent')
+
+
+class Category(CachedImageURLModel, BaseModel):
     """
     Categoría de productos.
     
@@ -82,6 +157,29 @@ class Category(BaseModel):
         verbose_name='Activa'
     )
     
+    # Ruta materializada (ej. "Electrónica > Computadoras > Laptops")
+    # Por qué: __str__ y get_full_path la leen sin recorrer parent,
+    # que costaba una consulta por nivel de la jerarquía
+    path = models.CharField(
+        max_length=512,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name='Ruta'
+    )
+    
+    # Nivel en la jerarquía (0 = raíz)
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Nivel'
+    )
+    
+    PATH_SEPARATOR = ' > '
+    
+    objects = CategoryManager()
+    
     class Meta:
         db_table = 'inventory_categories'
         verbose_name = 'Categoría'
@@ -89,9 +187,72 @@ class Category(BaseModel):
         ordering = ['name']
     
     def __str__(self):
-        if self.parent:
-            return f"{self.parent.name} > {self.name}"
-        return self.name
+        return self.path or self.name
+    
+    def save(self, *args, **kwargs):
+        # Ruta y nivel previos, para propagar cambios a las subcategorías
+        previous = None
+        if not self._state.adding:
+            previous = Category.all_objects.filter(
+                pk=self.pk
+            ).values_list('path', 'depth').first()
+        
+        if self.parent_id:
+            parent = self.parent
+            self.path = f"{parent.path or parent.name}{self.PATH_SEPARATOR}{self.name}"
+            self.depth = parent.depth + 1
+        else:
+            self.path = self.name
+            self.depth = 0
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'path', 'depth'}
+        super().save(*args, **kwargs)
+        
+        if previous and previous != (self.path, self.depth):
+            self._update_descendant_paths(*previous)
+    
+    def _update_descendant_paths(self, old_path: str, old_depth: int) -> None:
+        """
+        Reescribe la ruta de todas las subcategorías con un único UPDATE.
+        
+        Args:
+            old_path: Ruta anterior de esta categoría
+            old_depth: Nivel anterior de esta categoría
+        """
+        descendant_ids = self.get_descendant_ids()
+        
+        if descendant_ids:
+            # La caché de catálogos guarda la ruta de cada subcategoría
+            from .services import InventoryService
+            InventoryService.invalidate_catalog(Category, descendant_ids)
+            
+            old_prefix = f"{old_path}{self.PATH_SEPARATOR}"
+            Category.all_objects.filter(pk__in=descendant_ids).update(
+                path=Concat(
+                    Value(f"{self.path}{self.PATH_SEPARATOR}"),
+                    Substr('path', len(old_prefix) + 1),
+                    output_field=models.CharField()
+                ),
+                depth=F('depth') + (self.depth - old_depth)
+            )
+    
+    def get_descendant_ids(self, include_self: bool = False, active_only: bool = False) -> list:
+        """
+        Obtiene los IDs de todas las subcategorías con una sola consulta.
+        
+        Args:
+            include_self: Si se incluye esta categoría
+            active_only: Si se descartan ramas inactivas o eliminadas
+        
+        Returns:
+            list: IDs del subárbol
+        """
+        conditions = {'is_active': True, 'is_deleted': False} if active_only else None
+        return get_subtree_pks(
+            Category, [self.pk], include_roots=include_self, conditions=conditions
+        )
     
     def get_full_path(self) -> str:
         """
@@ -100,15 +261,28 @@ class Category(BaseModel):
         Returns:
             str: Ruta completa (ej. "Electrónica > Computadoras > Laptops")
         """
-        path = [self.name]
-        parent = self.parent
-        while parent:
-            path.insert(0, parent.name)
-            parent = parent.parent
-        return ' > '.join(path)
+        return self.path or self.name
+
+
+class BrandQuerySet(models.QuerySet):
+    """Consultas de marcas para listados."""
+    
+    def with_products_count(self):
+        """
+        Anota _products_count: productos no eliminados cuya marca es el
+        nombre de la marca (Product.brand es texto, no una FK).
+        """
+        products = Product.objects.filter(
+            brand=OuterRef('name')
+        ).order_by().values('brand').annotate(total=Count('pk')).values('total')
+        return self.annotate(
+            _products_count=Coalesce(
+                Subquery(products, output_field=models.IntegerField()), 0
+            )
+        )
 
 
-class Brand(BaseModel):
+class Brand(CachedImageURLModel, BaseModel):
     """
     Marca de productos.
     
@@ -133,6 +307,8 @@ class Brand(BaseModel):
         verbose_name='Descripción'
     )
     
+    image_field_name = 'logo'
+    
     logo = models.ImageField(
         upload_to='brands/',
         null=True,
@@ -150,6 +326,8 @@ class Brand(BaseModel):
         verbose_name='Activa'
     )
     
+    objects = SoftDeleteManager.from_queryset(BrandQuerySet)()
+    
     class Meta:
         db_table = 'inventory_brands'
         verbose_name = 'Marca'
@@ -210,6 +388,30 @@ class UnitOfMeasure(BaseModel):
         return f"{self.name} ({self.abbreviation})"
 
 
+class WarehouseQuerySet(models.QuerySet):
+    """Consultas de almacenes con totales de stock."""
+    
+    def with_stock_totals(self):
+        """
+        Anota _products_count y _total_value (cantidad × costo) por almacén.
+        
+        Por qué: el serializador contaba y recorría el stock de cada almacén
+        en Python; aquí ambos totales salen del mismo GROUP BY.
+        """
+        in_stock = Q(stocks__is_deleted=False, stocks__quantity__gt=0)
+        return self.annotate(
+            _products_count=Count('stocks', filter=in_stock),
+            _total_value=Coalesce(
+                Sum(
+                    F('stocks__quantity') * F('stocks__product__cost_price'),
+                    filter=in_stock,
+                    output_field=DecimalField(max_digits=18, decimal_places=2)
+                ),
+                Value(Decimal('0.00'))
+            ),
+        )
+
+
 class Warehouse(BaseModel):
     """
     Almacén o bodega.
@@ -308,6 +510,8 @@ class Warehouse(BaseModel):
         verbose_name='Activo'
     )
     
+    objects = SoftDeleteManager.from_queryset(WarehouseQuerySet)()
+    
     class Meta:
         db_table = 'inventory_warehouses'
         verbose_name = 'Almacén'
@@ -318,6 +522,33 @@ class Warehouse(BaseModel):
         return f"{self.code} - {self.name}"
 
 
+class WarehouseLocationManager(SoftDeleteManager):
+    """
+    Ubicaciones con su almacén y ubicación padre en la misma consulta.
+    
+    Por qué: __str__ usa warehouse.code y los listados muestran el almacén
+    y el código del padre de cada ubicación.
+    """
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('warehouse', 'parent')
+    
+    def subtree(self, root_id):
+        """
+        Ubicación root_id y todas sus sububicaciones en una sola consulta.
+        
+        Por qué: armar una ruta de picking de una zona recorría los hijos
+        nivel por nivel; la CTE recursiva va dentro del filtro, así que el
+        resultado sigue siendo un queryset (ej. subtree(zona).filter(
+        location_type='bin')).
+        """
+        return self.get_queryset().filter(
+            pk__in=subtree_subquery(
+                self.model, [root_id], conditions={'is_deleted': False}
+            )
+        )
+
+
 class WarehouseLocation(BaseModel):
     """
     Ubicación dentro de un almacén.
@@ -383,21 +614,15 @@ class WarehouseLocation(BaseModel):
         verbose_name='Ubicación Padre'
     )
     
-    # Capacidad máxima
-    max_weight = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
+    # Capacidad máxima: {"weight": "kg", "volume": "m³"} como texto decimal.
+    # Por qué: la mayoría de ubicaciones no la define; un único campo
+    # nulo evita reservar dos NUMERIC por fila y admite nuevas dimensiones
+    # sin migrar la tabla.
+    capacity = models.JSONField(
         null=True,
         blank=True,
-        verbose_name='Peso Máximo (kg)'
-    )
-    
-    max_volume = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        null=True,
-        blank=True,
-        verbose_name='Volumen Máximo (m³)'
+        verbose_name='Capacidad',
+        help_text='Capacidad máxima (ej. {"weight": "500.00", "volume": "2.50"})'
     )
     
     is_active = models.BooleanField(
@@ -405,18 +630,244 @@ class WarehouseLocation(BaseModel):
         verbose_name='Activa'
     )
     
+    # Ruta materializada de códigos dentro del almacén (ej. "A/A-01/A-01-03")
+    # Por qué: ancestros y descendientes se resuelven con el índice
+    # (warehouse, path) como prefijo (path LIKE 'A/A-01/%') en lugar de
+    # recorrer parent nivel por nivel
+    path = models.CharField(
+        max_length=512,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Ruta'
+    )
+    
+    # Nivel en la jerarquía (0 = raíz)
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Nivel'
+    )
+    
+    PATH_SEPARATOR = '/'
+    
     class Meta:
         db_table = 'inventory_warehouse_locations'
         verbose_name = 'Ubicación de Almacén'
         verbose_name_plural = 'Ubicaciones de Almacén'
         unique_together = ['warehouse', 'code']
         ordering = ['warehouse__name', 'code']
+        indexes = [
+            # Búsqueda por prefijo de ruta; varchar_pattern_ops permite
+            # LIKE 'prefijo%' con cualquier collation en PostgreSQL
+            models.Index(
+                fields=['warehouse', 'path'],
+                opclasses=['uuid_ops', 'varchar_pattern_ops'],
+                name='inventory_loc_path_idx'
+            ),
+        ]
+    
+    objects = WarehouseLocationManager()
     
     def __str__(self):
         return f"{self.warehouse.code} - {self.code}"
+    
+    def save(self, *args, **kwargs):
+        # Ruta y nivel previos, para propagar cambios a las sububicaciones
+        previous = None
+        if not self._state.adding:
+            previous = WarehouseLocation.all_objects.filter(
+                pk=self.pk
+            ).values_list('path', 'depth').first()
+        
+        if self.parent_id:
+            parent = self.parent
+            self.path = f"{parent.path or parent.code}{self.PATH_SEPARATOR}{self.code}"
+            self.depth = parent.depth + 1
+        else:
+            self.path = self.code
+            self.depth = 0
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'path', 'depth'}
+        super().save(*args, **kwargs)
+        
+        if previous and previous != (self.path, self.depth):
+            self._update_descendant_paths(*previous)
+    
+    def _update_descendant_paths(self, old_path: str, old_depth: int) -> None:
+        """
+        Reescribe la ruta de todas las sububicaciones con un único UPDATE.
+        
+        Args:
+            old_path: Ruta anterior de esta ubicación
+            old_depth: Nivel anterior de esta ubicación
+        """
+        old_prefix = f"{old_path}{self.PATH_SEPARATOR}"
+        WarehouseLocation.all_objects.filter(
+            warehouse_id=self.warehouse_id,
+            path__startswith=old_prefix
+        ).update(
+            path=Concat(
+                Value(f"{self.path}{self.PATH_SEPARATOR}"),
+                Substr('path', len(old_prefix) + 1),
+                output_field=models.CharField()
+            ),
+            depth=F('depth') + (self.depth - old_depth)
+        )
+    
+    def get_descendants(self, include_self: bool = False):
+        """
+        Sububicaciones por prefijo de ruta, en una consulta indexada.
+        
+        Returns:
+            QuerySet: Ubicaciones bajo esta (ej. todos los casilleros de una zona)
+        """
+        condition = Q(path__startswith=f"{self.path}{self.PATH_SEPARATOR}")
+        if include_self:
+            condition |= Q(pk=self.pk)
+        return WarehouseLocation.objects.filter(
+            condition, warehouse_id=self.warehouse_id
+        )
+    
+    def get_ancestors(self):
+        """
+        Ubicaciones que contienen a esta, desde la ruta materializada.
+        
+        Returns:
+            QuerySet: Ancestros ordenados de la raíz hacia abajo
+        """
+        codes = self.path.split(self.PATH_SEPARATOR)[:-1]
+        return WarehouseLocation.objects.filter(
+            warehouse_id=self.warehouse_id, code__in=codes
+        ).order_by('depth')
+    
+    def _get_capacity(self, key: str):
+        value = (self.capacity or {}).get(key)
+        return Decimal(str(value)) if value is not None else None
+    
+    def _set_capacity(self, key: str, value) -> None:
+        capacity = dict(self.capacity or {})
+        if value is None:
+            capacity.pop(key, None)
+        else:
+            capacity[key] = str(Decimal(str(value)))
+        self.capacity = capacity or None
+    
+    @property
+    def max_weight(self):
+        """Peso máximo en kg (None si no se definió)."""
+        return self._get_capacity('weight')
+    
+    @max_weight.setter
+    def max_weight(self, value):
+        self._set_capacity('weight', value)
+    
+    @property
+    def max_volume(self):
+        """Volumen máximo en m³ (None si no se definió)."""
+        return self._get_capacity('volume')
+    
+    @max_volume.setter
+    def max_volume(self, value):
+        self._set_capacity('volume', value)
+    
+    def get_descendant_ids(self, include_self: bool = False) -> list:
+        """
+        Obtiene los IDs de todas las sububicaciones con una sola consulta.
+        
+        Returns:
+            list: IDs del subárbol (ej. todos los casilleros de una zona)
+        """
+        return get_subtree_pks(
+            WarehouseLocation, [self.pk], include_roots=include_self,
+            conditions={'is_deleted': False}
+        )
 
 
-class Product(BaseModel):
+class ProductQuerySet(models.QuerySet):
+    """Consultas de productos para listados y reportes."""
+    
+    # Columnas que muestra ProductListSerializer
+    LIST_FIELDS = (
+        'id', 'sku', 'barcode', 'name', 'category', 'unit_of_measure',
+        'cost_price', 'sale_price', 'product_type', 'is_active', 'image',
+        'image_url_cache',
+    )
+    
+    def for_list(self):
+        """
+        Productos con solo las columnas del listado.
+        
+        Por qué: la fila completa incluye descripción, dimensiones y
+        textos largos que el listado no usa; las relaciones se leen de
+        la caché de catálogos (category_cached, unit_cached).
+        """
+        return self.select_related(None).only(*self.LIST_FIELDS)
+    
+    def with_total_stock(self):
+        """
+        Anota _total_stock, _total_reserved y _total_available con SUM().
+        
+        Por qué: sumar product.stocks.all() en Python carga cada fila de
+        stock; aquí es un solo GROUP BY.
+        """
+        active = Q(stocks__is_deleted=False)
+        return self.annotate(
+            _total_stock=Coalesce(Sum('stocks__quantity', filter=active), 0),
+            _total_reserved=Coalesce(Sum('stocks__reserved_quantity', filter=active), 0),
+            _total_available=Coalesce(Sum('stocks__available_quantity', filter=active), 0),
+        )
+    
+    def with_stocks(self):
+        """
+        Precarga en _stocks el stock de cada producto con su almacén y
+        ubicación (leído por ProductDetailSerializer.get_stocks).
+        
+        Por qué: una consulta para todos los productos del queryset en
+        lugar de una por producto serializado.
+        """
+        return self.prefetch_related(models.Prefetch(
+            'stocks',
+            queryset=Stock.objects.select_related('warehouse', 'location'),
+            to_attr='_stocks'
+        ))
+    
+    def with_margin(self):
+        """
+        Anota _margin_pct (leído por Product.profit_margin) calculado en SQL.
+        
+        Por qué: un reporte de márgenes se resuelve en la consulta (y puede
+        ordenar o filtrar por margen) sin calcular Decimals fila a fila.
+        """
+        return self.annotate(
+            _margin_pct=Case(
+                When(
+                    sale_price__gt=0,
+                    then=Round(
+                        (F('sale_price') - F('cost_price')) * Value(Decimal('100'))
+                        / F('sale_price'),
+                        2
+                    )
+                ),
+                default=Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
+    
+    def margin_rows(self):
+        """
+        Tuplas (id, sku, cost_price, sale_price) para reportes de márgenes.
+        
+        Por qué: recorrer cientos de miles de productos como instancias
+        ejecuta Model.__init__ y asigna decenas de atributos por fila;
+        las tuplas solo traen las cuatro columnas que usa el cálculo.
+        """
+        return self.order_by().values_list('id', 'sku', 'cost_price', 'sale_price')
+
+
+class Product(CachedImageURLModel, BaseModel):
     """
     Producto del inventario.
     
@@ -719,14 +1170,71 @@ class Product(BaseModel):
         ordering = ['name']
         indexes = [
             models.Index(fields=['sku']),
-            models.Index(fields=['barcode']),
             models.Index(fields=['name']),
-            models.Index(fields=['category']),
+            # Búsqueda por subcadena: en PostgreSQL icontains se traduce a
+            # UPPER(col) LIKE UPPER('%texto%'). El B-tree no sirve para un
+            # comodín inicial; un índice trigram sobre UPPER(col) sí
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='inventory_prod_name_trgm'
+            ),
+            GinIndex(
+                OpClass(Upper('sku'), name='gin_trgm_ops'),
+                name='inventory_prod_sku_trgm'
+            ),
+            # Índices de cobertura (INCLUDE, solo PostgreSQL): el listado por
+            # categoría y la búsqueda por código de barras leen sku, nombre y
+            # precio del índice sin visitar la tabla
+            models.Index(
+                fields=['category'],
+                include=['sku', 'name', 'sale_price', 'is_active'],
+                name='inventory_prod_cat_cover_idx'
+            ),
+            models.Index(
+                fields=['barcode'],
+                include=['sku', 'name', 'sale_price'],
+                name='inventory_prod_barcode_cov_idx'
+            ),
+            # Catálogo activo por categoría, ordenado por nombre
+            models.Index(
+                fields=['category', 'name'],
+                condition=Q(is_active=True),
+                name='inventory_prod_active_cat_idx'
+            ),
+        ]
+        constraints = [
+            # El SKU se guarda en mayúsculas; la unicidad sobre UPPER(sku)
+            # impide variantes por capitalización que entren sin pasar por
+            # el serializador (admin, importaciones)
+            models.UniqueConstraint(Upper('sku'), name='uniq_product_sku_upper'),
         ]
     
+    objects = SoftDeleteManager.from_queryset(ProductQuerySet)()
+    
     def __str__(self):
         return f"[{self.sku}] {self.name}"
     
+    @property
+    def category_cached(self):
+        """
+        Categoría del producto, leída de la caché de catálogos.
+        
+        Por qué: los listados muestran la categoría de cada producto; así
+        no hace falta un JOIN ni una consulta por fila.
+        """
+        if Product.category.is_cached(self):
+            return self.category
+        from .services import InventoryService
+        return InventoryService.get_cached_catalog(Category, self.category_id)
+    
+    @property
+    def unit_cached(self):
+        """Unidad de medida del producto, leída de la caché de catálogos."""
+        if Product.unit_of_measure.is_cached(self):
+            return self.unit_of_measure
+        from .services import InventoryService
+        return InventoryService.get_cached_catalog(UnitOfMeasure, self.unit_of_measure_id)
+    
     @property
     def profit_margin(self) -> Decimal:
         """
@@ -741,6 +1249,8 @@ class Product(BaseModel):
         Por qué:
             RU1 - Gerente necesita ver márgenes en tiempo real.
         """
+        if '_margin_pct' in self.__dict__:
+            return self._margin_pct
         if self.sale_price > 0:
             margin = ((self.sale_price - self.cost_price) / self.sale_price) * 100
             return round(margin, 2)
@@ -757,6 +1267,57 @@ class Product(BaseModel):
         return self.sale_price - self.cost_price
 
 
+class StockQuerySet(models.QuerySet):
+    """
+    Filtros de reposición evaluados sobre la propia fila de stock.
+    
+    Por qué:
+        Los umbrales del producto están copiados en cada fila
+        (min_stock_cached, reorder_point_cached): el filtro no necesita
+        JOIN con productos y stock bajo usa el índice parcial.
+    """
+    
+    def low_stock(self):
+        """Stock en o bajo el mínimo del producto."""
+        return self.filter(quantity__lte=F('min_stock_cached'))
+    
+    def needs_reorder(self):
+        """Stock en o bajo el punto de reorden del producto."""
+        return self.filter(quantity__lte=F('reorder_point_cached'))
+    
+    def apply_deltas(self, quantity: dict = None, reserved: dict = None) -> int:
+        """
+        Suma variaciones de cantidad/reserva a varias filas con un solo UPDATE.
+        
+        Por qué: cada fila se actualiza con F() en la base de datos, sin
+        leer-modificar-guardar ni una consulta por registro.
+        
+        Args:
+            quantity: {pk de stock: variación de quantity}
+            reserved: {pk de stock: variación de reserved_quantity}
+        
+        Returns:
+            int: Filas actualizadas
+        """
+        changes = {}
+        for field, deltas in (('quantity', quantity), ('reserved_quantity', reserved)):
+            if deltas:
+                changes[field] = F(field) + Case(
+                    *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=models.IntegerField()
+                )
+        if not changes:
+            return 0
+        pks = set(quantity or {}) | set(reserved or {})
+        # El UPDATE masivo no emite post_save: se invalida la caché aquí
+        from .services import InventoryService
+        InventoryService.invalidate_stock(
+            self.filter(pk__in=pks).values_list('product_id', 'warehouse_id')
+        )
+        return self.filter(pk__in=pks).update(updated_at=timezone.now(), **changes)
+
+
 class Stock(BaseModel):
     """
     Stock de un producto en un almacén específico.
@@ -807,37 +1368,81 @@ class Stock(BaseModel):
     )
     
     # Ubicación dentro del almacén
-    location = models.CharField(
-        max_length=50,
+    # Por qué FK: el código de texto duplicaba WarehouseLocation; con la
+    # relación, renombrar una ubicación no toca el stock y los filtros
+    # por ubicación (location__code='A-01-03') usan el índice de la FK
+    location = models.ForeignKey(
+        WarehouseLocation,
+        null=True,
         blank=True,
+        on_delete=models.SET_NULL,
+        related_name='stocks',
         verbose_name='Ubicación',
         help_text='Ubicación específica (ej. "A-01-03" = Pasillo A, Estante 1, Nivel 3)'
     )
     
+    # Cantidad disponible para venta: max(0, quantity - reserved_quantity)
+    # Por qué: la reserva está comprometida con órdenes pendientes; como
+    # columna calculada por la base de datos se puede filtrar, ordenar e
+    # indexar (ej. filter(available_quantity__gt=0))
+    available_quantity = models.GeneratedField(
+        expression=Greatest(F('quantity') - F('reserved_quantity'), Value(0)),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name='Cantidad Disponible'
+    )
+    
+    # Copia de Product.min_stock / reorder_point
+    # Por qué: los indicadores de reposición se leen sin cargar el
+    # producto; la señal post_save de Product los mantiene al día
+    min_stock_cached = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Stock Mínimo (copia)'
+    )
+    
+    reorder_point_cached = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Punto de Reorden (copia)'
+    )
+    
     class Meta:
         db_table = 'inventory_stock'
         verbose_name = 'Stock'
         verbose_name_plural = 'Stocks'
-        # Un producto solo puede tener un registro de stock por almacén
+        # Un producto solo puede tener un registro de stock por almacén.
+        # La restricción crea además el índice (product, warehouse) que usan
+        # los totales por producto; warehouse_id tiene su propio índice de FK.
         unique_together = ['product', 'warehouse']
         ordering = ['product__name', 'warehouse__name']
+        indexes = [
+            # Reportes por almacén (alertas de stock bajo, valorización)
+            models.Index(fields=['warehouse', 'product']),
+            # Disponibilidad por producto (reservas y ventas)
+            models.Index(fields=['product', 'available_quantity']),
+            # Alertas de stock bajo: solo indexa las filas bajo el mínimo
+            models.Index(
+                fields=['warehouse'],
+                condition=Q(quantity__lte=F('min_stock_cached')),
+                name='inventory_stock_low_idx'
+            ),
+        ]
+    
+    objects = SoftDeleteManager.from_queryset(StockQuerySet)()
     
     def __str__(self):
         return f"{self.product.sku} @ {self.warehouse.code}: {self.quantity}"
     
-    @property
-    def available_quantity(self) -> int:
-        """
-        Calcula la cantidad disponible para venta.
-        
-        Returns:
-            int: Cantidad total menos reservada
-        
-        Por qué:
-            La cantidad reservada está comprometida para órdenes
-            pendientes, no se puede vender de nuevo.
-        """
-        return max(0, self.quantity - self.reserved_quantity)
+    def save(self, *args, **kwargs):
+        # Umbrales iniciales del producto al crear el registro
+        if self._state.adding and self.product_id:
+            self.min_stock_cached = self.product.min_stock
+            self.reorder_point_cached = self.product.reorder_point
+        super().save(*args, **kwargs)
+        # Django no relee las columnas generadas al guardar; se descarta el
+        # valor en memoria para que el próximo acceso lo cargue de la BD
+        self.__dict__.pop('available_quantity', None)
     
     @property
     def is_low_stock(self) -> bool:
@@ -847,7 +1452,7 @@ class Stock(BaseModel):
         Returns:
             bool: True si está bajo el mínimo del producto
         """
-        return self.quantity <= self.product.min_stock
+        return self.quantity <= self.min_stock_cached
     
     @property
     def needs_reorder(self) -> bool:
@@ -857,7 +1462,69 @@ class Stock(BaseModel):
         Returns:
             bool: True si está en o bajo el punto de reorden
         """
-        return self.quantity <= self.product.reorder_point
+        return self.quantity <= self.reorder_point_cached
+
+
+class LotQuerySet(models.QuerySet):
+    """
+    Consultas de vencimiento de lotes resueltas en la base de datos.
+    
+    Por qué:
+        Los reportes de lotes por vencer filtraban u ordenaban con las
+        propiedades de Python, cargando todos los lotes. La fecha de hoy
+        se fija una vez por consulta.
+    """
+    
+    def apply_deltas(self, quantity: dict) -> int:
+        """
+        Suma variaciones de cantidad a varios lotes con un solo UPDATE.
+        
+        Args:
+            quantity: {pk de lote: variación de quantity}
+        
+        Returns:
+            int: Filas actualizadas
+        """
+        if not quantity:
+            return 0
+        return self.filter(pk__in=quantity).update(
+            updated_at=timezone.now(),
+            quantity=F('quantity') + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in quantity.items()],
+                default=Value(0),
+                output_field=models.IntegerField()
+            )
+        )
+    
+    def with_expiration(self):
+        """Anota _days_left (intervalo) y _is_expired (leídos por las propiedades)."""
+        today = Value(timezone.now().date(), output_field=DateField())
+        return self.annotate(
+            _days_left=ExpressionWrapper(
+                F('expiration_date') - today,
+                output_field=DurationField()
+            ),
+            _is_expired=ExpressionWrapper(
+                Q(expiration_date__lt=today),
+                output_field=models.BooleanField()
+            ),
+        )
+    
+    def expiring(self, days: int = 30):
+        """Lotes con existencias que vencen entre hoy y dentro de days días."""
+        today = timezone.now().date()
+        return self.filter(
+            expiration_date__gte=today,
+            expiration_date__lte=today + timezone.timedelta(days=days),
+            quantity__gt=0
+        )
+    
+    def expired(self):
+        """Lotes con existencias cuya fecha de vencimiento ya pasó."""
+        return self.filter(
+            expiration_date__lt=timezone.now().date(),
+            quantity__gt=0
+        )
 
 
 class Lot(BaseModel):
@@ -944,6 +1611,16 @@ class Lot(BaseModel):
         verbose_name_plural = 'Lotes'
         unique_together = ['product', 'warehouse', 'lot_number']
         ordering = ['expiration_date', 'production_date']
+        indexes = [
+            # Reportes de lotes por vencer / vencidos
+            models.Index(
+                fields=['expiration_date'],
+                condition=Q(expiration_date__isnull=False),
+                name='inventory_lot_expiration_idx'
+            ),
+        ]
+    
+    objects = SoftDeleteManager.from_queryset(LotQuerySet)()
     
     def __str__(self):
         return f"{self.product.sku} - Lote: {self.lot_number}"
@@ -956,8 +1633,9 @@ class Lot(BaseModel):
         Returns:
             bool: True si pasó la fecha de vencimiento
         """
+        if '_is_expired' in self.__dict__:
+            return bool(self._is_expired)
         if self.expiration_date:
-            from django.utils import timezone
             return self.expiration_date < timezone.now().date()
         return False
     
@@ -969,8 +1647,11 @@ class Lot(BaseModel):
         Returns:
             int: Días restantes (negativo si ya venció)
         """
+        if '_days_left' in self.__dict__:
+            if self._days_left is None:
+                return 999
+            return self._days_left.days
         if self.expiration_date:
-            from django.utils import timezone
             delta = self.expiration_date - timezone.now().date()
             return delta.days
         return 999  # Sin fecha de vencimiento
@@ -1079,6 +1760,54 @@ class SerialNumber(BaseModel):
         return f"{self.product.sku} - S/N: {self.serial}"
 
 
+class InventoryTransactionQuerySet(models.QuerySet):
+    """Consultas del historial de movimientos."""
+    
+    def ledger_balances(self):
+        """
+        Stock según el historial, por (product_id, warehouse_id).
+        
+        Por qué: las cantidades se registran siempre en positivo y el
+        signo lo da el tipo; un único SUM condicional recorre el índice
+        (warehouse, product, -created_at) una vez en lugar de sumar
+        entradas y salidas por separado.
+        
+        Returns:
+            QuerySet: dicts con product_id, warehouse_id y balance
+        """
+        return self.order_by().values('product_id', 'warehouse_id').annotate(
+            balance=Coalesce(
+                Sum(Case(
+                    When(
+                        transaction_type__in=InventoryTransaction.INBOUND_TYPES,
+                        then=F('quantity')
+                    ),
+                    When(
+                        transaction_type__in=InventoryTransaction.OUTBOUND_TYPES,
+                        then=-F('quantity')
+                    ),
+                    default=Value(0)
+                )),
+                Value(0)
+            )
+        )
+
+
+def _copy_text(value) -> str:
+    """Formatea un valor para COPY ... FROM STDIN en formato texto."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
 class InventoryTransaction(BaseModel):
     """
     Transacción/Movimiento de inventario.
@@ -1126,6 +1855,22 @@ class InventoryTransaction(BaseModel):
         PRODUCTION = 'production', 'Producción'
         OTHER = 'other', 'Otro'
     
+    # Tipos que suman y restan al stock (la cantidad siempre es positiva)
+    INBOUND_TYPES = (
+        TransactionType.IN, TransactionType.TRANSFER_IN,
+        TransactionType.ADJUSTMENT_PLUS, TransactionType.RETURN_FROM_CUSTOMER,
+    )
+    OUTBOUND_TYPES = (
+        TransactionType.OUT, TransactionType.TRANSFER_OUT,
+        TransactionType.ADJUSTMENT_MINUS, TransactionType.RETURN_TO_SUPPLIER,
+    )
+    
+    # Etiquetas precalculadas. Por qué: get_FOO_display() de Django arma
+    # un dict con todas las opciones en cada llamada, y los listados y
+    # exportaciones lo invocan por cada fila (tipo y razón)
+    _TYPE_DISPLAY = dict(TransactionType.choices)
+    _REASON_DISPLAY = dict(TransactionReason.choices)
+    
     # Producto afectado
     product = models.ForeignKey(
         Product,
@@ -1226,15 +1971,153 @@ class InventoryTransaction(BaseModel):
         db_table = 'inventory_transactions'
         verbose_name = 'Transacción de Inventario'
         verbose_name_plural = 'Transacciones de Inventario'
-        ordering = ['-created_at']
+        # Sin ordering por defecto: las vistas y el admin ordenan
+        # explícitamente y los recorridos internos no pagan un ORDER BY
         indexes = [
             models.Index(fields=['product', '-created_at']),
             models.Index(fields=['warehouse', '-created_at']),
-            models.Index(fields=['reference_type', 'reference_id']),
+            # Historial de un producto en un almacén (kardex, recálculo de
+            # stock) con un solo recorrido de índice, ya ordenado
+            models.Index(
+                fields=['warehouse', 'product', '-created_at'],
+                name='inv_tx_wh_prod_created_idx'
+            ),
+            # Movimientos de un documento (orden de compra, venta...).
+            # INCLUDE permite responder producto/almacén/cantidad/tipo
+            # desde el índice, sin leer la tabla (index-only scan)
+            models.Index(
+                fields=['reference_type', 'reference_id'],
+                include=['product', 'warehouse', 'quantity', 'transaction_type'],
+                name='inv_tx_ref_covering_idx'
+            ),
+            # Filtro solo por documento (?reference_id=) sin tipo: para
+            # igualdad sobre UUID un índice hash es más pequeño que el
+            # B-tree y no depende del prefijo reference_type
+            HashIndex(
+                fields=['reference_id'],
+                condition=Q(reference_id__isnull=False),
+                name='inv_tx_refid_hash'
+            ),
+            # Rangos de fechas (resúmenes, archivo, costos recientes).
+            # Por qué BRIN: la tabla solo crece y created_at sigue el orden
+            # físico de las filas; guarda el mínimo/máximo por bloque de
+            # páginas, así que ocupa KB frente a un B-tree de GB y permite
+            # saltar los bloques fuera del período consultado
+            BrinIndex(
+                fields=['created_at'],
+                autosummarize=True,
+                name='inventory_trans_created_brin'
+            ),
         ]
     
+    objects = SoftDeleteManager.from_queryset(InventoryTransactionQuerySet)()
+    
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.product.sku}: {self.quantity}"
+    
+    def get_transaction_type_display(self) -> str:
+        return self._TYPE_DISPLAY.get(self.transaction_type, self.transaction_type)
+    
+    def get_reason_display(self) -> str:
+        return self._REASON_DISPLAY.get(self.reason, self.reason)
+    
+    @classmethod
+    def log_batch(cls, transactions: list, batch_size: int = 1000) -> list:
+        """
+        Registra varias transacciones con INSERTs por lotes.
+        
+        Args:
+            transactions: Instancias sin guardar o dicts con sus campos
+            batch_size: Filas por INSERT (hasta 10000 en importaciones grandes)
+        
+        Returns:
+            list: Transacciones creadas
+        """
+        return cls.objects.bulk_create(
+            [
+                entry if isinstance(entry, cls) else cls(**entry)
+                for entry in transactions
+            ],
+            batch_size=batch_size
+        )
+    
+    # A partir de este volumen COPY supera a los INSERT multi-fila
+    COPY_THRESHOLD = 5000
+    
+    @classmethod
+    def copy_batch(cls, entries) -> int:
+        """
+        Carga masiva con COPY de PostgreSQL.
+        
+        Propósito:
+            Importaciones de decenas de miles de movimientos (carga inicial
+            de stock, conciliación de conteos físicos). Las filas viajan
+            como texto en un solo flujo, sin construir instancias ni armar
+            INSERTs parametrizados. Para menos de COPY_THRESHOLD filas, o
+            si se necesitan las instancias creadas, usar log_batch.
+        
+        Importante:
+            No ejecuta save() ni señales, y no actualiza Stock: el llamador
+            debe ajustar el stock por su cuenta. En otros motores se
+            degrada a log_batch.
+        
+        Args:
+            entries: dicts con los campos de cada transacción; las FK
+                como product_id/warehouse_id o como instancias
+        
+        Returns:
+            int: Filas cargadas
+        """
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor != 'postgresql':
+            return len(cls.log_batch(list(entries)))
+        
+        fields = [
+            field for field in cls._meta.concrete_fields
+            if not field.generated
+        ]
+        now = timezone.now()
+        buffer = io.StringIO()
+        count = 0
+        for entry in entries:
+            values = []
+            for field in fields:
+                if field.attname in entry:
+                    value = entry[field.attname]
+                elif field.name in entry:
+                    value = entry[field.name]
+                    if field.is_relation and value is not None:
+                        value = value.pk
+                elif getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                    value = now
+                else:
+                    value = field.get_default()
+                values.append(_copy_text(field.get_db_prep_save(value, connection)))
+            buffer.write('\t'.join(values))
+            buffer.write('\n')
+            count += 1
+        
+        if count:
+            buffer.seek(0)
+            qn = connection.ops.quote_name
+            columns = ', '.join(qn(field.column) for field in fields)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {qn(cls._meta.db_table)} ({columns}) FROM STDIN",
+                    buffer
+                )
+        return count
+
+
+# Secuencia de PostgreSQL que numera las transferencias (migración 0022)
+TRANSFER_NUMBER_SEQUENCE = 'stock_transfer_number_seq'
+
+
+class NextVal(models.Func):
+    """nextval('secuencia') de PostgreSQL."""
+    
+    function = 'nextval'
+    output_field = models.BigIntegerField()
 
 
 class StockTransfer(BaseModel):
@@ -1263,10 +2146,24 @@ class StockTransfer(BaseModel):
         COMPLETED = 'completed', 'Completado'
         CANCELLED = 'cancelled', 'Cancelado'
     
-    # Número de transferencia único
+    # Ver InventoryTransaction._TYPE_DISPLAY
+    _STATUS_DISPLAY = dict(TransferStatus.choices)
+    
+    # Número de transferencia único: TRF-00000001, TRF-00000002...
+    # Por qué en la base de datos: nextval() es atómico, así que dos
+    # transferencias simultáneas nunca reciben el mismo número; el valor
+    # vuelve con el INSERT (RETURNING) sin otra consulta
     transfer_number = models.CharField(
         max_length=20,
         unique=True,
+        db_default=Concat(
+            Value('TRF-'),
+            LPad(
+                Cast(NextVal(Value(TRANSFER_NUMBER_SEQUENCE)), models.CharField()),
+                8,
+                Value('0')
+            )
+        ),
         verbose_name='Número de Transferencia'
     )
     
@@ -1325,10 +2222,30 @@ class StockTransfer(BaseModel):
         db_table = 'inventory_transfers'
         verbose_name = 'Transferencia'
         verbose_name_plural = 'Transferencias'
-        ordering = ['-created_at']
+        # Sin ordering por defecto: las vistas y el admin ordenan
+        # explícitamente y los recorridos internos no pagan un ORDER BY
+        indexes = [
+            # Transferencias en curso (tablero diario): solo indexa las
+            # que no han terminado, una fracción pequeña del historial
+            models.Index(
+                fields=['status', '-created_at'],
+                condition=Q(status__in=['draft', 'confirmed', 'in_transit']),
+                name='inv_transfer_active_idx'
+            ),
+            # Búsqueda parcial por número (?search=TRF-A3): icontains se
+            # traduce a UPPER(col) LIKE '%...%', que el índice único no
+            # resuelve; pg_trgm ya se habilitó en 0010
+            GinIndex(
+                OpClass(Upper('transfer_number'), name='gin_trgm_ops'),
+                name='inv_transfer_number_trgm'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.transfer_number}: {self.source_warehouse.code} -> {self.destination_warehouse.code}"
+    
+    def get_status_display(self) -> str:
+        return self._STATUS_DISPLAY.get(self.status, self.status)
 
 
 class StockTransferItem(BaseModel):
@@ -8,8 +8,12 @@
 # Manejan validación y transformación de datos.
 # ========================================================
 
+import re
 from rest_framework import serializers
 from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
 
 from .models import (
     Category,
@@ -25,6 +29,7 @@ from .models import (
     StockTransfer,
     StockTransferItem,
 )
+from apps.core.serializers import CachedFieldsMixin, DynamicFieldsMixin
 from apps.core.validators import (
     DecimalValidator,
     IntegerValidator,
@@ -36,7 +41,39 @@ from apps.core.exceptions import (
 )
 
 
-class CategorySerializer(serializers.ModelSerializer):
+# Importes calculados (valor de stock) con dos decimales fijos, como los
+# DecimalField de precios; str(Decimal) variaba entre '50' y '50.0000'
+TWO_PLACES = Decimal('0.01')
+
+
+def _format_amount(value) -> str:
+    return format(Decimal(value).quantize(TWO_PLACES), 'f')
+
+
+# Códigos de barras: solo ASCII. str.isalnum() también acepta letras y
+# dígitos Unicode ('É', '٣') que los lectores y las etiquetas no manejan
+BARCODE_PATTERN = re.compile(r'[A-Za-z0-9]+')
+
+
+class CachedImageField(serializers.ImageField):
+    """
+    ImageField que representa la URL guardada en image_url_cache.
+    
+    Por qué: evita llamar a storage.url() por cada fila serializada
+    (ver CachedImageURLModel); si la caché está vacía se usa el archivo.
+    """
+    
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = getattr(value.instance, 'image_url_cache', '') or value.url
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class CategorySerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para categorías de productos.
     """
@@ -57,6 +94,8 @@ class CategorySerializer(serializers.ModelSerializer):
     # Cantidad de productos en la categoría
     products_count = serializers.SerializerMethodField()
     
+    image = CachedImageField(required=False, allow_null=True)
+    
     class Meta:
         model = Category
         fields = [
@@ -69,6 +108,8 @@ class CategorySerializer(serializers.ModelSerializer):
     
     def get_products_count(self, obj: Category) -> int:
         """Cuenta productos en la categoría."""
+        if hasattr(obj, '_products_count'):
+            return obj._products_count
         return obj.products.filter(is_deleted=False).count()
     
     def validate_code(self, value: str) -> str:
@@ -76,7 +117,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return value.upper().strip()
 
 
-class BrandSerializer(serializers.ModelSerializer):
+class BrandSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para marcas de productos.
     """
@@ -84,6 +125,8 @@ class BrandSerializer(serializers.ModelSerializer):
     # Cantidad de productos de la marca
     products_count = serializers.SerializerMethodField()
     
+    logo = CachedImageField(required=False, allow_null=True)
+    
     class Meta:
         model = Brand
         fields = [
@@ -94,11 +137,13 @@ class BrandSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_products_count(self, obj: Brand) -> int:
-        """Cuenta productos de la marca."""
-        return obj.products.filter(is_deleted=False).count()
+        """Cuenta productos de la marca (Product.brand guarda el nombre)."""
+        if hasattr(obj, '_products_count'):
+            return obj._products_count
+        return Product.objects.filter(brand=obj.name).count()
 
 
-class UnitOfMeasureSerializer(serializers.ModelSerializer):
+class UnitOfMeasureSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para unidades de medida.
     """
@@ -112,7 +157,7 @@ class UnitOfMeasureSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class WarehouseSerializer(serializers.ModelSerializer):
+class WarehouseSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para almacenes.
     """
@@ -150,18 +195,25 @@ class WarehouseSerializer(serializers.ModelSerializer):
     
     def get_products_count(self, obj: Warehouse) -> int:
         """Cuenta productos con stock en el almacén."""
+        if hasattr(obj, '_products_count'):
+            return obj._products_count
         return obj.stocks.filter(quantity__gt=0).count()
     
     def get_total_value(self, obj: Warehouse) -> str:
         """Calcula el valor total del inventario en el almacén."""
-        total = sum(
-            stock.quantity * stock.product.cost_price
-            for stock in obj.stocks.filter(quantity__gt=0).select_related('product')
-        )
-        return str(total)
+        if hasattr(obj, '_total_value'):
+            return _format_amount(obj._total_value)
+        total = obj.stocks.filter(quantity__gt=0).aggregate(
+            total=Coalesce(
+                Sum(F('quantity') * F('product__cost_price'),
+                    output_field=DecimalField(max_digits=18, decimal_places=2)),
+                Value(Decimal('0.00'))
+            )
+        )['total']
+        return _format_amount(total)
 
 
-class WarehouseLocationSerializer(serializers.ModelSerializer):
+class WarehouseLocationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para ubicaciones de almacén.
     """
@@ -182,19 +234,29 @@ class WarehouseLocationSerializer(serializers.ModelSerializer):
         allow_null=True
     )
     
+    # Se guardan en capacity; se exponen igual que las antiguas columnas
+    max_weight = serializers.DecimalField(
+        max_digits=10, decimal_places=2,
+        required=False, allow_null=True
+    )
+    max_volume = serializers.DecimalField(
+        max_digits=10, decimal_places=2,
+        required=False, allow_null=True
+    )
+    
     class Meta:
         model = WarehouseLocation
         fields = [
             'id', 'warehouse', 'warehouse_name', 'code', 'name',
             'location_type', 'location_type_display',
-            'parent', 'parent_code',
+            'parent', 'parent_code', 'path', 'depth',
             'max_weight', 'max_volume', 'is_active',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'path', 'depth', 'created_at', 'updated_at']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(DynamicFieldsMixin, CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer ligero para listados de productos.
     
@@ -204,15 +266,17 @@ class ProductListSerializer(serializers.ModelSerializer):
     """
     
     category_name = serializers.CharField(
-        source='category.name',
+        source='category_cached.name',
         read_only=True
     )
     
     unit_name = serializers.CharField(
-        source='unit_of_measure.abbreviation',
+        source='unit_cached.abbreviation',
         read_only=True
     )
     
+    image = CachedImageField(read_only=True)
+    
     # Stock total en todos los almacenes
     total_stock = serializers.SerializerMethodField()
     
@@ -229,10 +293,12 @@ class ProductListSerializer(serializers.ModelSerializer):
     
     def get_total_stock(self, obj: Product) -> int:
         """Suma el stock de todos los almacenes."""
+        if hasattr(obj, '_total_stock'):
+            return obj._total_stock
         return sum(stock.quantity for stock in obj.stocks.all())
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(DynamicFieldsMixin, CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer completo para detalle de producto.
     
@@ -261,6 +327,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         read_only=True
     )
     
+    image = CachedImageField(read_only=True)
+    
     # Campos calculados
     profit_margin = serializers.DecimalField(
         max_digits=5,
@@ -306,6 +374,10 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     
     def get_stocks(self, obj: Product) -> list:
         """Retorna stock por almacén."""
+        if hasattr(obj, '_stocks'):
+            stocks = obj._stocks
+        else:
+            stocks = obj.stocks.select_related('warehouse', 'location')
         return [
             {
                 'warehouse_id': str(stock.warehouse.id),
@@ -314,22 +386,26 @@ class ProductDetailSerializer(serializers.ModelSerializer):
                 'quantity': stock.quantity,
                 'reserved': stock.reserved_quantity,
                 'available': stock.available_quantity,
-                'location': stock.location,
+                'location': stock.location.code if stock.location else '',
                 'is_low_stock': stock.is_low_stock,
             }
-            for stock in obj.stocks.select_related('warehouse').all()
+            for stock in stocks
         ]
     
     def get_total_stock(self, obj: Product) -> int:
         """Suma el stock de todos los almacenes."""
+        if hasattr(obj, '_total_stock'):
+            return obj._total_stock
         return sum(stock.quantity for stock in obj.stocks.all())
     
     def get_available_stock(self, obj: Product) -> int:
         """Suma el stock disponible de todos los almacenes."""
+        if hasattr(obj, '_total_available'):
+            return obj._total_available
         return sum(stock.available_quantity for stock in obj.stocks.all())
 
 
-class ProductCreateUpdateSerializer(serializers.ModelSerializer):
+class ProductCreateUpdateSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para crear/actualizar productos.
     
@@ -350,6 +426,10 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
             'weight', 'length', 'width', 'height',
             'image', 'is_active', 'is_purchasable', 'is_sellable'
         ]
+        # validate_sku ya comprueba la unicidad sobre el valor normalizado;
+        # el UniqueValidator automático repetiría la consulta con el valor
+        # crudo (sin mayúsculas)
+        extra_kwargs = {'sku': {'validators': []}}
     
     def validate_sku(self, value: str) -> str:
         """
@@ -363,9 +443,10 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         """
         sku = value.upper().strip()
         
-        # Verificar unicidad (excepto si es el mismo producto)
+        # Verificar unicidad (excepto si es el mismo producto). Incluye los
+        # eliminados lógicamente: la restricción de la base también los cubre
         instance = self.instance
-        if Product.objects.filter(sku=sku).exclude(
+        if Product.all_objects.filter(sku=sku).exclude(
             pk=instance.pk if instance else None
         ).exists():
             raise serializers.ValidationError(
@@ -382,7 +463,7 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         # Verificar que solo contenga dígitos (para EAN/UPC)
         # O caracteres alfanuméricos (para códigos internos)
         barcode = value.strip()
-        if not barcode.isalnum():
+        if not BARCODE_PATTERN.fullmatch(barcode):
             raise serializers.ValidationError(
                 'El código de barras solo puede contener letras y números'
             )
@@ -445,14 +526,26 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
     def update(self, instance: Product, validated_data: dict) -> Product:
-        """Actualiza el producto y registra el usuario modificador."""
+        """
+        Actualiza el producto y registra el usuario modificador.
+        
+        Por qué update_fields en PATCH: el UPDATE escribe solo las columnas
+        recibidas y las señales que dependen de otras (umbrales de stock,
+        URL de imagen) se omiten.
+        """
         request = self.context.get('request')
         if request and request.user:
             validated_data['updated_by'] = request.user
-        return super().update(instance, validated_data)
+        if not self.partial:
+            return super().update(instance, validated_data)
+        
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
-class StockSerializer(serializers.ModelSerializer):
+class StockSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para stock de productos.
     """
@@ -477,6 +570,12 @@ class StockSerializer(serializers.ModelSerializer):
         read_only=True
     )
     
+    location_code = serializers.CharField(
+        source='location.code',
+        read_only=True,
+        allow_null=True
+    )
+    
     available_quantity = serializers.IntegerField(read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
     needs_reorder = serializers.BooleanField(read_only=True)
@@ -487,15 +586,25 @@ class StockSerializer(serializers.ModelSerializer):
             'id', 'product', 'product_sku', 'product_name',
             'warehouse', 'warehouse_code', 'warehouse_name',
             'quantity', 'reserved_quantity', 'available_quantity',
-            'location', 'is_low_stock', 'needs_reorder',
+            'location', 'location_code', 'is_low_stock', 'needs_reorder',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'created_at', 'updated_at'
         ]
+    
+    def validate(self, attrs: dict) -> dict:
+        """Valida que la ubicación pertenezca al almacén del stock."""
+        location = attrs.get('location')
+        warehouse = attrs.get('warehouse') or getattr(self.instance, 'warehouse', None)
+        if location and warehouse and location.warehouse_id != warehouse.pk:
+            raise serializers.ValidationError({
+                'location': 'La ubicación no pertenece al almacén.'
+            })
+        return attrs
 
 
-class LotSerializer(serializers.ModelSerializer):
+class LotSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para lotes de productos.
     """
@@ -530,7 +639,7 @@ class LotSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class SerialNumberSerializer(serializers.ModelSerializer):
+class SerialNumberSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para números de serie.
     """
@@ -567,7 +676,7 @@ class SerialNumberSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'received_date', 'created_at', 'updated_at']
 
 
-class InventoryTransactionSerializer(serializers.ModelSerializer):
+class InventoryTransactionSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para transacciones de inventario.
     """
@@ -622,7 +731,22 @@ class InventoryTransactionSerializer(serializers.ModelSerializer):
         ]
 
 
-class StockTransferItemSerializer(serializers.ModelSerializer):
+class InventoryTransactionListSerializer(InventoryTransactionSerializer):
+    """
+    Serializer para el listado de transacciones.
+    
+    Omite notes: es un TEXT sin límite que el listado no muestra, y la
+    vista lo excluye de la consulta con defer().
+    """
+    
+    class Meta(InventoryTransactionSerializer.Meta):
+        fields = [
+            field for field in InventoryTransactionSerializer.Meta.fields
+            if field != 'notes'
+        ]
+
+
+class StockTransferItemSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para ítems de transferencia.
     """
@@ -646,7 +770,7 @@ class StockTransferItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class StockTransferSerializer(serializers.ModelSerializer):
+class StockTransferSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para transferencias de inventario.
     """
@@ -692,7 +816,7 @@ class StockTransferSerializer(serializers.ModelSerializer):
         ]
 
 
-class StockTransferCreateSerializer(serializers.ModelSerializer):
+class StockTransferCreateSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para crear transferencias con sus ítems.
     """
@@ -702,9 +826,11 @@ class StockTransferCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockTransfer
         fields = [
+            'id', 'transfer_number', 'status',
             'source_warehouse', 'destination_warehouse',
             'scheduled_date', 'notes', 'items'
         ]
+        read_only_fields = ['id', 'transfer_number', 'status']
     
     def validate(self, attrs: dict) -> dict:
         """
@@ -726,36 +852,42 @@ class StockTransferCreateSerializer(serializers.ModelSerializer):
                 'items': 'La transferencia debe tener al menos un ítem'
             })
         
-        # Validar stock disponible para cada ítem
+        # Validar stock disponible para cada ítem (una sola consulta)
+        available_by_product = dict(
+            Stock.objects.filter(
+                warehouse=source,
+                product__in=[item_data['product'] for item_data in items]
+            ).values_list('product_id', 'available_quantity')
+        )
         for item_data in items:
             product = item_data['product']
             quantity = item_data['quantity']
             
-            try:
-                stock = Stock.objects.get(product=product, warehouse=source)
-                if stock.available_quantity < quantity:
-                    raise InsufficientStockException(
-                        product=product.name,
-                        requested=quantity,
-                        available=stock.available_quantity
-                    )
-            except Stock.DoesNotExist:
+            available = available_by_product.get(product.pk)
+            if available is None:
                 raise serializers.ValidationError({
                     'items': f'No hay stock del producto {product.sku} en el almacén origen'
                 })
+            if available < quantity:
+                raise InsufficientStockException(
+                    product=product.name,
+                    requested=quantity,
+                    available=available
+                )
         
         return attrs
     
+    @transaction.atomic
     def create(self, validated_data: dict) -> StockTransfer:
         """
         Crea la transferencia con sus ítems.
+        
+        Los ítems se insertan con bulk_create: una transferencia de
+        cientos de líneas no hace un INSERT por línea.
         """
         items_data = validated_data.pop('items')
         
-        # Generar número de transferencia
-        import uuid
-        validated_data['transfer_number'] = f"TRF-{uuid.uuid4().hex[:8].upper()}"
-        
+        # transfer_number lo asigna la base de datos (ver StockTransfer)
         # Crear transferencia
         request = self.context.get('request')
         if request and request.user:
@@ -764,8 +896,10 @@ class StockTransferCreateSerializer(serializers.ModelSerializer):
         transfer = StockTransfer.objects.create(**validated_data)
         
         # Crear ítems
-        for item_data in items_data:
-            StockTransferItem.objects.create(transfer=transfer, **item_data)
+        StockTransferItem.objects.bulk_create(
+            [StockTransferItem(transfer=transfer, **item_data) for item_data in items_data],
+            batch_size=500
+        )
         
         return transfer
 
@@ -824,7 +958,7 @@ class StockDetailSerializer(StockSerializer):
     
     def get_stock_value(self, obj: Stock) -> str:
         """Calcula el valor del stock."""
-        return str(obj.quantity * obj.product.cost_price)
+        return _format_amount(obj.quantity * obj.product.cost_price)
 
 
 class StockTransferDetailSerializer(StockTransferSerializer):
@@ -832,15 +966,31 @@ class StockTransferDetailSerializer(StockTransferSerializer):
     Serializer detallado para transferencias con items expandidos.
     """
     
-    items = StockTransferItemSerializer(many=True, read_only=True)
     total_items = serializers.SerializerMethodField()
     
     class Meta(StockTransferSerializer.Meta):
         fields = StockTransferSerializer.Meta.fields + ['total_items']
     
     def get_total_items(self, obj: StockTransfer) -> int:
-        """Cuenta el total de items en la transferencia."""
-        return obj.items.count()
+        """
+        Cuenta el total de items en la transferencia.
+        
+        Los items ya vienen precargados para el campo items; contarlos en
+        memoria evita un COUNT(*) por transferencia.
+        """
+        return len(obj.items.all())
+
+
+class StockTransferListSerializer(StockTransferDetailSerializer):
+    """
+    Serializer para el listado de transferencias (sin notes).
+    """
+    
+    class Meta(StockTransferDetailSerializer.Meta):
+        fields = [
+            field for field in StockTransferDetailSerializer.Meta.fields
+            if field != 'notes'
+        ]
 
 
 # Alias para ProductSerializer - usa el de creación/actualización
@@ -15,7 +15,9 @@
 # ========================================================
 
 from decimal import Decimal
-from typing import Optional, Tuple, List
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple, List
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
@@ -28,7 +30,9 @@ from .models import (
     Warehouse,
     StockTransfer,
     StockTransferItem,
+    WarehouseLocation,
 )
+from apps.core.utils import iter_csv
 from apps.core.exceptions import (
     InsufficientStockException,
     ProductNotFoundException,
@@ -38,6 +42,21 @@ from apps.core.exceptions import (
 )
 
 
+class GoodsLine(NamedTuple):
+    """Línea de entrada de mercancía para InventoryService.receive_goods."""
+    
+    product: Product
+    quantity: int
+    unit_cost: Optional[Decimal] = None
+    lot: Optional[Lot] = None
+    # Ubicación de destino; se asigna al stock que la recepción crea
+    location: Optional[WarehouseLocation] = None
+    
+    @property
+    def product_id(self):
+        return self.product.pk
+
+
 class InventoryService:
     """
     Servicio para operaciones de inventario.
@@ -52,6 +71,135 @@ class InventoryService:
         service.add_stock(product_id, warehouse_id, quantity, ...)
     """
     
+    # Caché de catálogos de referencia por id (categorías, unidades de medida):
+    # se leen en cada producto y casi nunca cambian
+    CATALOG_CACHE_KEY = 'inventory:{model}:{pk}'
+    CATALOG_CACHE_TTL = 60 * 60
+    
+    # Caché de stock por (almacén, producto) para lecturas de POS y escaneo.
+    # Subir STOCK_CACHE_VERSION descarta todas las entradas de una vez.
+    STOCK_CACHE_KEY = 'inventory:stock:v{version}:{warehouse_id}:{product_id}'
+    STOCK_CACHE_VERSION = 1
+    STOCK_CACHE_TTL = 60 * 5
+    
+    # Tamaño de lote para el cursor de las exportaciones en streaming
+    EXPORT_CHUNK_SIZE = 2000
+    
+    # Columnas del CSV de movimientos (encabezado y ruta de la consulta)
+    TRANSACTION_EXPORT_COLUMNS = (
+        ('created_at', 'created_at'),
+        ('product_sku', 'product__sku'),
+        ('warehouse_code', 'warehouse__code'),
+        ('transaction_type', 'transaction_type'),
+        ('reason', 'reason'),
+        ('quantity', 'quantity'),
+        ('stock_before', 'stock_before'),
+        ('stock_after', 'stock_after'),
+        ('unit_cost', 'unit_cost'),
+        ('reference_type', 'reference_type'),
+        ('reference_id', 'reference_id'),
+        ('notes', 'notes'),
+    )
+    
+    # ====================================================
+    # Catálogos de Referencia
+    # ====================================================
+    
+    @staticmethod
+    def get_cached_catalog(model, pk):
+        """
+        Obtiene una categoría o unidad de medida desde la caché compartida.
+        
+        Por qué la caché de Django y no lru_cache: con varios workers, las
+        señales de un proceso no pueden invalidar la memoria de los demás.
+        
+        Args:
+            model: Category o UnitOfMeasure
+            pk: id del registro
+        
+        Returns:
+            Instancia o None si no existe
+        """
+        if pk is None:
+            return None
+        cache_key = InventoryService.CATALOG_CACHE_KEY.format(
+            model=model._meta.model_name, pk=pk
+        )
+        instance = cache.get(cache_key)
+        if instance is None:
+            instance = model.objects.filter(pk=pk).first()
+            if instance is not None:
+                cache.set(cache_key, instance, InventoryService.CATALOG_CACHE_TTL)
+        return instance
+    
+    @staticmethod
+    def invalidate_catalog(model, pks: Iterable) -> None:
+        """Elimina de la caché las entradas de model con los ids indicados."""
+        cache.delete_many([
+            InventoryService.CATALOG_CACHE_KEY.format(
+                model=model._meta.model_name, pk=pk
+            )
+            for pk in pks
+        ])
+    
+    @staticmethod
+    def _stock_cache_key(product_id, warehouse_id) -> str:
+        return InventoryService.STOCK_CACHE_KEY.format(
+            version=InventoryService.STOCK_CACHE_VERSION,
+            warehouse_id=warehouse_id,
+            product_id=product_id
+        )
+    
+    @staticmethod
+    def get_stock(product_id, warehouse_id) -> dict:
+        """
+        Obtiene el stock de un producto en un almacén, desde la caché si está.
+        
+        Por qué: el escaneo en POS consulta el mismo par una y otra vez; las
+        escrituras de stock invalidan la entrada al confirmar la transacción
+        (ver invalidate_stock), así que la caché no sirve valores viejos
+        más allá de una carrera de milisegundos acotada por STOCK_CACHE_TTL.
+        
+        Returns:
+            dict: quantity, reserved, available y location (código)
+        """
+        cache_key = InventoryService._stock_cache_key(product_id, warehouse_id)
+        data = cache.get(cache_key)
+        if data is None:
+            row = Stock.objects.filter(
+                product_id=product_id, warehouse_id=warehouse_id
+            ).values_list(
+                'quantity', 'reserved_quantity', 'available_quantity', 'location__code'
+            ).first()
+            quantity, reserved, available, location = row or (0, 0, 0, None)
+            data = {
+                'quantity': quantity,
+                'reserved': reserved,
+                'available': available,
+                'location': location or '',
+            }
+            cache.set(cache_key, data, InventoryService.STOCK_CACHE_TTL)
+        return data
+    
+    @staticmethod
+    def invalidate_stock(pairs: Iterable) -> None:
+        """
+        Elimina de la caché el stock de los pares (product_id, warehouse_id).
+        
+        Se difiere hasta el commit: borrar antes permitiría que otra
+        petición vuelva a guardar el valor anterior a la escritura.
+        """
+        keys = [
+            InventoryService._stock_cache_key(product_id, warehouse_id)
+            for product_id, warehouse_id in pairs
+        ]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    # ====================================================
+    # Movimientos de Stock
+    # ====================================================
+    
     @staticmethod
     @transaction.atomic
     def add_stock(
@@ -152,15 +300,27 @@ class InventoryService:
                     field='serial_numbers',
                     source='InventoryService.add_stock'
                 )
-            # Crear números de serie
-            for serial in serial_numbers:
-                SerialNumber.objects.create(
-                    product=product,
-                    warehouse=warehouse,
-                    serial=serial,
-                    lot=lot,
-                    status=SerialNumber.SerialStatus.AVAILABLE
+            # Un serial repetido contaría dos unidades con un solo registro
+            if len(set(serial_numbers)) != quantity:
+                raise ValidationException(
+                    message='Los números de serie no pueden repetirse',
+                    field='serial_numbers',
+                    source='InventoryService.add_stock'
                 )
+            # Crear números de serie con un INSERT por lote, no uno por serie
+            SerialNumber.objects.bulk_create(
+                [
+                    SerialNumber(
+                        product=product,
+                        warehouse=warehouse,
+                        serial=serial,
+                        lot=lot,
+                        status=SerialNumber.SerialStatus.AVAILABLE
+                    )
+                    for serial in serial_numbers
+                ],
+                batch_size=settings.INVENTORY_BULK_CREATE_BATCH_SIZE
+            )
         
         # Obtener o crear stock
         stock, created = Stock.objects.get_or_create(
@@ -303,22 +463,34 @@ class InventoryService:
                     field='serial_numbers',
                     source='InventoryService.remove_stock'
                 )
-            # Actualizar estado de números de serie
+            # Un serial repetido contaría dos unidades con un solo registro
+            if len(set(serial_numbers)) != quantity:
+                raise ValidationException(
+                    message='Los números de serie no pueden repetirse',
+                    field='serial_numbers',
+                    source='InventoryService.remove_stock'
+                )
+            # Actualizar estado de números de serie: una consulta para
+            # verificarlos todos y un UPDATE para marcarlos como vendidos
+            available = dict(
+                SerialNumber.objects.filter(
+                    product=product,
+                    status=SerialNumber.SerialStatus.AVAILABLE,
+                    serial__in=serial_numbers
+                ).values_list('serial', 'pk')
+            )
             for serial in serial_numbers:
-                try:
-                    sn = SerialNumber.objects.get(
-                        product=product,
-                        serial=serial,
-                        status=SerialNumber.SerialStatus.AVAILABLE
-                    )
-                    sn.status = SerialNumber.SerialStatus.SOLD
-                    sn.sold_date = timezone.now().date()
-                    sn.save()
-                except SerialNumber.DoesNotExist:
+                if serial not in available:
                     raise ValidationException(
                         message=f'Número de serie no disponible: {serial}',
                         source='InventoryService.remove_stock'
                     )
+            now = timezone.now()
+            SerialNumber.objects.filter(pk__in=available.values()).update(
+                status=SerialNumber.SerialStatus.SOLD,
+                sold_date=now.date(),
+                updated_at=now
+            )
         
         # Guardar stock anterior
         stock_before = stock.quantity
@@ -498,6 +670,87 @@ class InventoryService:
         
         return stock, transaction_record
     
+    @staticmethod
+    @transaction.atomic
+    def receive_goods(
+        warehouse: Warehouse,
+        lines: list,
+        reason: str = InventoryTransaction.TransactionReason.PURCHASE,
+        reference_type: str = None,
+        reference_id: str = None,
+        notes: str = '',
+        user=None
+    ) -> List[InventoryTransaction]:
+        """
+        Registra la entrada de todas las líneas de un documento a un almacén.
+        
+        Propósito:
+            Recepciones de compra de muchas líneas sin repetir add_stock
+            por línea: el stock se bloquea, crea y actualiza con una
+            consulta por paso y las transacciones se insertan por lotes.
+            Los lotes ya deben existir (la línea de recepción los referencia).
+            El stock que no existía se crea en la ubicación de su línea.
+        
+        Args:
+            warehouse: Almacén destino
+            lines: Lista de GoodsLine
+            reason: Razón de la entrada
+            reference_type: Tipo de documento origen
+            reference_id: ID del documento origen
+            notes: Notas de las transacciones
+            user: Usuario que realiza la operación
+        
+        Returns:
+            List[InventoryTransaction]: Transacciones creadas
+        """
+        for line in lines:
+            if line.quantity <= 0:
+                raise ValidationException(
+                    message='La cantidad debe ser mayor a cero',
+                    field='quantity',
+                    source='InventoryService.receive_goods'
+                )
+        
+        locations = {
+            line.product_id: line.location
+            for line in lines if line.location is not None
+        }
+        stocks = InventoryService._lock_or_create_stocks(
+            warehouse, lines, locations=locations
+        )
+        running = {stock.pk: stock.quantity for stock in stocks.values()}
+        deltas = {}
+        lot_deltas = {}
+        records = []
+        for line in lines:
+            stock = stocks[line.product_id]
+            lot = line.lot
+            stock_before = running[stock.pk]
+            running[stock.pk] += line.quantity
+            deltas[stock.pk] = deltas.get(stock.pk, 0) + line.quantity
+            if lot is not None:
+                lot_deltas[lot.pk] = lot_deltas.get(lot.pk, 0) + line.quantity
+            
+            records.append(InventoryTransaction(
+                product=line.product,
+                warehouse=warehouse,
+                transaction_type=InventoryTransaction.TransactionType.IN,
+                reason=reason,
+                quantity=line.quantity,
+                stock_before=stock_before,
+                stock_after=running[stock.pk],
+                unit_cost=line.unit_cost,
+                lot=lot,
+                reference_type=reference_type or '',
+                reference_id=reference_id,
+                notes=notes,
+                created_by=user
+            ))
+        
+        Stock.objects.apply_deltas(quantity=deltas)
+        Lot.objects.apply_deltas(quantity=lot_deltas)
+        return InventoryTransaction.log_batch(records)
+    
     @staticmethod
     @transaction.atomic
     def process_transfer(
@@ -519,7 +772,12 @@ class InventoryService:
         
         Returns:
             StockTransfer: Transferencia actualizada
+        
+        Cada transición guarda solo las columnas que cambia (update_fields):
+        no reescribe notes ni pisa una edición concurrente de otros campos.
         """
+        items = list(transfer.items.select_related('product'))
+        
         if action == 'confirm':
             if transfer.status != StockTransfer.TransferStatus.DRAFT:
                 raise InvalidTransferException(
@@ -527,30 +785,22 @@ class InventoryService:
                 )
             
             # Validar y reservar stock
-            for item in transfer.items.all():
-                try:
-                    stock = Stock.objects.get(
-                        product=item.product,
-                        warehouse=transfer.source_warehouse
-                    )
-                    if stock.available_quantity < item.quantity:
-                        raise InsufficientStockException(
-                            product=item.product.name,
-                            requested=item.quantity,
-                            available=stock.available_quantity
-                        )
-                    # Reservar stock
-                    stock.reserved_quantity += item.quantity
-                    stock.save()
-                except Stock.DoesNotExist:
+            stocks = InventoryService._lock_stocks(transfer.source_warehouse, items)
+            reserved = {}
+            for item in items:
+                stock = stocks.get(item.product_id)
+                available = stock.available_quantity - reserved.get(stock.pk, 0) if stock else 0
+                if available < item.quantity:
                     raise InsufficientStockException(
                         product=item.product.name,
                         requested=item.quantity,
-                        available=0
+                        available=available
                     )
+                reserved[stock.pk] = reserved.get(stock.pk, 0) + item.quantity
+            Stock.objects.apply_deltas(reserved=reserved)
             
             transfer.status = StockTransfer.TransferStatus.CONFIRMED
-            transfer.save()
+            transfer.save(update_fields=['status', 'updated_at'])
         
         elif action == 'ship':
             if transfer.status != StockTransfer.TransferStatus.CONFIRMED:
@@ -559,32 +809,42 @@ class InventoryService:
                 )
             
             # Sacar del almacén origen
-            for item in transfer.items.all():
-                stock = Stock.objects.get(
-                    product=item.product,
-                    warehouse=transfer.source_warehouse
-                )
-                stock.quantity -= item.quantity
-                stock.reserved_quantity -= item.quantity
-                stock.save()
+            stocks = InventoryService._lock_stocks(transfer.source_warehouse, items)
+            running = {stock.pk: stock.quantity for stock in stocks.values()}
+            deltas = {}
+            records = []
+            for item in items:
+                stock = stocks.get(item.product_id)
+                if stock is None:
+                    raise InsufficientStockException(
+                        product=item.product.name,
+                        requested=item.quantity,
+                        available=0
+                    )
+                stock_before = running[stock.pk]
+                running[stock.pk] -= item.quantity
+                deltas[stock.pk] = deltas.get(stock.pk, 0) - item.quantity
                 
-                # Registrar transacción de salida
-                InventoryTransaction.objects.create(
+                # Transacción de salida
+                records.append(InventoryTransaction(
                     product=item.product,
                     warehouse=transfer.source_warehouse,
                     transaction_type=InventoryTransaction.TransactionType.TRANSFER_OUT,
                     reason=InventoryTransaction.TransactionReason.TRANSFER,
                     quantity=item.quantity,
-                    stock_before=stock.quantity + item.quantity,
-                    stock_after=stock.quantity,
+                    stock_before=stock_before,
+                    stock_after=running[stock.pk],
                     reference_type='stock_transfer',
                     reference_id=transfer.id,
                     created_by=user
-                )
+                ))
+            
+            Stock.objects.apply_deltas(quantity=deltas, reserved=deltas)
+            InventoryTransaction.log_batch(records)
             
             transfer.status = StockTransfer.TransferStatus.IN_TRANSIT
             transfer.shipped_date = timezone.now()
-            transfer.save()
+            transfer.save(update_fields=['status', 'shipped_date', 'updated_at'])
         
         elif action == 'receive':
             if transfer.status != StockTransfer.TransferStatus.IN_TRANSIT:
@@ -592,37 +852,40 @@ class InventoryService:
                     reason='Solo se pueden recibir transferencias en tránsito'
                 )
             
-            # Agregar al almacén destino
-            for item in transfer.items.all():
+            # Agregar al almacén destino (creando el stock que no exista)
+            warehouse = transfer.destination_warehouse
+            stocks = InventoryService._lock_or_create_stocks(warehouse, items)
+            
+            running = {stock.pk: stock.quantity for stock in stocks.values()}
+            deltas = {}
+            records = []
+            for item in items:
                 received_qty = item.received_quantity or item.quantity
+                stock = stocks[item.product_id]
+                stock_before = running[stock.pk]
+                running[stock.pk] += received_qty
+                deltas[stock.pk] = deltas.get(stock.pk, 0) + received_qty
                 
-                stock, _ = Stock.objects.get_or_create(
-                    product=item.product,
-                    warehouse=transfer.destination_warehouse,
-                    defaults={'quantity': 0}
-                )
-                
-                stock_before = stock.quantity
-                stock.quantity += received_qty
-                stock.save()
-                
-                # Registrar transacción de entrada
-                InventoryTransaction.objects.create(
+                # Transacción de entrada
+                records.append(InventoryTransaction(
                     product=item.product,
-                    warehouse=transfer.destination_warehouse,
+                    warehouse=warehouse,
                     transaction_type=InventoryTransaction.TransactionType.TRANSFER_IN,
                     reason=InventoryTransaction.TransactionReason.TRANSFER,
                     quantity=received_qty,
                     stock_before=stock_before,
-                    stock_after=stock.quantity,
+                    stock_after=running[stock.pk],
                     reference_type='stock_transfer',
                     reference_id=transfer.id,
                     created_by=user
-                )
+                ))
+            
+            Stock.objects.apply_deltas(quantity=deltas)
+            InventoryTransaction.log_batch(records)
             
             transfer.status = StockTransfer.TransferStatus.COMPLETED
             transfer.received_date = timezone.now()
-            transfer.save()
+            transfer.save(update_fields=['status', 'received_date', 'updated_at'])
         
         elif action == 'cancel':
             if transfer.status in [
@@ -635,22 +898,71 @@ class InventoryService:
             
             # Liberar reservas si estaba confirmada
             if transfer.status == StockTransfer.TransferStatus.CONFIRMED:
-                for item in transfer.items.all():
-                    try:
-                        stock = Stock.objects.get(
-                            product=item.product,
-                            warehouse=transfer.source_warehouse
-                        )
-                        stock.reserved_quantity -= item.quantity
-                        stock.save()
-                    except Stock.DoesNotExist:
-                        pass
+                stocks = InventoryService._lock_stocks(transfer.source_warehouse, items)
+                released = {}
+                for item in items:
+                    stock = stocks.get(item.product_id)
+                    if stock is not None:
+                        released[stock.pk] = released.get(stock.pk, 0) - item.quantity
+                Stock.objects.apply_deltas(reserved=released)
             
             transfer.status = StockTransfer.TransferStatus.CANCELLED
-            transfer.save()
+            transfer.save(update_fields=['status', 'updated_at'])
         
         return transfer
     
+    @staticmethod
+    def _lock_stocks(warehouse: Warehouse, items) -> dict:
+        """
+        Bloquea y obtiene el stock de los productos de items en un almacén.
+        
+        Returns:
+            dict: {product_id: Stock}
+        """
+        stocks = Stock.objects.select_for_update().filter(
+            warehouse=warehouse,
+            product_id__in={item.product_id for item in items}
+        )
+        return {stock.product_id: stock for stock in stocks}
+    
+    @staticmethod
+    def _lock_or_create_stocks(
+        warehouse: Warehouse,
+        items,
+        locations: dict = None
+    ) -> dict:
+        """
+        Como _lock_stocks, creando antes (en un INSERT) el stock que falte.
+        
+        Args:
+            warehouse: Almacén de los ítems
+            items: Objetos con product y product_id
+            locations: {product_id: WarehouseLocation} de las filas a crear
+        
+        Returns:
+            dict: {product_id: Stock}
+        """
+        stocks = InventoryService._lock_stocks(warehouse, items)
+        missing = {
+            item.product_id: item.product
+            for item in items if item.product_id not in stocks
+        }
+        if missing:
+            locations = locations or {}
+            Stock.objects.bulk_create([
+                Stock(
+                    product=product,
+                    warehouse=warehouse,
+                    location=locations.get(product_id),
+                    quantity=0,
+                    min_stock_cached=product.min_stock,
+                    reorder_point_cached=product.reorder_point
+                )
+                for product_id, product in missing.items()
+            ])
+            stocks = InventoryService._lock_stocks(warehouse, items)
+        return stocks
+    
     @staticmethod
     def get_stock_valuation(warehouse_id: str = None) -> dict:
         """
@@ -699,6 +1011,21 @@ class InventoryService:
             'by_category': list(by_category)
         }
     
+    @staticmethod
+    def stream_transactions_csv(queryset) -> Iterator[str]:
+        """
+        Emite los movimientos de queryset como CSV, por lotes.
+        
+        Por qué: un kardex anual puede tener millones de filas; con
+        iterator() (cursor del servidor en PostgreSQL) y values_list solo
+        se mantiene en memoria un lote de tuplas, no todo el historial.
+        """
+        columns = InventoryService.TRANSACTION_EXPORT_COLUMNS
+        rows = queryset.values_list(
+            *[path for _, path in columns]
+        ).iterator(chunk_size=InventoryService.EXPORT_CHUNK_SIZE)
+        return iter_csv([header for header, _ in columns], rows)
+    
     @staticmethod
     def get_low_stock_products(warehouse_id: str = None) -> List[dict]:
         """
@@ -713,30 +1040,37 @@ class InventoryService:
         Returns:
             Lista de productos con stock bajo
         """
-        from django.db.models import F
-        
-        queryset = Stock.objects.filter(
-            quantity__lte=F('product__min_stock'),
+        queryset = Stock.objects.low_stock().filter(
             quantity__gt=0,
             product__is_active=True
-        ).select_related('product', 'warehouse')
+        )
         
         if warehouse_id:
             queryset = queryset.filter(warehouse_id=warehouse_id)
         
+        # Tuplas en lugar de instancias de Stock, Product y Warehouse
+        rows = queryset.values_list(
+            'product_id', 'product__sku', 'product__name',
+            'warehouse_id', 'warehouse__name', 'quantity',
+            'product__min_stock', 'product__reorder_point',
+            'product__reorder_quantity',
+        )
         return [
             {
-                'product_id': str(stock.product.id),
-                'product_sku': stock.product.sku,
-                'product_name': stock.product.name,
-                'warehouse_id': str(stock.warehouse.id),
-                'warehouse_name': stock.warehouse.name,
-                'current_stock': stock.quantity,
-                'min_stock': stock.product.min_stock,
-                'reorder_point': stock.product.reorder_point,
-                'reorder_quantity': stock.product.reorder_quantity,
+                'product_id': str(product_id),
+                'product_sku': sku,
+                'product_name': name,
+                'warehouse_id': str(warehouse_pk),
+                'warehouse_name': warehouse_name,
+                'current_stock': quantity,
+                'min_stock': min_stock,
+                'reorder_point': reorder_point,
+                'reorder_quantity': reorder_quantity,
             }
-            for stock in queryset
+            for (
+                product_id, sku, name, warehouse_pk, warehouse_name, quantity,
+                min_stock, reorder_point, reorder_quantity,
+            ) in rows
         ]
     
     @staticmethod
@@ -793,23 +1127,6 @@ class InventoryService:
         
         # Agregar stock si se especifica almacén
         if warehouse_id:
-            try:
-                stock = Stock.objects.get(
-                    product=product,
-                    warehouse_id=warehouse_id
-                )
-                result['stock'] = {
-                    'quantity': stock.quantity,
-                    'reserved': stock.reserved_quantity,
-                    'available': stock.available_quantity,
-                    'location': stock.location,
-                }
-            except Stock.DoesNotExist:
-                result['stock'] = {
-                    'quantity': 0,
-                    'reserved': 0,
-                    'available': 0,
-                    'location': '',
-                }
+            result['stock'] = InventoryService.get_stock(product.pk, warehouse_id)
         
         return result
@@ -0,0 +1,65 @@
+# ========================================================
+# SISTEMA ERP UNIVERSAL - Señales de Inventario
+# ========================================================
+# Versión: 1.0
+#
+# Propósito: Mantener coherentes los datos copiados entre modelos
+# del inventario cuando cambia su origen.
+# ========================================================
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Product, Stock, UnitOfMeasure, WarehouseLocation
+from .services import InventoryService
+
+
+@receiver(post_save, sender=Product)
+def sync_stock_thresholds(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Copia min_stock y reorder_point del producto a sus filas de stock.
+    
+    Por qué: Stock evalúa is_low_stock/needs_reorder con su copia local;
+    un único UPDATE toca solo las filas desactualizadas. Un guardado
+    parcial que no toca los umbrales no necesita revisarlas.
+    """
+    if created:
+        return
+    if update_fields is not None and not {'min_stock', 'reorder_point'} & update_fields:
+        return
+    Stock.all_objects.filter(product=instance).exclude(
+        Q(min_stock_cached=instance.min_stock)
+        & Q(reorder_point_cached=instance.reorder_point)
+    ).update(
+        min_stock_cached=instance.min_stock,
+        reorder_point_cached=instance.reorder_point
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=UnitOfMeasure)
+@receiver(post_delete, sender=UnitOfMeasure)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    """Invalida la entrada de caché de la categoría o unidad modificada."""
+    InventoryService.invalidate_catalog(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def invalidate_stock_cache(sender, instance, **kwargs):
+    """Invalida el stock en caché del producto y almacén modificados."""
+    InventoryService.invalidate_stock([(instance.product_id, instance.warehouse_id)])
+
+
+@receiver(post_save, sender=WarehouseLocation)
+def invalidate_stock_cache_by_location(sender, instance, created, **kwargs):
+    """El stock en caché incluye el código de la ubicación."""
+    if created:
+        return
+    InventoryService.invalidate_stock(
+        Stock.all_objects.filter(location=instance).values_list(
+            'product_id', 'warehouse_id'
+        )
+    )
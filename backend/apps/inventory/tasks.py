@@ -43,29 +43,31 @@ def check_low_stock_alerts(self):
         from apps.authentication.models import User
         
         # Buscar productos con stock bajo
-        low_stock_items = Stock.objects.filter(
-            quantity__lte=F('product__min_stock'),
+        # Tuplas en lugar de instancias: el reporte solo usa estas columnas
+        low_stock_items = list(Stock.objects.low_stock().filter(
             product__is_active=True,
             product__is_deleted=False
-        ).select_related('product', 'warehouse')
+        ).values_list(
+            'warehouse__name', 'product__sku', 'product__name', 'quantity',
+            'product__min_stock', 'product__reorder_quantity',
+        ))
         
-        if not low_stock_items.exists():
+        if not low_stock_items:
             logger.info("No hay productos con stock bajo")
             return {'alerts_sent': 0}
         
         # Agrupar por almacén para el reporte
         alerts_by_warehouse = {}
-        for stock in low_stock_items:
-            warehouse_name = stock.warehouse.name
+        for warehouse_name, sku, name, quantity, min_stock, reorder_quantity in low_stock_items:
             if warehouse_name not in alerts_by_warehouse:
                 alerts_by_warehouse[warehouse_name] = []
             
             alerts_by_warehouse[warehouse_name].append({
-                'sku': stock.product.sku,
-                'name': stock.product.name,
-                'current_stock': stock.quantity,
-                'min_stock': stock.product.min_stock,
-                'reorder_quantity': stock.product.reorder_quantity,
+                'sku': sku,
+                'name': name,
+                'current_stock': quantity,
+                'min_stock': min_stock,
+                'reorder_quantity': reorder_quantity,
             })
         
         # Construir mensaje de alerta
@@ -100,10 +102,10 @@ def check_low_stock_alerts(self):
                 fail_silently=True,
             )
         
-        logger.info(f"Alertas de stock bajo enviadas: {low_stock_items.count()} productos")
+        logger.info(f"Alertas de stock bajo enviadas: {len(low_stock_items)} productos")
         
         return {
-            'alerts_sent': low_stock_items.count(),
+            'alerts_sent': len(low_stock_items),
             'warehouses_affected': len(alerts_by_warehouse),
         }
         
@@ -129,29 +131,15 @@ def check_expiring_lots(self, days=30):
     try:
         from .models import Lot
         
-        expiry_threshold = timezone.now().date() + timezone.timedelta(days=days)
-        
-        # Lotes por vencer
-        expiring_lots = Lot.objects.filter(
-            expiry_date__lte=expiry_threshold,
-            expiry_date__gt=timezone.now().date(),
-            quantity__gt=0,
-            status='active'
-        ).select_related('product', 'warehouse')
-        
-        # Lotes ya vencidos
-        expired_lots = Lot.objects.filter(
-            expiry_date__lt=timezone.now().date(),
-            quantity__gt=0,
-            status='active'
-        ).select_related('product', 'warehouse')
-        
-        # Marcar lotes vencidos
-        expired_count = expired_lots.update(status='expired')
+        # Lotes por vencer y ya vencidos (filtros resueltos en SQL)
+        expiring_lots = Lot.objects.expiring(days).select_related(
+            'product', 'warehouse'
+        ).order_by('expiration_date')
+        expired_count = Lot.objects.expired().count()
         
         if not expiring_lots.exists() and not expired_count:
             logger.info("No hay lotes por vencer")
-            return {'expiring': 0, 'expired_marked': 0}
+            return {'expiring': 0, 'expired': 0}
         
         # Construir alerta
         message_parts = ["Reporte de Lotes - Sistema ERP\n\n"]
@@ -165,7 +153,7 @@ def check_expiring_lots(self, days=30):
                 message_parts.append(
                     f"- Lote: {lot.lot_number}\n"
                     f"  Producto: {lot.product.name}\n"
-                    f"  Vence: {lot.expiry_date}\n"
+                    f"  Vence: {lot.expiration_date}\n"
                     f"  Cantidad: {lot.quantity} | Almacén: {lot.warehouse.name}\n\n"
                 )
         
@@ -180,11 +168,11 @@ def check_expiring_lots(self, days=30):
             fail_silently=True,
         )
         
-        logger.info(f"Lotes por vencer: {expiring_lots.count()}, Vencidos marcados: {expired_count}")
+        logger.info(f"Lotes por vencer: {expiring_lots.count()}, Vencidos: {expired_count}")
         
         return {
             'expiring': expiring_lots.count(),
-            'expired_marked': expired_count,
+            'expired': expired_count,
         }
         
     except Exception as exc:
@@ -341,22 +329,12 @@ def recalculate_stock_from_transactions(product_id, warehouse_id):
     try:
         from .models import Stock, InventoryTransaction
         
-        # Sumar todas las entradas
-        entries = InventoryTransaction.objects.filter(
+        # Entradas menos salidas en una sola pasada
+        ledger = list(InventoryTransaction.objects.filter(
             product_id=product_id,
-            warehouse_id=warehouse_id,
-            transaction_type__in=['in', 'adjustment_plus', 'transfer_in', 'initial']
-        ).aggregate(total=Sum('quantity'))
-        
-        # Sumar todas las salidas
-        exits = InventoryTransaction.objects.filter(
-            product_id=product_id,
-            warehouse_id=warehouse_id,
-            transaction_type__in=['out', 'adjustment_minus', 'transfer_out']
-        ).aggregate(total=Sum('quantity'))
-        
-        # Calcular stock
-        calculated_stock = (entries['total'] or 0) - (exits['total'] or 0)
+            warehouse_id=warehouse_id
+        ).ledger_balances())
+        calculated_stock = ledger[0]['balance'] if ledger else 0
         
         # Actualizar stock
         stock, created = Stock.objects.get_or_create(
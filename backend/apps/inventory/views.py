@@ -10,13 +10,16 @@
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, F, Q
-from django.utils import timezone
+from django.db.models import Count, Prefetch, Sum, F, Q
+from django.http import StreamingHttpResponse
 from decimal import Decimal
 
+from apps.core.utils import day_range_filter
+from apps.core.mixins import EagerLoadingMixin, SparseFieldsMixin
 from apps.core.views import BaseViewSet
 from apps.authentication.permissions import HasModulePermission
 
@@ -48,13 +51,26 @@ from .serializers import (
     StockDetailSerializer,
     SerialNumberSerializer,
     InventoryTransactionSerializer,
+    InventoryTransactionListSerializer,
     StockTransferSerializer,
     StockTransferDetailSerializer,
+    StockTransferCreateSerializer,
+    StockTransferListSerializer,
     StockTransferItemSerializer,
 )
 from .services import InventoryService
 
 
+def _transactions_csv_response(queryset, filename: str) -> StreamingHttpResponse:
+    """Respuesta CSV en streaming con los movimientos de queryset."""
+    response = StreamingHttpResponse(
+        InventoryService.stream_transactions_csv(queryset),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
 class CategoryViewSet(BaseViewSet):
     """
     ViewSet para gestión de categorías de productos.
@@ -80,6 +96,12 @@ class CategoryViewSet(BaseViewSet):
     ordering_fields = ['name', 'code', 'created_at']
     ordering = ['name']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_products_count()
+        return queryset
+    
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """
@@ -119,21 +141,14 @@ class CategoryViewSet(BaseViewSet):
             Lista paginada de productos.
         """
         category = self.get_object()
-        # Incluir productos de subcategorías
-        descendant_ids = [category.id]
-        
-        def get_descendants(cat):
-            for child in cat.children.filter(is_active=True):
-                descendant_ids.append(child.id)
-                get_descendants(child)
-        
-        get_descendants(category)
+        # Incluir productos de subcategorías (una sola consulta recursiva)
+        descendant_ids = category.get_descendant_ids(include_self=True, active_only=True)
         
         products = Product.objects.filter(
             category_id__in=descendant_ids,
             is_deleted=False,
             is_active=True
-        )
+        ).for_list().with_total_stock().order_by('name')
         
         page = self.paginate_queryset(products)
         if page is not None:
@@ -157,6 +172,12 @@ class BrandViewSet(BaseViewSet):
     module_name = 'inventory'
     search_fields = ['name', 'description']
     ordering = ['name']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_products_count()
+        return queryset
 
 
 class UnitOfMeasureViewSet(BaseViewSet):
@@ -193,6 +214,12 @@ class WarehouseViewSet(BaseViewSet):
     search_fields = ['name', 'code', 'address']
     ordering = ['name']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.with_stock_totals()
+        return queryset
+    
     @action(detail=True, methods=['get'])
     def locations(self, request, pk=None):
         """
@@ -274,9 +301,27 @@ class WarehouseLocationViewSet(BaseViewSet):
     filterset_fields = ['warehouse', 'location_type']
     search_fields = ['code', 'name']
     ordering = ['warehouse__name', 'code']
+    
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """
+        Lista la ubicación y todas sus sububicaciones.
+        
+        Propósito:
+            Rutas de picking (ej. todos los casilleros de una zona);
+            admite los mismos filtros que el listado (?location_type=bin).
+        """
+        # Los filtros de la petición aplican al subárbol, no a la raíz
+        location = get_object_or_404(self.get_queryset(), pk=pk)
+        self.check_object_permissions(request, location)
+        queryset = self.filter_queryset(
+            WarehouseLocation.objects.subtree(location.pk).filter(is_active=True)
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
 
 
-class ProductViewSet(BaseViewSet):
+class ProductViewSet(SparseFieldsMixin, BaseViewSet):
     """
     ViewSet para gestión de productos.
     
@@ -285,6 +330,7 @@ class ProductViewSet(BaseViewSet):
         gestión de stock, precios, y escaneo de códigos.
     
     Endpoints Adicionales:
+        GET /products/?fields=id,sku,name - Solo los campos indicados
         GET /products/search/ - Búsqueda avanzada
         GET /products/barcode/{code}/ - Buscar por código de barras
         GET /products/{id}/stock/ - Stock del producto
@@ -300,6 +346,35 @@ class ProductViewSet(BaseViewSet):
     filterset_fields = ['category', 'brand', 'is_active', 'product_type']
     ordering_fields = ['name', 'sku', 'created_at', 'sale_price']
     ordering = ['name']
+    # Columnas de los campos del listado que no son columnas directas
+    sparse_field_columns = {
+        'category_name': ('category',),
+        'unit_name': ('unit_of_measure',),
+        'image': ('image', 'image_url_cache'),
+        'total_stock': (),
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        requested = self.get_requested_fields()
+        
+        def wants(*names):
+            return requested is None or not requested.isdisjoint(names)
+        
+        # Los totales y el stock por almacén solo se calculan si se piden
+        if self.action == 'list':
+            queryset = queryset.for_list()
+            if wants('total_stock'):
+                queryset = queryset.with_total_stock()
+            columns = self.get_sparse_columns(ProductListSerializer)
+            if columns:
+                queryset = queryset.only(*columns)
+        elif self.action == 'retrieve':
+            if wants('total_stock', 'available_stock'):
+                queryset = queryset.with_total_stock()
+            if wants('stocks'):
+                queryset = queryset.with_stocks()
+        return queryset
     
     def get_serializer_class(self):
         """Selecciona serializer según la acción."""
@@ -380,16 +455,19 @@ class ProductViewSet(BaseViewSet):
         if warehouse:
             queryset = queryset.filter(warehouse_id=warehouse)
         
-        start_date = request.query_params.get('start_date')
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        
-        end_date = request.query_params.get('end_date')
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
+        # Rango sobre la columna, no sobre created_at::date, para usar índices
+        queryset = queryset.filter(**day_range_filter(
+            'created_at',
+            request.query_params.get('start_date'),
+            request.query_params.get('end_date')
+        ))
         
         queryset = queryset.order_by('-created_at')
         
+        # ?export=csv: historial completo en streaming, sin paginar
+        if request.query_params.get('export') == 'csv':
+            return _transactions_csv_response(queryset, f'movimientos_{product.sku}')
+        
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = InventoryTransactionSerializer(page, many=True)
@@ -410,7 +488,7 @@ class ProductViewSet(BaseViewSet):
         lots = Lot.objects.filter(
             product=product,
             quantity__gt=0
-        ).select_related('warehouse')
+        ).with_expiration().select_related('warehouse')
         
         serializer = LotSerializer(lots, many=True)
         return Response(serializer.data)
@@ -512,7 +590,7 @@ class ProductViewSet(BaseViewSet):
         return Response(result)
 
 
-class StockViewSet(viewsets.ModelViewSet):
+class StockViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de stock.
     
@@ -526,7 +604,7 @@ class StockViewSet(viewsets.ModelViewSet):
         POST /stock/reserve/ - Reservar stock
         POST /stock/release/ - Liberar reserva
     """
-    queryset = Stock.objects.all().select_related('product', 'warehouse')
+    queryset = Stock.objects.all()
     serializer_class = StockSerializer
     permission_classes = [IsAuthenticated, HasModulePermission]
     module_name = 'inventory'
@@ -682,18 +760,18 @@ class StockViewSet(viewsets.ModelViewSet):
             )
 
 
-class LotViewSet(BaseViewSet):
+class LotViewSet(EagerLoadingMixin, BaseViewSet):
     """
     ViewSet para gestión de lotes.
     
     Propósito:
         Trazabilidad de lotes para productos perecederos.
     """
-    queryset = Lot.objects.all().select_related('product', 'warehouse')
+    queryset = Lot.objects.with_expiration()
     serializer_class = LotSerializer
     permission_classes = [IsAuthenticated, HasModulePermission]
     module_name = 'inventory'
-    filterset_fields = ['product', 'warehouse', 'status']
+    filterset_fields = ['product', 'warehouse', 'expiration_date']
     search_fields = ['lot_number', 'product__name']
     ordering = ['-created_at']
     
@@ -709,13 +787,10 @@ class LotViewSet(BaseViewSet):
             days: Días para considerar "próximo a vencer" (default: 30)
         """
         days = int(request.query_params.get('days', 30))
-        expiry_date = timezone.now().date() + timezone.timedelta(days=days)
         
-        lots = Lot.objects.filter(
-            expiry_date__lte=expiry_date,
-            quantity__gt=0,
-            status=Lot.LotStatus.ACTIVE
-        ).select_related('product', 'warehouse').order_by('expiry_date')
+        lots = self.apply_eager_loading(
+            Lot.objects.expiring(days).with_expiration(), LotSerializer
+        ).order_by('expiration_date')
         
         serializer = LotSerializer(lots, many=True)
         return Response(serializer.data)
@@ -728,27 +803,22 @@ class LotViewSet(BaseViewSet):
         Propósito:
             Control de productos vencidos para disposición.
         """
-        today = timezone.now().date()
-        
-        lots = Lot.objects.filter(
-            expiry_date__lt=today,
-            quantity__gt=0
-        ).select_related('product', 'warehouse').order_by('expiry_date')
+        lots = self.apply_eager_loading(
+            Lot.objects.expired().with_expiration(), LotSerializer
+        ).order_by('expiration_date')
         
         serializer = LotSerializer(lots, many=True)
         return Response(serializer.data)
 
 
-class SerialNumberViewSet(BaseViewSet):
+class SerialNumberViewSet(EagerLoadingMixin, BaseViewSet):
     """
     ViewSet para números de serie.
     
     Propósito:
         Trazabilidad de productos serializados.
     """
-    queryset = SerialNumber.objects.all().select_related(
-        'product', 'warehouse', 'lot'
-    )
+    queryset = SerialNumber.objects.all()
     serializer_class = SerialNumberSerializer
     permission_classes = [IsAuthenticated, HasModulePermission]
     module_name = 'inventory'
@@ -765,8 +835,8 @@ class SerialNumberViewSet(BaseViewSet):
             Verificar estado y ubicación de un número de serie específico.
         """
         try:
-            sn = SerialNumber.objects.select_related(
-                'product', 'warehouse', 'lot'
+            sn = self.apply_eager_loading(
+                SerialNumber.objects.all(), SerialNumberSerializer
             ).get(serial=serial)
             
             serializer = SerialNumberSerializer(sn)
@@ -778,7 +848,7 @@ class SerialNumberViewSet(BaseViewSet):
             )
 
 
-class InventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class InventoryTransactionViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para transacciones de inventario.
     
@@ -786,18 +856,39 @@ class InventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         Consultar historial de movimientos (solo lectura).
         Las transacciones se crean automáticamente por el servicio.
     """
-    queryset = InventoryTransaction.objects.all().select_related(
-        'product', 'warehouse', 'lot', 'created_by'
-    )
+    queryset = InventoryTransaction.objects.all()
     serializer_class = InventoryTransactionSerializer
     permission_classes = [IsAuthenticated, HasModulePermission]
     module_name = 'inventory'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['product', 'warehouse', 'transaction_type', 'reason']
+    filterset_fields = [
+        'product', 'warehouse', 'transaction_type', 'reason',
+        'reference_type', 'reference_id',
+    ]
     search_fields = ['product__name', 'product__sku', 'reference_type', 'notes']
     ordering_fields = ['created_at', 'quantity']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # notes solo se muestra en el detalle
+            queryset = queryset.defer('notes')
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return InventoryTransactionListSerializer
+        return InventoryTransactionSerializer
+    
+    def list(self, request, *args, **kwargs):
+        # ?export=csv: mismos filtros del listado, en streaming y sin paginar
+        # Por qué no ?format=csv: DRF reserva "format" para negociar el renderer
+        if request.query_params.get('export') == 'csv':
+            queryset = self.filter_queryset(self.get_queryset())
+            return _transactions_csv_response(queryset, 'movimientos')
+        return super().list(request, *args, **kwargs)
+    
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
@@ -814,13 +905,12 @@ class InventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         queryset = self.get_queryset()
         
         # Filtros
-        start_date = request.query_params.get('start_date')
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        
-        end_date = request.query_params.get('end_date')
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
+        # Rango sobre la columna, no sobre created_at::date, para usar índices
+        queryset = queryset.filter(**day_range_filter(
+            'created_at',
+            request.query_params.get('start_date'),
+            request.query_params.get('end_date')
+        ))
         
         warehouse = request.query_params.get('warehouse')
         if warehouse:
@@ -828,7 +918,7 @@ class InventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Agregaciones
         summary = queryset.values('transaction_type').annotate(
-            count=Sum('id'),
+            count=Count('id'),
             total_quantity=Sum('quantity')
         )
         
@@ -838,7 +928,7 @@ class InventoryTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class StockTransferViewSet(BaseViewSet):
+class StockTransferViewSet(EagerLoadingMixin, BaseViewSet):
     """
     ViewSet para transferencias de inventario.
     
@@ -851,10 +941,13 @@ class StockTransferViewSet(BaseViewSet):
         POST /transfers/{id}/receive/ - Recibir transferencia
         POST /transfers/{id}/cancel/ - Cancelar transferencia
     """
-    queryset = StockTransfer.objects.all().select_related(
-        'source_warehouse', 'destination_warehouse',
-        'created_by', 'approved_by'
-    ).prefetch_related('items', 'items__product')
+    # Los ítems llevan su producto en la misma consulta del prefetch
+    queryset = StockTransfer.objects.all().prefetch_related(
+        Prefetch(
+            'items',
+            queryset=StockTransferItem.objects.select_related('product')
+        )
+    )
     serializer_class = StockTransferSerializer
     permission_classes = [IsAuthenticated, HasModulePermission]
     module_name = 'inventory'
@@ -862,9 +955,20 @@ class StockTransferViewSet(BaseViewSet):
     search_fields = ['transfer_number', 'notes']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # notes solo se muestra en el detalle
+            queryset = queryset.defer('notes')
+        return queryset
+    
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action == 'list':
+            return StockTransferListSerializer
+        if self.action == 'retrieve':
             return StockTransferDetailSerializer
+        if self.action == 'create':
+            return StockTransferCreateSerializer
         return StockTransferSerializer
     
     @action(detail=True, methods=['post'])
@@ -357,12 +357,29 @@ class PurchasingService(BaseService):
         Args:
             receipt: Recepción de mercancía
         """
-        from apps.inventory.services import InventoryService
+        from apps.inventory.services import GoodsLine, InventoryService
+        from .models import SupplierProduct
         
         if receipt.status != 'draft':
             raise ValidationError("Solo se pueden confirmar recepciones en borrador")
         
-        for line in receipt.lines.all():
+        lines = list(receipt.lines.select_related(
+            'order_line__product', 'lot', 'location'
+        ))
+        
+        # Precios del proveedor de todos los productos en una consulta
+        supplier_products = {
+            supplier_product.product_id: supplier_product
+            for supplier_product in SupplierProduct.objects.filter(
+                supplier=receipt.purchase_order.supplier,
+                product_id__in={line.order_line.product_id for line in lines}
+            )
+        }
+        
+        # Las entradas se registran juntas al final (un bloqueo, un UPDATE
+        # de stock y INSERTs por lotes) en lugar de una por línea
+        goods_lines = []
+        for line in lines:
             order_line = line.order_line
             
             # Actualizar cantidad recibida en orden
@@ -373,34 +390,37 @@ class PurchasingService(BaseService):
                 order_line.status = 'partial'
             order_line.save()
             
-            # Crear movimiento de inventario
+            # Movimiento de inventario
             if line.quantity_accepted > 0:
-                InventoryService.receive_stock(
+                goods_lines.append(GoodsLine(
                     product=order_line.product,
-                    warehouse=receipt.warehouse,
                     quantity=line.quantity_accepted,
                     unit_cost=order_line.unit_price,
-                    reference=f"GR-{receipt.number}",
                     lot=line.lot,
                     location=line.location
-                )
+                ))
             
             # Actualizar precio de costo del producto
             order_line.product.cost_price = order_line.unit_price
             order_line.product.save(update_fields=['cost_price'])
             
             # Actualizar último precio del proveedor
-            from .models import SupplierProduct
-            supplier_product = SupplierProduct.objects.filter(
-                supplier=receipt.purchase_order.supplier,
-                product=order_line.product
-            ).first()
-            
+            supplier_product = supplier_products.get(order_line.product_id)
             if supplier_product:
                 supplier_product.last_purchase_date = receipt.receipt_date
                 supplier_product.last_purchase_price = order_line.unit_price
                 supplier_product.save()
         
+        if goods_lines:
+            InventoryService.receive_goods(
+                warehouse=receipt.warehouse,
+                lines=goods_lines,
+                reference_type='goods_receipt',
+                reference_id=receipt.id,
+                notes=f"GR-{receipt.number}",
+                user=receipt.received_by
+            )
+        
         receipt.status = 'completed'
         receipt.save()
         
@@ -13,6 +13,8 @@ from django.core.mail import send_mail
 from django.conf import settings
 from datetime import date, timedelta
 from decimal import Decimal
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
 
 import logging
 
@@ -257,31 +259,34 @@ def generate_daily_sales_report():
         status='confirmed'
     )
     
-    # Totales
-    order_total = sum(o.total for o in orders)
-    invoice_total = sum(i.total for i in invoices)
-    payment_total = sum(p.amount for p in payments)
+    # Totales: cantidad y suma en una agregación por tabla
+    zero = Value(Decimal('0'))
+    order_stats = orders.aggregate(count=Count('id'), total=Coalesce(Sum('total'), zero))
+    invoice_stats = invoices.aggregate(count=Count('id'), total=Coalesce(Sum('total'), zero))
+    payment_stats = payments.aggregate(count=Count('id'), total=Coalesce(Sum('amount'), zero))
     
     report = f"""
 REPORTE DIARIO DE VENTAS - {yesterday}
 {'='*50}
 
 ÓRDENES DE VENTA
-- Cantidad: {orders.count()}
-- Total: ${order_total:,.2f}
+- Cantidad: {order_stats['count']}
+- Total: ${order_stats['total']:,.2f}
 
 FACTURAS EMITIDAS
-- Cantidad: {invoices.count()}
-- Total: ${invoice_total:,.2f}
+- Cantidad: {invoice_stats['count']}
+- Total: ${invoice_stats['total']:,.2f}
 
 PAGOS RECIBIDOS
-- Cantidad: {payments.count()}
-- Total: ${payment_total:,.2f}
+- Cantidad: {payment_stats['count']}
+- Total: ${payment_stats['total']:,.2f}
 
 DETALLE DE ÓRDENES:
 """
     
-    for order in orders:
+    for order in orders.select_related('customer').only(
+        'number', 'total', 'customer__name'
+    ):
         report += f"  - {order.number}: {order.customer.name} - ${order.total:,.2f}\n"
     
     # Enviar reporte
@@ -302,22 +307,21 @@ def sync_customer_balances():
     Sincroniza saldos de crédito de clientes.
     """
     from .models import Customer, Invoice
-    from django.db.models import Sum
     
-    customers = Customer.objects.all()
+    # Crédito usado por cliente (facturas pendientes) en un solo GROUP BY
+    pending_by_customer = dict(
+        Invoice.objects.filter(
+            status__in=['pending', 'partial']
+        ).values_list('customer').annotate(
+            balance=Sum('total') - Sum('amount_paid')
+        ).order_by()
+    )
+    
+    customers = Customer.objects.only('id', 'credit_used')
     updated = 0
     
     for customer in customers:
-        # Calcular crédito usado basado en facturas pendientes
-        pending = Invoice.objects.filter(
-            customer=customer,
-            status__in=['pending', 'partial']
-        ).aggregate(
-            total=Sum('total'),
-            paid=Sum('amount_paid')
-        )
-        
-        credit_used = (pending['total'] or Decimal('0')) - (pending['paid'] or Decimal('0'))
+        credit_used = pending_by_customer.get(customer.pk) or Decimal('0')
         
         if customer.credit_used != credit_used:
             customer.credit_used = credit_used
@@ -372,32 +376,32 @@ def calculate_sales_commissions(period_start: str, period_end: str):
     """
     from .models import SalesOrder, Invoice
     from apps.hr.models import Employee
-    from django.db.models import Sum
     
     start_date = date.fromisoformat(period_start)
     end_date = date.fromisoformat(period_end)
     
-    # Obtener facturas pagadas en el período
-    invoices = Invoice.objects.filter(
-        invoice_date__range=[start_date, end_date],
-        status='paid'
-    ).select_related('sales_order__sales_rep')
-    
-    commissions = {}
-    
-    for invoice in invoices:
-        if invoice.sales_order and invoice.sales_order.sales_rep:
-            rep = invoice.sales_order.sales_rep
-            
-            if rep.id not in commissions:
-                commissions[rep.id] = {
-                    'employee': rep,
-                    'total_sales': Decimal('0'),
-                    'commission_rate': Decimal('0.05'),  # 5% default
-                    'commission_amount': Decimal('0')
-                }
-            
-            commissions[rep.id]['total_sales'] += invoice.total
+    # Ventas pagadas del período por vendedor (una fila por vendedor)
+    sales_by_rep = dict(
+        Invoice.objects.filter(
+            invoice_date__range=[start_date, end_date],
+            status='paid',
+            sales_order__sales_rep__isnull=False
+        ).values_list('sales_order__sales_rep').annotate(
+            total_sales=Sum('total')
+        ).order_by()
+    )
+    reps = Employee.objects.select_related('user').in_bulk(list(sales_by_rep))
+    
+    commissions = {
+        rep_id: {
+            'employee': reps[rep_id],
+            'total_sales': total_sales,
+            'commission_rate': Decimal('0.05'),  # 5% default
+            'commission_amount': Decimal('0')
+        }
+        for rep_id, total_sales in sales_by_rep.items()
+        if rep_id in reps
+    }
     
     # Calcular comisiones
     for rep_id, data in commissions.items():
@@ -76,6 +76,9 @@ app.conf.task_routes = {
     # Tareas de email masivo
     'apps.notifications.tasks.send_bulk_*': {'queue': 'bulk_email'},
     
+    # Notificaciones de inscripción a capacitaciones
+    'apps.hr.tasks.send_enrollment_notifications': {'queue': 'training_notifications'},
+    
     # Por defecto: cola general
     '*': {'queue': 'default'},
 }
@@ -459,6 +459,14 @@ LOGGING = {
     },
 }
 
+# ========================================================
+# INVENTARIO
+# ========================================================
+# Filas por INSERT en las altas masivas (números de serie de una
+# recepción). Por qué configurable: recepciones muy grandes pueden
+# exceder el tamaño máximo de consulta con lotes mayores
+INVENTORY_BULK_CREATE_BATCH_SIZE = int(os.getenv('INVENTORY_BULK_CREATE_BATCH_SIZE', '500'))
+
 # ========================================================
 # CONFIGURACIÓN DE ID POR DEFECTO
 # ========================================================
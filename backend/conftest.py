@@ -1,41 +1,19 @@
 import pytest
-from django.conf import settings
 
 
-def pytest_configure():
-    """Configure Django settings for tests"""
-    settings.configure(
-        DEBUG=True,
-        DATABASES={
-            'default': {
-                'ENGINE': 'django.db.backends.sqlite3',
-                'NAME': ':memory:',
-            }
-        },
-        INSTALLED_APPS=[
-            'django.contrib.auth',
-            'django.contrib.contenttypes',
-            'rest_framework',
-        ],
-        REST_FRAMEWORK={
-            'DEFAULT_AUTHENTICATION_CLASSES': [
-                'rest_framework_simplejwt.authentication.JWTAuthentication',
-            ],
-            'DEFAULT_PERMISSION_CLASSES': [
-                'rest_framework.permissions.IsAuthenticated',
-            ],
-            'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-            'PAGE_SIZE': 20,
-        },
-        SECRET_KEY='test-secret-key-for-testing-only',
-        USE_TZ=True,
-    )
+# La configuración viene de config.settings (DJANGO_SETTINGS_MODULE en
+# pytest.ini); pytest-django crea la base de datos de pruebas en el
+# PostgreSQL configurado por DB_HOST/DB_PORT/DB_USER/DB_PASSWORD.
 
 
-@pytest.fixture(scope='session')
-def django_db_setup():
-    """Setup test database"""
-    pass
+@pytest.fixture(autouse=True)
+def test_settings(settings):
+    """Sustituye los servicios externos (Redis) por equivalentes en memoria."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
 
 
 @pytest.fixture
@@ -0,0 +1,57 @@
+import pytest
+from datetime import date
+from django.core.cache import cache
+
+from apps.hr.models import Attendance, Employee
+from apps.hr.services import AttendanceService
+
+
+@pytest.fixture
+def employee():
+    return Employee.objects.create(
+        employee_code='EMP001',
+        first_name='Ana',
+        last_name='López',
+        id_number='ID001',
+        email='ana@example.com',
+        hire_date=date(2024, 1, 1)
+    )
+
+
+@pytest.fixture
+def service():
+    cache.clear()
+    return AttendanceService()
+
+
+@pytest.mark.django_db
+class TestRecordCheckIn:
+    def test_first_check_in_returns_attendance_id(self, employee, service):
+        result = service.record_check_in(employee.pk, '08:00')
+
+        assert result['success'] is True
+        attendance = Attendance.objects.get(employee=employee)
+        assert result['attendance_id'] == attendance.pk
+
+    def test_second_check_in_is_rejected_without_cache(self, employee, service):
+        service.record_check_in(employee.pk, '08:00')
+        # Sin la marca en caché (expulsión, FLUSHDB) decide la base de datos
+        cache.clear()
+
+        result = service.record_check_in(employee.pk, '09:30')
+
+        assert result['success'] is False
+        attendance = Attendance.objects.get(employee=employee)
+        assert str(attendance.check_in) == '08:00:00'
+
+    def test_existing_row_without_check_in_is_completed(self, employee, service):
+        service.record_check_in(employee.pk, '08:00')
+        Attendance.objects.filter(employee=employee).update(check_in=None)
+        cache.clear()
+
+        result = service.record_check_in(employee.pk, '08:15')
+
+        assert result['success'] is True
+        attendance = Attendance.objects.get(employee=employee)
+        assert result['attendance_id'] == attendance.pk
+        assert str(attendance.check_in) == '08:15:00'
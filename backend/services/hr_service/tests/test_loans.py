@@ -0,0 +1,89 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+
+from apps.hr.models import Employee, Loan
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(
+        email='rrhh@example.com',
+        password='secret-pass-123',
+        first_name='Rita',
+        last_name='Ramos'
+    )
+
+
+@pytest.fixture
+def client(api_client, user):
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture
+def loan():
+    employee = Employee.objects.create(
+        employee_code='EMP010',
+        first_name='Luis',
+        last_name='Pérez',
+        id_number='ID010',
+        email='luis@example.com',
+        hire_date=date(2024, 1, 1)
+    )
+    return Loan.objects.create(
+        employee=employee,
+        loan_type='personal',
+        amount=Decimal('1200.00'),
+        installments=12,
+        installment_amount=Decimal('100.00'),
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 12, 31)
+    )
+
+
+def loan_action(loan_id, action):
+    return reverse(f'hr:loan-{action}', kwargs={'pk': loan_id})
+
+
+@pytest.mark.django_db
+class TestLoanTransitions:
+    def test_approve_then_activate(self, client, user, loan):
+        response = client.post(loan_action(loan.pk, 'approve'))
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.post(loan_action(loan.pk, 'activate'))
+        assert response.status_code == status.HTTP_200_OK
+
+        loan.refresh_from_db()
+        assert loan.status == 'active'
+        assert loan.approved_by_id == user.pk
+        assert loan.remaining_amount == loan.amount
+
+    def test_second_approval_is_rejected(self, client, loan):
+        client.post(loan_action(loan.pk, 'approve'))
+
+        response = client.post(loan_action(loan.pk, 'approve'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        loan.refresh_from_db()
+        assert loan.status == 'approved'
+
+    def test_activate_requires_approval(self, client, loan):
+        response = client.post(loan_action(loan.pk, 'activate'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        loan.refresh_from_db()
+        assert loan.status == 'pending'
+        assert loan.remaining_amount == Decimal('0.00')
+
+    def test_missing_loan_is_404(self, client, loan):
+        loan_id = loan.pk
+        loan.delete()
+
+        response = client.post(loan_action(loan_id, 'approve'))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.urls import reverse
+from rest_framework import status
+
+from apps.hr.models import Employee, Training, TrainingParticipant
+from apps.hr.tasks import send_enrollment_notifications
+
+
+@pytest.fixture
+def client(api_client):
+    user = get_user_model().objects.create_user(
+        email='rrhh@example.com',
+        password='secret-pass-123',
+        first_name='Rita',
+        last_name='Ramos'
+    )
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture
+def employees():
+    return [
+        Employee.objects.create(
+            employee_code=f'EMP{index:03d}',
+            first_name=f'Empleado {index}',
+            last_name='Prueba',
+            id_number=f'ID{index:03d}',
+            email=f'empleado{index}@example.com',
+            hire_date=date(2024, 1, 1)
+        )
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def training():
+    return Training.objects.create(
+        code='TRN001',
+        name='Seguridad Industrial',
+        start_date=date(2025, 3, 1),
+        end_date=date(2025, 3, 2),
+        max_participants=2
+    )
+
+
+def enroll(client, training, employees):
+    return client.post(
+        reverse('hr:training-enroll', kwargs={'pk': training.pk}),
+        {'employee_ids': [str(employee.pk) for employee in employees]},
+        format='json'
+    )
+
+
+@pytest.mark.django_db
+class TestTrainingEnroll:
+    def test_enroll_creates_participants_and_queues_notifications(
+        self, client, training, employees, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = enroll(client, training, employees[:2])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['enrolled'] == 2
+        assert set(
+            TrainingParticipant.objects.filter(training=training)
+            .values_list('employee_id', flat=True)
+        ) == {employees[0].pk, employees[1].pk}
+        assert len(callbacks) == 1
+
+    def test_already_enrolled_are_skipped(self, client, training, employees):
+        enroll(client, training, employees[:1])
+
+        response = enroll(client, training, employees[:2])
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['enrolled'] == 1
+        assert TrainingParticipant.objects.filter(training=training).count() == 2
+
+    def test_soft_deleted_participant_is_reactivated(self, client, training, employees):
+        enroll(client, training, employees[:1])
+        TrainingParticipant.objects.get(training=training).delete()
+
+        response = enroll(client, training, employees[:1])
+
+        assert response.data['enrolled'] == 1
+        participant = TrainingParticipant.objects.get(training=training)
+        assert participant.status == 'enrolled'
+
+    def test_capacity_is_enforced(self, client, training, employees):
+        response = enroll(client, training, employees)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not TrainingParticipant.objects.filter(training=training).exists()
+
+
+@pytest.mark.django_db
+def test_enrollment_notifications_are_sent(training, employees):
+    participant = TrainingParticipant.objects.create(
+        training=training,
+        employee=employees[0],
+        status='enrolled'
+    )
+
+    result = send_enrollment_notifications(
+        str(training.pk), [str(participant.employee_id)]
+    )
+
+    assert result['sent'] == 1
+    assert mail.outbox[0].to == [employees[0].email]
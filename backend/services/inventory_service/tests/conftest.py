@@ -0,0 +1,47 @@
+import pytest
+
+from apps.inventory.models import Category, Product, UnitOfMeasure, Warehouse
+
+
+def make_warehouse(code):
+    return Warehouse.objects.create(
+        code=code,
+        name=f'Almacén {code}',
+        address='Av. Central 100',
+        city='Monterrey',
+        state='Nuevo León',
+        postal_code='64000'
+    )
+
+
+@pytest.fixture
+def source_warehouse():
+    return make_warehouse('WH-SRC')
+
+
+@pytest.fixture
+def destination_warehouse():
+    return make_warehouse('WH-DST')
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(code='GEN', name='General')
+
+
+@pytest.fixture
+def unit():
+    return UnitOfMeasure.objects.create(name='Pieza', abbreviation='pz')
+
+
+@pytest.fixture
+def make_product(category, unit):
+    def make(sku, **extra):
+        return Product.objects.create(
+            sku=sku,
+            name=f'Producto {sku}',
+            category=category,
+            unit_of_measure=unit,
+            **extra
+        )
+    return make
@@ -0,0 +1,80 @@
+import pytest
+from decimal import Decimal
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.models import (
+    InventoryTransaction,
+    Lot,
+    Stock,
+    WarehouseLocation,
+)
+from apps.inventory.services import GoodsLine, InventoryService
+
+
+@pytest.fixture
+def location(source_warehouse):
+    return WarehouseLocation.objects.create(
+        warehouse=source_warehouse,
+        code='A-01-03',
+        name='Pasillo A, Estante 1, Nivel 3'
+    )
+
+
+@pytest.mark.django_db
+class TestReceiveGoods:
+    def test_creates_stock_at_the_received_location(
+        self, source_warehouse, make_product, location
+    ):
+        product = make_product('SKU-NEW')
+
+        records = InventoryService.receive_goods(
+            warehouse=source_warehouse,
+            lines=[
+                GoodsLine(product, 5, Decimal('10.00'), location=location),
+                GoodsLine(product, 3, Decimal('10.00'), location=location),
+            ],
+            reference_type='goods_receipt'
+        )
+
+        stock = Stock.objects.get(product=product, warehouse=source_warehouse)
+        assert stock.quantity == 8
+        assert stock.location_id == location.pk
+        assert [(r.stock_before, r.stock_after) for r in records] == [(0, 5), (5, 8)]
+        assert InventoryTransaction.objects.filter(
+            product=product,
+            transaction_type=InventoryTransaction.TransactionType.IN
+        ).count() == 2
+
+    def test_adds_to_existing_stock_and_lots(
+        self, source_warehouse, make_product, location
+    ):
+        product = make_product('SKU-OLD')
+        stock = Stock.objects.create(
+            product=product, warehouse=source_warehouse, quantity=4
+        )
+        lot = Lot.objects.create(
+            product=product, warehouse=source_warehouse, lot_number='L-1', quantity=4
+        )
+
+        InventoryService.receive_goods(
+            warehouse=source_warehouse,
+            lines=[GoodsLine(product, 6, lot=lot, location=location)]
+        )
+
+        stock.refresh_from_db()
+        lot.refresh_from_db()
+        assert stock.quantity == 10
+        # Solo se asigna ubicación a las filas de stock que se crean
+        assert stock.location_id is None
+        assert lot.quantity == 10
+
+    def test_rejects_non_positive_quantities(self, source_warehouse, make_product):
+        product = make_product('SKU-ZERO')
+
+        with pytest.raises(ValidationException):
+            InventoryService.receive_goods(
+                warehouse=source_warehouse,
+                lines=[GoodsLine(product, 0)]
+            )
+
+        assert not Stock.objects.filter(product=product).exists()
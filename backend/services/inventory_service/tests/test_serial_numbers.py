@@ -0,0 +1,86 @@
+import pytest
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.models import SerialNumber, Stock
+from apps.inventory.services import InventoryService
+
+
+@pytest.fixture
+def serialized_product(make_product):
+    return make_product('SKU-SN', track_serial_numbers=True)
+
+
+@pytest.fixture
+def received(source_warehouse, serialized_product):
+    InventoryService.add_stock(
+        product_id=serialized_product.pk,
+        warehouse_id=source_warehouse.pk,
+        quantity=3,
+        serial_numbers=['SN-1', 'SN-2', 'SN-3']
+    )
+    return serialized_product
+
+
+def serial_statuses(product):
+    return dict(
+        SerialNumber.objects.filter(product=product).values_list('serial', 'status')
+    )
+
+
+@pytest.mark.django_db
+class TestSerialNumbers:
+    def test_add_stock_creates_every_serial(self, source_warehouse, received):
+        assert serial_statuses(received) == {
+            'SN-1': 'available', 'SN-2': 'available', 'SN-3': 'available'
+        }
+        assert Stock.objects.get(product=received).quantity == 3
+
+    def test_add_stock_rejects_duplicate_serials(
+        self, source_warehouse, serialized_product
+    ):
+        with pytest.raises(ValidationException):
+            InventoryService.add_stock(
+                product_id=serialized_product.pk,
+                warehouse_id=source_warehouse.pk,
+                quantity=2,
+                serial_numbers=['SN-9', 'SN-9']
+            )
+
+        assert not SerialNumber.objects.exists()
+
+    def test_remove_stock_sells_the_given_serials(self, source_warehouse, received):
+        InventoryService.remove_stock(
+            product_id=received.pk,
+            warehouse_id=source_warehouse.pk,
+            quantity=2,
+            serial_numbers=['SN-1', 'SN-3']
+        )
+
+        assert serial_statuses(received) == {
+            'SN-1': 'sold', 'SN-2': 'available', 'SN-3': 'sold'
+        }
+        assert Stock.objects.get(product=received).quantity == 1
+
+    def test_remove_stock_rejects_duplicate_serials(self, source_warehouse, received):
+        with pytest.raises(ValidationException):
+            InventoryService.remove_stock(
+                product_id=received.pk,
+                warehouse_id=source_warehouse.pk,
+                quantity=2,
+                serial_numbers=['SN-1', 'SN-1']
+            )
+
+        assert serial_statuses(received)['SN-1'] == 'available'
+        assert Stock.objects.get(product=received).quantity == 3
+
+    def test_remove_stock_rejects_unavailable_serials(self, source_warehouse, received):
+        with pytest.raises(ValidationException):
+            InventoryService.remove_stock(
+                product_id=received.pk,
+                warehouse_id=source_warehouse.pk,
+                quantity=2,
+                serial_numbers=['SN-1', 'SN-404']
+            )
+
+        assert serial_statuses(received)['SN-1'] == 'available'
+        assert Stock.objects.get(product=received).quantity == 3
@@ -0,0 +1,97 @@
+import pytest
+
+from apps.core.exceptions import InsufficientStockException
+from apps.inventory.models import (
+    InventoryTransaction,
+    Stock,
+    StockTransfer,
+    StockTransferItem,
+)
+from apps.inventory.services import InventoryService
+
+
+@pytest.mark.django_db
+class TestApplyDeltas:
+    def test_updates_each_row_with_its_own_delta(self, source_warehouse, make_product):
+        first = Stock.objects.create(
+            product=make_product('SKU-1'), warehouse=source_warehouse, quantity=10
+        )
+        second = Stock.objects.create(
+            product=make_product('SKU-2'), warehouse=source_warehouse, quantity=5
+        )
+        untouched = Stock.objects.create(
+            product=make_product('SKU-3'), warehouse=source_warehouse, quantity=7
+        )
+
+        updated = Stock.objects.apply_deltas(
+            quantity={first.pk: -3, second.pk: 4},
+            reserved={second.pk: 2}
+        )
+
+        assert updated == 2
+        first.refresh_from_db()
+        second.refresh_from_db()
+        untouched.refresh_from_db()
+        assert (first.quantity, first.reserved_quantity) == (7, 0)
+        assert (second.quantity, second.reserved_quantity) == (9, 2)
+        assert untouched.quantity == 7
+
+    def test_without_deltas_runs_no_update(self):
+        assert Stock.objects.apply_deltas() == 0
+
+
+@pytest.fixture
+def transfer(source_warehouse, destination_warehouse, make_product):
+    transfer = StockTransfer.objects.create(
+        source_warehouse=source_warehouse,
+        destination_warehouse=destination_warehouse
+    )
+    for sku, on_hand, moved in (('SKU-A', 10, 4), ('SKU-B', 6, 6)):
+        product = make_product(sku)
+        Stock.objects.create(product=product, warehouse=source_warehouse, quantity=on_hand)
+        StockTransferItem.objects.create(transfer=transfer, product=product, quantity=moved)
+    return transfer
+
+
+def quantities(warehouse):
+    return dict(
+        Stock.objects.filter(warehouse=warehouse)
+        .values_list('product__sku', 'quantity')
+    )
+
+
+@pytest.mark.django_db
+class TestProcessTransfer:
+    def test_full_flow_moves_stock_and_logs_movements(
+        self, transfer, source_warehouse, destination_warehouse
+    ):
+        for action in ('confirm', 'ship', 'receive'):
+            InventoryService.process_transfer(transfer, action)
+
+        transfer.refresh_from_db()
+        assert transfer.status == StockTransfer.TransferStatus.COMPLETED
+        assert quantities(source_warehouse) == {'SKU-A': 6, 'SKU-B': 0}
+        assert quantities(destination_warehouse) == {'SKU-A': 4, 'SKU-B': 6}
+        assert not Stock.objects.filter(reserved_quantity__gt=0).exists()
+
+        movements = InventoryTransaction.objects.filter(reference_id=transfer.pk)
+        shipped = movements.get(
+            product__sku='SKU-A',
+            transaction_type=InventoryTransaction.TransactionType.TRANSFER_OUT
+        )
+        received = movements.get(
+            product__sku='SKU-A',
+            transaction_type=InventoryTransaction.TransactionType.TRANSFER_IN
+        )
+        assert (shipped.stock_before, shipped.stock_after) == (10, 6)
+        assert (received.stock_before, received.stock_after) == (0, 4)
+
+    def test_confirm_without_enough_stock_reserves_nothing(
+        self, transfer, source_warehouse
+    ):
+        Stock.objects.filter(product__sku='SKU-B').update(quantity=5)
+
+        with pytest.raises(InsufficientStockException):
+            InventoryService.process_transfer(transfer, 'confirm')
+
+        assert not Stock.objects.filter(reserved_quantity__gt=0).exists()
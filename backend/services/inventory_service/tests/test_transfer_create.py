@@ -0,0 +1,67 @@
+import pytest
+
+from apps.inventory.models import Stock, StockTransfer
+from apps.inventory.serializers import StockTransferCreateSerializer
+
+
+@pytest.fixture
+def products(source_warehouse, make_product):
+    products = [make_product(f'SKU-{index}') for index in range(3)]
+    for product in products:
+        Stock.objects.create(product=product, warehouse=source_warehouse, quantity=10)
+    return products
+
+
+def transfer_data(source_warehouse, destination_warehouse, items):
+    return {
+        'source_warehouse': source_warehouse.pk,
+        'destination_warehouse': destination_warehouse.pk,
+        'items': items,
+    }
+
+
+@pytest.mark.django_db
+class TestStockTransferCreateSerializer:
+    def test_creates_transfer_with_all_items(
+        self, source_warehouse, destination_warehouse, products
+    ):
+        serializer = StockTransferCreateSerializer(data=transfer_data(
+            source_warehouse,
+            destination_warehouse,
+            [{'product': product.pk, 'quantity': 2} for product in products]
+        ))
+        assert serializer.is_valid(), serializer.errors
+
+        transfer = serializer.save()
+
+        transfer.refresh_from_db()
+        assert transfer.status == StockTransfer.TransferStatus.DRAFT
+        assert transfer.transfer_number
+        assert sorted(
+            transfer.items.values_list('product__sku', 'quantity')
+        ) == [('SKU-0', 2), ('SKU-1', 2), ('SKU-2', 2)]
+        assert serializer.data['transfer_number'] == transfer.transfer_number
+
+    def test_rejects_products_without_source_stock(
+        self, source_warehouse, destination_warehouse, make_product
+    ):
+        product = make_product('SKU-NONE')
+        serializer = StockTransferCreateSerializer(data=transfer_data(
+            source_warehouse,
+            destination_warehouse,
+            [{'product': product.pk, 'quantity': 1}]
+        ))
+
+        assert not serializer.is_valid()
+        assert 'items' in serializer.errors
+        assert not StockTransfer.objects.exists()
+
+    def test_rejects_same_source_and_destination(self, source_warehouse, products):
+        serializer = StockTransferCreateSerializer(data=transfer_data(
+            source_warehouse,
+            source_warehouse,
+            [{'product': products[0].pk, 'quantity': 1}]
+        ))
+
+        assert not serializer.is_valid()
+        assert 'destination_warehouse' in serializer.errors